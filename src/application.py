@@ -1,593 +1,4656 @@
-# Importerer nødvendige biblioteker
-import os
-import socket
-import argparse
-import ipaddress
-from struct import *
-import time
-import sys
-import datetime
-
-# Beskrivelse av funksjonen:
-# Funksjon for å sjekke gyldigheten av en IP-adresse
-# Argumenter:
-# ip: Dette er IP-adressen som skal sjekkes
-# Funksjonen gjør:
-# Den prøver å lage en IP-adresse objekt fra den oppgitte strengen, og hvis det ikke er mulig, genererer den en feil
-# Brukes for å sikre at IP-adressen som sendes til serveren er i gyldig format
-# Retur: Hvis IP-adressen er gyldig, returneres den. Hvis ikke, kastes en argumentfeil.
-def valid_ip(ip):
-    try: 
-        ipaddress.ip_address(ip)
-        return ip
-    except ValueError:
-        raise argparse.ArgumentTypeError(f"Ugyldig IP adresse: {ip}")
-
-# Beskrivelse av funksjonen:
-# Funksjon for å sjekke gyldigheten av et portnummer
-# Argumenter:
-# port: Dette er portnummeret som skal sjekkes
-# Funksjonen gjør:
-# Den prøver å konvertere portnummeret til et heltall og sjekker om det er innenfor det gyldige området for portnumre (0-65535)
-# Brukes for å sikre at portnummeret som sendes til serveren er i gyldig format
-# Retur: Hvis portnummeret er gyldig, returneres det. Hvis ikke, kastes en argumentfeil.
-def valid_port(port):
-    try:
-        port = int(port)
-        if 0 <= port <= 65535:
-            return port
-        else:
-            raise argparse.ArgumentTypeError(f"Ugyldig portnummer: {port}. Må være mellom 0 og 65535.")
-    except ValueError:
-        raise argparse.ArgumentTypeError(f"Ugyldig portnummer: {port}. Må være et tall mellom 0 og 65535.")
-
-# Beskrivelse av funksjonen:
-# Funksjon for å sjekke om filen eksisterer og er av gyldig type
-# Argumenter:
-# file: Dette er banen til filen som skal sjekkes
-# Funksjonen gjør:
-# Den sjekker først om filen eksisterer. Deretter sjekker den om filen har riktig filtype (jpeg eller jpg)
-# Brukes for å sikre at filen som skal sendes eksisterer og er av riktig type
-# Retur: Hvis filen er gyldig, returneres filbanen. Hvis ikke, kastes en argumentfeil.
-def valid_file(file):
-    if not os.path.exists(file):
-        raise argparse.ArgumentTypeError(f"Filen {file} finnes ikke.")
-    elif not (file.endswith('.jpeg') or file.endswith('.jpg')):
-        raise argparse.ArgumentTypeError(f"Ugyldig filtype for {file}. Bare .jpeg eller .jpg filer er tillatt.")
-    else:
-        return file
-
-# Beskrivelse av funksjonen:
-# Funksjon for å sjekke om vindusstørrelsen er gyldig
-# Argumenter:
-# window_size: Dette er størrelsen på vinduet som skal sjekkes
-# Funksjonen gjør:
-# Den prøver å konvertere vindusstørrelsen til et heltall og sjekker om det er en positiv verdi
-# Brukes for å sikre at vindusstørrelsen som sendes til serveren er gyldig
-# Retur: Hvis vindusstørrelsen er gyldig, returneres den. Hvis ikke, kastes en argumentfeil.
-def valid_window_size(window_size):
-    window_size = int(window_size)
-    if window_size <= 0:
-        raise argparse.ArgumentTypeError(f"Ugyldig vindusstørrelse: {window_size}. Må være en positiv verdi.")
-    else:
-        return window_size
-
-# Beskrivelse av funksjonen:
-# Funksjon for å analysere kommandolinjeargumenter
-# Funksjonen gjør:
-# Definerer hva slags argumenter som kan tas inn fra kommandolinjen når programmet kjøres
-# Argumenter:
-# Ingen argumenter trengs for denne funksjonen siden den bruker argparse biblioteket for å håndtere kommandolinjeargumenter
-# Retur: Returnerer argumentene som ble spesifisert når programmet kjørte
-def parse_arguments():
-    parser = argparse.ArgumentParser(description="DRTP filoverføringsapplikasjon")
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument('-s', '--server', action='store_true', help="Aktiver servermodus")
-    group.add_argument('-c', '--client', action='store_true', help="Aktiver klientmodus")
-    parser.add_argument('-i', '--ip', type=valid_ip, default='127.0.0.1', help="IP-adressen til serveren (standard: 127.0.0.1)")
-    parser.add_argument('-p', '--port', type=valid_port, default=8080, help="Portnummer (standard: 8080)")
-    parser.add_argument('-f', '--file', type=valid_file, help="Filbane")
-    parser.add_argument('-w', '--window', type=valid_window_size, default=3, help="Størrelsen på skyvevinduet (standard: 3)")
-    parser.add_argument('-d', '--discard', type=int, help="Tilpasset testtilfelle for å hoppe over et sekvensnummer")
-    return parser.parse_args()
-    
-
-# Definer formatet for pakkehodet som '!HHH' for å passe til 16-bits verdier
-header_format = '!HHH'
-
-# Definerer flaggene for SYN, ACK, og FIN
-SYN = 1
-ACK = 2
-FIN = 4
-
-# Beskrivelse av funksjonen:
-# Funksjon for å lage en pakke med et formatert hode
-# Funksjonen gjør:
-# Bruker struct.pack for å skape et binært hode
-# Argumenter:
-# seq: sekvensnummeret for pakken
-# ack: bekreftelsesnummeret for pakken
-# flags: flaggene for pakken (SYN, ACK, FIN)
-# Retur: Returnerer en pakke med formatert hode
-def create_packet(seq, ack, flags):
-    return pack(header_format, seq, ack, flags)
-
-# Beskrivelse av funksjonen:
-# Funksjon for å tolke et pakkehode
-# Funksjonen gjør:
-# Bruker struct.unpack for å trekke ut sekvensnummeret, bekreftelsesnummeret, og flaggene fra hodet
-# Argumenter:
-# header: headeren av pakken som skal tolkes
-# Retur: Returnerer sekvensnummeret, bekreftelsesnummeret, og flaggene av pakken
-def parse_header(header):
-    return unpack(header_format, header)
-
-# Server klasse med all server kode
-class Server:
-    # Beskrivelse av funksjonen:
-    # Konstruktøren til Server-klassen.
-    # Argumenter:
-    # self: Referanse til det aktuelle Server-objektet
-    # ip: IP-adressen til serveren
-    # port: Portnummeret til serveren
-    # file: Filen som skal overføres. Denne parameteren er ikke relevant i servermodus, siden det er server som skal ta imot pakkene og lage en fil ut av det. 
-    # Hvis filen (-f) er satt, vil programmet avsluttes med en feilmelding.
-    # window_size: Størrelsen på skyvevinduet. I servermodus, er denne parameteren fastsatt til 3, og hvis en annen verdi er valgt, vil programmet avsluttes med en feilmelding.
-    # discard: Sekvensnummeret/pakken som skal forkastes for testformål.
-    # Funksjonen gjør:
-    # Validerer inngangsparameterne, initialiserer variabler for klassen og oppretter en socket for serveren.
-    # Brukes for å sette opp serveren med de gitte parameterne
-    # Retur: Ingen returverdi for denne funksjonen.
-    def __init__(self, ip, port, file, window_size, discard):
-        # Validerer inngangsparameterne
-        if file:
-            print("-s valget kan ikke ta -f argument.")
-            sys.exit(1)
-        if window_size != 3:
-            print("Kun klient (-c) kan endre vindusstørrelsen")
-            sys.exit(1)
-        
-        # Initialiserer variablene for klassen
-        self.ip = ip
-        self.port = port
-        self.discard = int(discard) if discard is not None else None
-        #Kjører neste funksjon
-        self.sock = self.create_socket()
-
-    # Beskrivelse av funksjonen:
-    # Denne metoden oppretter en UDP-socket for serveren.
-    # Argumenter: 
-    # self: Referanse til det aktuelle Server-objektet
-    # Funksjonen gjør:
-    # Oppretter en UDP-socket og binder den til den gitte IP-adressen og porten
-    # Brukes for å opprette en socket for serveren til å kommunisere med klienten
-    # Retur: Dersom alt går bra returneres socketen som ble opprettet, hvis det oppstår noe feil vil dette bli håndtert
-    def create_socket(self):
-        # Oppretter en UDP-socket
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        try:
-            # Binder socketen til den gitte IP-adressen og porten
-            sock.bind((self.ip, self.port))
-        except Exception as e:
-            # Håndterer feil ved opprettelse av server socket
-            print("Feil ved opprettelse av server socket:", e)
-            sock.close()
-            sys.exit(1)
-        return sock
-
-    # Beskrivelse av funksjonen:
-    # Starter serveren og venter på en SYN-pakke fra klienten.
-    # Argumenter: 
-    # self: Referanse til det aktuelle Server-objektet
-    # Funksjonen gjør:
-    # Starter serveren og venter på en SYN-pakke fra klienten
-    # Brukes for å starte serveren og vente på en SYN-pakke fra klienten for å etablere en forbindelse
-    # Retur: Ingen returverdi for denne funksjonen
-    def start(self):
-        # Starter serveren og venter på SYN-pakken
-        print(f'\nServeren kjører med IP-adresse = {self.ip} og portadresse = {self.port}\n')
-        #Kjører neste funksjon
-        self.receive_syn_packet()
-
-    # Beskrivelse av funksjonen:
-    # Venter på og behandler en innkommende SYN-pakke fra klienten.
-    # Argumenter: 
-    # self: Referanse til det aktuelle Server-objektet
-    # Funksjonen gjør:
-    # Venter på en SYN-pakke fra klienten og behandler den når den mottas
-    # Brukes for å opprette en forbindelse med klienten ved å motta en SYN-pakke
-    # Retur: Ingen returverdi for denne funksjonen
-    def receive_syn_packet(self):
-        # Venter på og behandler en innkommende SYN-pakke
-        try:
-            packet, address = self.sock.recvfrom(1000)
-            seq, ack, flags = parse_header(packet)
-            if flags == SYN:
-                print("SYN-pakke mottatt")
-                #Kjører neste funksjon
-                self.send_syn_ack(seq, address)
-        #Feilhåndtering
-        except socket.timeout:
-            print("Socket timeout oppstod under venting på SYN-pakke.")
-        except Exception as e:
-            print("Feil ved mottakelse av SYN-pakke:", e)
-
-    # Beskrivelse av funksjonen:
-    # Sender en SYN-ACK-pakke tilbake til klienten for å etablere forbindelse.
-    # Argumenter:
-    # self: Referanse til det aktuelle Server-objektet
-    # seq: Sekvensnummeret til den mottatte SYN-pakken
-    # address: Adressen til klienten
-    # Funksjonen gjør:
-    # Lager en SYN-ACK-pakke og sender den tilbake til klienten for å etablere en forbindelse (DRTP)
-    # Brukes for å bekrefte mottak av SYN-pakken og etablere en forbindelse med klienten
-    # Retur: Ingen returverdi for denne funksjonen
-    def send_syn_ack(self, seq, address):
-        # Sender en SYN-ACK-pakke tilbake til klienten
-        self.sock.sendto(create_packet(0, seq+1, SYN | ACK), address)
-        print("SYN-ACK-pakke sendt")
-        #Kjører neste funksjon
-        self.receive_ack()
-
-    # Beskrivelse av funksjonen:
-    # Venter på og behandler en innkommende ACK-pakke fra klienten.
-    # Argumenter:
-    # self: Referanse til det aktuelle Server-objektet
-    # Funksjonen gjør:
-    # Venter på en ACK-pakke fra klienten og behandler den når den mottas
-    # Brukes for å bekrefte etableringen av forbindelsen med klienten
-    # Retur: Ingen returverdi for denne funksjonen
-    def receive_ack(self):
-        # Venter på og behandler en innkommende ACK-pakke
-        try:
-            packet, address = self.sock.recvfrom(1000)
-            seq, ack, flags = parse_header(packet)
-            if flags == ACK:
-                print("ACK-pakke mottatt")
-                #Kjører neste funksjon
-                self.receive_data_packets(address, self.discard)
-        except socket.timeout:
-            print("Socket timeout oppstod under venting på ACK-pakke.")
-        except Exception as e:
-            print("Feil ved mottakelse av ACK-pakke:", e)
-
-    # Beskrivelse av funksjonen:
-    # Mottar data fra klienten, skriver dataene til en fil (Photo_recieved.jpg), og sender en ACK-pakke tilbake til klienten.
-    # Argumenter:
-    # self: Referanse til det aktuelle Server-objektet
-    # address: Adressen til klienten
-    # discard: Sekvensnummeret som skal forkastes for testformål
-    # Funksjonen gjør:
-    # Mottar data fra klienten, skriver dataene til en fil, og sender en ACK-pakke tilbake til klienten for hver mottatt pakke
-    # Denne funksjonen bruker også et "discard"-nummer for testformål. Hvis en pakke med dette sekvensnummeret mottas, vil den bli forkastet.
-    # Retur: Ingen returverdi for denne funksjonen
-    # Unntakshåndtering: Håndterer unntak som kan oppstå under mottak av pakker, inkludert socket timeout på 0.5 sekunder og andre unntak
-
-    def receive_data_packets(self, address, discard):
-        # Får stien til den nåværende mappen
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        # Legger til filnavnet til stien
-        filename = os.path.join(current_dir, 'Photo_received.jpg')
-        # Oppretter en ny fil i den nåværende mappen for å lagre mottatt data
-        file = open(filename, 'wb')
-        # Initialiserer variabler for å beregne gjennomstrømningen
-        start_time = time.time()
-        total_bytes = 0
-        # Forventet sekvensnummer
-        expected_seq = 1
-        # Siste sekvens skrevet til filen
-        last_written_seq = 0
-        discard_done = False
-        # Hovedserverløkke
-        while True:
-            try:
-                # Mottar data fra socket, henter avsenderens adresse og parserer pakkeheaderen for sekvensnummer, bekreftelsesflagg og flagg
-                data, address = self.sock.recvfrom(1000)
-                seq, ack, flags = parse_header(data[:6])
-
-                # Hvis sekvensnummeret er det vi forventer
-                if seq == expected_seq:
-                    # Hvis sekvensnummeret er lik self.discard og vi ikke allerede har forkastet en pakke
-                    if seq == self.discard and not discard_done:
-                        # Informer om at pakken er forkastet
-                        print(f"{datetime.datetime.now().strftime('%H:%M:%S.%f')} -- Pakke {seq} ble forkastet")
-                        discard_done = True  # Oppdater flagget for å indikere at vi har forkastet en pakke
-                        
-                        continue  # Fortsett til neste iterasjon av løkken uten å behandle den forkastede pakken
-
-                    # Hvis sekvensnummeret ikke er lik self.discard, behandles pakken som vanlig
-                    print(f"{datetime.datetime.now().strftime('%H:%M:%S.%f')} -- Pakke {seq} er mottatt")
-                    file.write(data[6:])
-                    total_bytes += len(data) - 6
-                    last_written_seq = seq  # Oppdaterer den siste sekvens som ble skrevet
-                    expected_seq += 1
-
-                    print(f"{datetime.datetime.now().strftime('%H:%M:%S.%f')} -- Sender ack for den mottatte {last_written_seq}")  # Sender ACK for den siste skrevne sekvens
-                    self.sock.sendto(create_packet(0, expected_seq, ACK), address)
-
-                # Hvis pakken har et høyere sekvensnummer enn forventet
-                elif seq > expected_seq:
-                    print(f"{datetime.datetime.now().strftime('%H:%M:%S.%f')} -- Uordnet pakke {seq} er mottat")
-                    continue  # Fortsett til neste iterasjon av løkken uten å behandle den ut-av-rekkefølge-pakken
-                            
-                
-                if flags == FIN:
-                    print("\nFIN-pakke mottatt")
-                    #Kjører neste funksjon
-                    self.send_fin_ack(seq, address)
-                    break
-            except socket.timeout:
-                print("Socket timeout oppstod under venting på en pakke.")
-            except Exception as e:
-                print("Feil ved mottakelse av pakke:", e)
-                sys.exit(1)
-        # Beregner og skriver ut gjennomstrømningen
-        throughput = total_bytes / (time.time() - start_time) * 8 / 1e6
-        print(f"Gjennomstrømningen er {throughput:.2f} Mbps")
-        # Lukker tilkoblingen og avslutter programmet
-        self.sock.close()
-        print("Forbindelsen er avsluttet")
-        sys.exit(1)
-
-    # Beskrivelse av funksjonen:
-    # Sender en FIN-ACK-pakke tilbake til klienten for å avslutte forbindelsen.
-    # Argumenter:
-    # self: Referanse til det aktuelle Server-objektet
-    # seq: Sekvensnummeret til den mottatte FIN-pakken
-    # address: Adressen til klienten
-    # Funksjonen gjør:
-    # Lager en FIN-ACK-pakke og sender den tilbake til klienten for å avslutte forbindelsen
-    # Brukes for å bekrefte mottak av FIN-pakken og avslutte forbindelsen med klienten
-    # Retur: Ingen returverdi for denne funksjonen
-    def send_fin_ack(self, seq, address):
-        # Sender en FIN-ACK-pakke tilbake til klienten
-        self.sock.sendto(create_packet(0, seq+1, ACK), address)
-        print("FIN ACK-pakke sendt\n")
-        
-# Klientklasse med all kode for klient
-class Client:
-
-    # Beskrivelse av funksjonen:
-    # Initialiserer en ny klientinstans
-    # Argumenter:
-    # self: Referanse til det aktuelle Client-objektet
-    # ip: IP-adressen til serveren
-    # port: Portnummeret til serveren
-    # file: Filbanen til filen som skal sendes
-    # window_size: Størrelsen på skyvevinduet
-    # discard: Parameter for å forkaste pakker (ikke brukt i kontrollinjeargumentene for klient)
-    # Funksjonen gjør:
-    # Validerer inputargumentene og initialiserer klientobjektet
-    # Retur: Ingen returverdi for denne funksjonen
-    def __init__(self, ip, port, file, window_size, discard):
-        # Sjekker om filbanen er gitt
-        if not file:
-            print("Feil: Filbane er nødvendig i klientmodus.")
-            sys.exit(1)
-        # Sjekker om discard-argumentet er gitt
-        if discard:
-            print("Feil: -c valget kan ikke ta -d argumentet.")
-            sys.exit(1)
-        # Setter objektvariablene
-        self.ip = ip
-        self.port = port
-        self.file = file
-        self.window_size = window_size
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.settimeout(0.5)
-
-    # Beskrivelse av funksjonen:
-    # Starter tilkoblingsprosessen til serveren
-    # Argumenter:
-    # self: Referanse til det aktuelle Client-objektet
-    # Funksjonen gjør:
-    # Prøver å koble til serveren og sender en SYN-pakke til serveren for å initiere forbindelsen
-    # Retur: Ingen returverdi for denne funksjonen
-    def connect(self):
-        # Prøver å koble til serveren
-        try:
-            self.sock.connect((self.ip, self.port))
-            print("\nFase for etablering av forbindelse:\n")
-            # Sender en SYN-pakke til serveren for å initiere forbindelse
-            self.send_syn_packet()
-        except ConnectionRefusedError:
-            print(f"Feil: Tilkobling nektet. Serveren er ikke tilgjengelig på {self.ip}:{self.port}")
-            self.sock.close()
-        except Exception as e:
-            print("Feil ved oppretting av klient socket:", e)
-            self.sock.close()
-
-    # Beskrivelse av funksjonen:
-    # Sender en SYN-pakke til serveren
-    # Argumenter:
-    # self: Referanse til det aktuelle Client-objektet
-    # Funksjonen gjør:
-    # Sender en SYN-pakke til serveren og venter på en SYN-ACK-pakke fra serveren
-    # Retur: Ingen returverdi for denne funksjonen
-    def send_syn_packet(self):
-        self.sock.sendto(create_packet(0, 0, SYN), (self.ip, self.port))
-        print("SYN-pakke er sendt")
-        # Mottar en SYN-ACK-pakke fra serveren
-        self.receive_syn_ack()
-
-    # Beskrivelse av funksjonen:
-    # Mottar en SYN-ACK-pakke fra serveren
-    # Argumenter:
-    # self: Referanse til det aktuelle Client-objektet
-    # Funksjonen gjør:
-    # Venter på en SYN-ACK-pakke fra serveren og sender en ACK-pakke tilbake når den mottas
-    # Retur: Ingen returverdi for denne funksjonen
-    def receive_syn_ack(self):
-        # Prøver å motta en SYN-ACK-pakke fra serveren
-        try:
-            data, server = self.sock.recvfrom(1000)
-            _, ack, flags = parse_header(data[:6])
-            if flags == (SYN | ACK):
-                print("SYN-ACK pakke er mottatt")
-                # Sender en ACK-pakke til serveren
-                self.send_ack_packet()
-
-        except socket.timeout:
-            print("Timeout oppstod, mislykket tilkoblingsforsøk")
-            self.sock.close()
-        except Exception as e:
-            print("Feil ved mottak av SYN-ACK pakke fra serveren:", e)
-            self.sock.close()
-
-    # Beskrivelse av funksjonen:
-    # Sender en ACK-pakke til serveren
-    # Argumenter:
-    # self: Referanse til det aktuelle Client-objektet
-    # Funksjonen gjør:
-    # Sender en ACK-pakke til serveren og starter filoverføringen
-    # Retur: Ingen returverdi for denne funksjonen
-    def send_ack_packet(self):
-        self.sock.sendto(create_packet(0, 0, ACK), (self.ip, self.port))
-        print("ACK-pakke er sendt")
-        print("Forbindelse etablert\n")
-        # Starter filoverføring
-        self.transfer_file()
-
-    # Beskrivelse av funksjonen:
-    # Overfører en fil til serveren
-    # Argumenter:
-    # self: Referanse til det aktuelle Client-objektet
-    # Funksjonen gjør:
-    # Lese fildataene og sender dem til serveren i pakker. Hvis en pakke ikke blir bekreftet innen en viss tid (0.5 sekunder), sendes pakken på nytt
-    # Retur: Ingen returverdi for denne funksjonen
-    def transfer_file(self):
-        print("Dataoverføring:\n")
-        # Initialiserer skyvevinduet og sekvensnummeret
-        window = []
-        seq = 1
-        sent_time = {}  # Holder styr på når hver pakke ble sendt
-        packet_data = {}  # Lagrer data for hver pakke
-        self.timeout = 0.5  # Setter timeout-verdien
-
-        # Hovedklientløkke
-        # Åpner filen og leser dataene
-        with open(self.file, 'rb') as f:
-            while True:
-                # Hvis vinduet ikke er fullt, leses mer data fra filen og sendes
-                while len(window) < self.window_size:
-                    data = f.read(994)
-                    if not data:
-                        break
-                    self.sock.sendto(create_packet(seq, 0, 0) + data, (self.ip, self.port))
-                    sent_time[seq] = time.time()  # Lagrer tiden pakken ble sendt
-                    packet_data[seq] = data  # Lagrer data for pakken
-                    window.append(seq)
-                    print(f"{datetime.datetime.now().strftime('%H:%M:%S.%f')} -- Pakke med sekvensnummer = {seq} er sendt, skyvevindu = {window}")
-                    seq += 1
-                if not window:
-                    print("Dataoverføring fullført\n")
-                    print("Nedbryting av forbindelse:\n")
-                    self.send_fin_packet()
-                    break
-                try:
-                    # Venter på en ACK-pakke fra serverens
-                    data, server = self.sock.recvfrom(1000)
-                    _, ack, flags = parse_header(data[:6])
-                    if flags == ACK:
-                        # Hvis en ACK-pakke mottas, fjernes det tilsvarende sekvensnummeret fra vinduet
-                        if ack - 1 in window:
-                            print(f"{datetime.datetime.now().strftime('%H:%M:%S.%f')} -- ACK for pakke = {ack - 1} er mottatt")
-                            window.remove(ack - 1)
-                except socket.timeout:
-                    print(f"{datetime.datetime.now().strftime('%H:%M:%S.%f')} -- Timeout oppstod, sender alle pakker i vinduet på nytt")
-                    print(f"{datetime.datetime.now().strftime('%H:%M:%S.%f')} -- RTO oppstod")
-                    for seq_num in window:
-                        # Sjekker om det har gått nok tid for en retransmisjon
-                        if time.time() - sent_time[seq_num] > self.timeout:
-                            print(f"{datetime.datetime.now().strftime('%H:%M:%S.%f')} -- Sender pakke med sekvensnummer = {seq_num} på nytt")
-                            self.sock.sendto(create_packet(seq_num, 0, 0) + packet_data[seq_num], (self.ip, self.port))  # Sender korrekt data på nytt
-                            sent_time[seq_num] = time.time()  # Oppdaterer sendetiden for pakken
-
-    # Beskrivelse av funksjonen:
-    # Sender en FIN-pakke til serveren
-    # Argumenter:
-    # self: Referanse til det aktuelle Client-objektet
-    # Funksjonen gjør:
-    # Sender en FIN-pakke til serveren for å initiere nedbrytingen av forbindelsen
-    # Retur: Ingen returverdi for denne funksjonen
-    def send_fin_packet(self):
-        self.sock.sendto(create_packet(0, 0, FIN), (self.ip, self.port))
-        print("FIN-pakke er sendt")
-        # Mottar en FIN ACK-pakke fra serveren
-        self.receive_fin_ack()
-
-    # Beskrivelse av funksjonen:
-    # Mottar en FIN ACK-pakke fra serveren
-    # Argumenter:
-    # self: Referanse til det aktuelle Client-objektet
-    # Funksjonen gjør:
-    # Venter på en FIN ACK-pakke fra serveren og avslutter forbindelsen når den mottas
-    # Retur: Ingen returverdi for denne funksjonen
-    def receive_fin_ack(self):
-        # Prøver å motta en FIN ACK-pakke fra serveren
-        try:
-            data, server = self.sock.recvfrom(1000)
-            _, ack, flags = parse_header(data[:6])
-            if flags == ACK:
-                print("FIN ACK pakke er mottatt")
-                # Avslutter forbindelsen
-                self.close_connection()
-        except socket.timeout:
-            print("Timeout oppstod, mislykket nedbryting av forbindelsen")
-            self.sock.close()
-        except Exception as e:
-            print("Feil ved mottak av FIN ACK pakke fra serveren:", e)
-            self.sock.close()
-
-    # Beskrivelse av funksjonen:
-    # Avslutter forbindelsen til serveren
-    # Argumenter:
-    # self: Referanse til det aktuelle Client-objektet
-    # Funksjonen gjør:
-    # Lukker socketforbindelsen og avslutter programmet
-    # Retur: Ingen returverdi for denne funksjonen
-    def close_connection(self):
-        print("Forbindelse avsluttet")
-        self.sock.close()
-        sys.exit(1)
-
-# Beskrivelse av funksjonen:
-# Hovedfunksjonen til programmet.
-# Argumenter:
-# Ingen argumenter tas inn i denne funksjonen.
-# Hva funksjonen gjør:
-# Funksjonen leser kommandolinjeargumentene, initialiserer en server- eller klientinstans basert på disse argumentene, og starter deretter serveren eller klienten.
-# Hvis verken server- eller klientmodus er spesifisert, skriver den ut en feilmelding og avslutter programmet.
-# Bruk av inn- og ut-parametere i funksjonen:
-# Argumentene leses ved hjelp av `parse_arguments`-funksjonen som returnerer et objekt med alle argumentene som attributter.
-# Avhengig av disse argumentene, blir enten en server eller en klient opprettet og startet.
-# Retur:
-# Denne funksjonen returnerer ikke noe fordi dens hovedoppgave er å starte serveren eller klienten basert på argumentene.
-# Korrekt håndtering av unntak:
-# Hvis verken server- eller klientmodus er spesifisert, skriver funksjonen ut en feilmelding og avslutter programmet med en feilstatus.
-def main():
-    # Kaller på funksjonen `parse_arguments` som returnerer argumentene som er spesifisert når programmet kjører
-    args = parse_arguments()
-
-    # Sjekker om servermodus er spesifisert
-    if args.server:
-        # Oppretter en serverinstans med de gitte argumentene
-        server = Server(args.ip, args.port, args.file, args.window, args.discard)
-        # Starter serveren
-        server.start()
-    # Sjekker om klientmodus er spesifisert
-    elif args.client:
-        # Oppretter en klientinstans med de gitte argumentene
-        client = Client(args.ip, args.port, args.file, args.window, args.discard)
-        # Starter klienten
-        client.connect()
-    else:
-        # Hvis verken server- eller klientmodus er spesifisert, skrives en feilmelding ut og programmet avsluttes
-        print("Feil: Vennligst spesifiser enten servermodus (-s) eller klientmodus (-c).")
-        sys.exit(1)
-
-# Sjekker om dette scriptet ble kjørt direkte (i stedet for å bli importert som et modul)
-if __name__ == "__main__":
-    # Hvis scriptet ble kjørt direkte, kaller den på hovedfunksjonen
-    main()
+# Importerer nødvendige biblioteker
+import os
+import socket
+import selectors
+import argparse
+import ipaddress
+import struct
+import time
+import sys
+import signal
+import datetime
+import json
+import concurrent.futures
+import threading
+import queue
+import random
+import bisect
+import collections
+import contextlib
+import hashlib
+import mmap
+import cProfile
+import tracemalloc
+import zlib
+from compression import AVAILABLE_CODECS, COMPRESS_CHUNK, COMPRESS_FRAME, ChunkCompressor, FrameDecoder, decompress_frame
+from delta import SIGNATURE_ENTRY, Basis, DeltaDecoder, DeltaEncoder
+from fec import MAX_FEC_GROUP, FecDecoder, FecEncoder
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke gyldigheten av en IP-adresse
+# Argumenter:
+# ip: Dette er IP-adressen som skal sjekkes
+# Funksjonen gjør:
+# Den prøver å lage en IP-adresse objekt fra den oppgitte strengen, og hvis det ikke er mulig, genererer den en feil
+# Brukes for å sikre at IP-adressen som sendes til serveren er i gyldig format
+# Retur: Hvis IP-adressen er gyldig, returneres den. Hvis ikke, kastes en argumentfeil.
+def valid_ip(ip):
+    try: 
+        ipaddress.ip_address(ip)
+        return ip
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ugyldig IP adresse: {ip}")
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke gyldigheten av et portnummer
+# Argumenter:
+# port: Dette er portnummeret som skal sjekkes
+# Funksjonen gjør:
+# Den prøver å konvertere portnummeret til et heltall og sjekker om det er innenfor det gyldige området for portnumre (0-65535)
+# Brukes for å sikre at portnummeret som sendes til serveren er i gyldig format
+# Retur: Hvis portnummeret er gyldig, returneres det. Hvis ikke, kastes en argumentfeil.
+def valid_port(port):
+    try:
+        port = int(port)
+        if 0 <= port <= 65535:
+            return port
+        else:
+            raise argparse.ArgumentTypeError(f"Ugyldig portnummer: {port}. Må være mellom 0 og 65535.")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ugyldig portnummer: {port}. Må være et tall mellom 0 og 65535.")
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om filen eksisterer
+# Argumenter:
+# file: Dette er banen til filen som skal sjekkes
+# Funksjonen gjør:
+# Den sjekker om filen eksisterer og er en vanlig fil. Alle filtyper kan sendes.
+# Brukes for å sikre at filen som skal sendes eksisterer
+# Retur: Hvis filen er gyldig, returneres filbanen. Hvis ikke, kastes en argumentfeil.
+def valid_file(file):
+    if not os.path.exists(file):
+        raise argparse.ArgumentTypeError(f"Filen {file} finnes ikke.")
+    elif not os.path.isfile(file) and not os.path.isdir(file):
+        raise argparse.ArgumentTypeError(f"{file} er verken en fil eller en mappe.")
+    else:
+        return file
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om vindusstørrelsen er gyldig
+# Argumenter:
+# window_size: Dette er størrelsen på vinduet som skal sjekkes
+# Funksjonen gjør:
+# Den prøver å konvertere vindusstørrelsen til et heltall og sjekker om det er en positiv verdi
+# Brukes for å sikre at vindusstørrelsen som sendes til serveren er gyldig
+# Retur: Hvis vindusstørrelsen er gyldig, returneres den. Hvis ikke, kastes en argumentfeil.
+def valid_window_size(window_size):
+    window_size = int(window_size)
+    if window_size <= 0:
+        raise argparse.ArgumentTypeError(f"Ugyldig vindusstørrelse: {window_size}. Må være en positiv verdi.")
+    else:
+        return window_size
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om en tidsverdi i sekunder (f.eks. grensene for RTO) er gyldig
+# Argumenter:
+# value: Tidsverdien som skal sjekkes
+# Funksjonen gjør:
+# Den prøver å konvertere verdien til et flyttall og sjekker om det er en positiv verdi
+# Brukes for å sikre at grensene for retransmisjonstimeouten er gyldige
+# Retur: Hvis verdien er gyldig, returneres den. Hvis ikke, kastes en argumentfeil.
+def valid_seconds(value):
+    try:
+        value = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ugyldig tidsverdi: {value}. Må være et tall.")
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"Ugyldig tidsverdi: {value}. Må være en positiv verdi.")
+    return value
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om senderaten er gyldig
+# Argumenter:
+# rate: Raten i Mbit/s som skal sjekkes
+# Funksjonen gjør:
+# Den prøver å konvertere verdien til et flyttall og sjekker om det er en positiv verdi
+# Retur: Hvis raten er gyldig, returneres den. Hvis ikke, kastes en argumentfeil.
+def valid_rate(rate):
+    try:
+        rate = float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ugyldig rate: {rate}. Må være et tall.")
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(f"Ugyldig rate: {rate}. Må være en positiv verdi.")
+    return rate
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om størrelsen på socketbufferne er gyldig
+# Argumenter:
+# size: Størrelsen i byte som skal sjekkes
+# Funksjonen gjør:
+# Den prøver å konvertere verdien til et heltall og sjekker at den er minst MIN_SOCKET_BUFFER
+# Retur: Hvis størrelsen er gyldig, returneres den. Hvis ikke, kastes en argumentfeil.
+def valid_socket_buffer(size):
+    try:
+        size = int(size)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ugyldig bufferstørrelse: {size}. Må være et heltall.")
+    if size < MIN_SOCKET_BUFFER:
+        raise argparse.ArgumentTypeError(f"Ugyldig bufferstørrelse: {size}. Må være minst {MIN_SOCKET_BUFFER} byte.")
+    return size
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om gruppestørrelsen for feilretting (FEC) er gyldig
+# Argumenter:
+# group: Antall datapakker per paritetspakke som skal sjekkes
+# Funksjonen gjør:
+# Den prøver å konvertere verdien til et heltall og sjekker at den er 0 (av) eller mellom 2 og 255
+# Retur: Hvis verdien er gyldig, returneres den. Hvis ikke, kastes en argumentfeil.
+def valid_fec_group(group):
+    try:
+        group = int(group)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ugyldig gruppestørrelse: {group}. Må være et heltall.")
+    if group != 0 and not 2 <= group <= MAX_FEC_GROUP:
+        raise argparse.ArgumentTypeError(f"Ugyldig gruppestørrelse: {group}. Må være 0 (av) eller mellom 2 og {MAX_FEC_GROUP}.")
+    return group
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om en mappe eksisterer
+# Argumenter:
+# directory: Banen til mappen som skal sjekkes
+# Funksjonen gjør:
+# Den sjekker at banen finnes og er en mappe
+# Brukes for å sikre at serveren kan lagre mottatte filer i mappen
+# Retur: Hvis mappen er gyldig, returneres banen. Hvis ikke, kastes en argumentfeil.
+def valid_directory(directory):
+    if not os.path.isdir(directory):
+        raise argparse.ArgumentTypeError(f"Mappen {directory} finnes ikke.")
+    return directory
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om størrelsen på nyttelasten er gyldig
+# Argumenter:
+# payload_size: Størrelsen på nyttelasten i byte som skal sjekkes
+# Funksjonen gjør:
+# Den prøver å konvertere verdien til et heltall og sjekker om den får plass i et UDP-datagram sammen med pakkehodet
+# Brukes for å sikre at nyttelasten klienten ber om, eller serveren tillater, er gyldig
+# Retur: Hvis størrelsen er gyldig, returneres den. Hvis ikke, kastes en argumentfeil.
+def valid_payload_size(payload_size):
+    try:
+        payload_size = int(payload_size)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ugyldig størrelse på nyttelast: {payload_size}. Må være et heltall.")
+    if not MIN_PAYLOAD <= payload_size <= MAX_PAYLOAD:
+        raise argparse.ArgumentTypeError(f"Ugyldig størrelse på nyttelast: {payload_size}. Må være mellom {MIN_PAYLOAD} og {MAX_PAYLOAD}.")
+    return payload_size
+
+# Beskrivelse av funksjonen:
+# Funksjon for å analysere kommandolinjeargumenter
+# Funksjonen gjør:
+# Definerer hva slags argumenter som kan tas inn fra kommandolinjen når programmet kjøres
+# Argumenter:
+# Ingen argumenter trengs for denne funksjonen siden den bruker argparse biblioteket for å håndtere kommandolinjeargumenter
+# Retur: Returnerer argumentene som ble spesifisert når programmet kjørte
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="DRTP filoverføringsapplikasjon")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('-s', '--server', action='store_true', help="Aktiver servermodus")
+    group.add_argument('-c', '--client', action='store_true', help="Aktiver klientmodus")
+    group.add_argument('--decode-trace', metavar='FIL', help="Skriv ut en sporingsfil laget med --trace og avslutt")
+    parser.add_argument('-i', '--ip', type=valid_ip, default='127.0.0.1', help="IP-adressen til serveren (standard: 127.0.0.1)")
+    parser.add_argument('-p', '--port', type=valid_port, default=8080, help="Portnummer (standard: 8080)")
+    parser.add_argument('-f', '--file', type=valid_file, nargs='+', help="Filbane. Flere filer eller en mappe sendes etter hverandre over én forbindelse (økt), og serveren lagrer dem under de opprinnelige navnene.")
+    parser.add_argument('-w', '--window', type=valid_window_size, default=3, help="Øvre grense for størrelsen på skyvevinduet (standard: 3)")
+    parser.add_argument('-d', '--discard', type=int, help="Tilpasset testtilfelle for å hoppe over et sekvensnummer")
+    parser.add_argument('-m', '--mode', choices=list(MODES), default='gbn', help="Pålitelighetsmodus for klienten: gbn (Go-Back-N) eller sr (Selective Repeat) (standard: gbn)")
+    parser.add_argument('-b', '--buffer', type=valid_window_size, default=64, help="Størrelsen på serverens buffer for pakker i feil rekkefølge i sr-modus (standard: 64)")
+    parser.add_argument('--rto-min', type=valid_seconds, default=0.01, help="Nedre grense for retransmisjonstimeouten i sekunder (standard: 0.01)")
+    parser.add_argument('--rto-max', type=valid_seconds, default=10.0, help="Øvre grense for retransmisjonstimeouten i sekunder (standard: 10)")
+    parser.add_argument('--cc', choices=list(CONGESTION_CONTROLLERS), default='reno', help="Algoritme for metningskontroll på klienten (standard: reno)")
+    parser.add_argument('--payload', type=valid_payload_size, default=DEFAULT_PAYLOAD, help=f"Ønsket nyttelast per pakke i byte for klienten, begrenset av serveren (standard: {DEFAULT_PAYLOAD})")
+    parser.add_argument('--pmtud', action='store_true', help="Finn største nyttelast som kommer frem uten fragmentering med path-MTU-søk (DF-bit)")
+    parser.add_argument('--ack-every', type=valid_window_size, default=1, help="Serveren sender en samlet ACK for hver N pakker som kommer i rekkefølge (standard: 1)")
+    parser.add_argument('--ack-delay', type=valid_seconds, default=0.04, help="Hvor lenge serveren venter med en samlet ACK i sekunder, brukes med --ack-every (standard: 0.04)")
+    parser.add_argument('--max-payload', type=valid_payload_size, default=MAX_PAYLOAD, help=f"Største nyttelast per pakke serveren tillater (standard: {MAX_PAYLOAD})")
+    parser.add_argument('-v', '--verbose', action='count', default=0, help="Skriv ut mer: -v gir tap og retransmisjoner, -vv gir hver pakke")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Skriv bare ut feil og rapporter")
+    parser.add_argument('--trace', metavar='FIL', help="Skriv en binær sporingsfil med en post per pakkehendelse (les den med --decode-trace)")
+    parser.add_argument('--stats', metavar='FIL', help="Lagre statistikk for overføringen (serveren: alle forbindelser) som JSON når programmet avsluttes")
+    parser.add_argument('--metrics', metavar='FIL', help="Serveren skriver målinger i Prometheus sitt tekstformat til denne filen hvert sekund")
+    parser.add_argument('--profile', metavar='FIL', help="Profiler sende- eller mottaksløkken med cProfile og lagre resultatet i filen")
+    parser.add_argument('--tracemalloc', action='store_true', help="Mål minnebruken i sende- eller mottaksløkken med tracemalloc")
+    parser.add_argument('--streams', type=valid_window_size, default=1, help="Antall parallelle forbindelser klienten deler filen over (standard: 1)")
+    parser.add_argument('--zero-rtt', action='store_true', help="Send det første vinduet med data rett etter SYN-pakken uten å vente på SYN-ACK (0-RTT). Serveren holder på dataene til forbindelsen er bekreftet.")
+    parser.add_argument('--resume', action='store_true', help="Gjenoppta en avbrutt overføring av samme fil: serveren hopper over det den allerede har lagret")
+    parser.add_argument('--rate', type=valid_rate, metavar='MBPS', help="Klienten sprer pakkene jevnt utover med en tokenbøtte i stedet for å sende hele vinduet på en gang, med denne raten i Mbit/s (delt mellom strømmene)")
+    parser.add_argument('--pace', action='store_true', help="Klienten sprer pakkene jevnt utover med en rate regnet ut fra metningsvinduet og SRTT (brukes når --rate ikke er gitt)")
+    parser.add_argument('--socket-buffer', type=valid_socket_buffer, metavar='BYTE', help="Størrelsen på SO_SNDBUF og SO_RCVBUF for socketen, for stier med stort båndbredde-forsinkelsesprodukt (standard: operativsystemets)")
+    parser.add_argument('--fec', type=valid_fec_group, default=0, metavar='K', help="Send en XOR-paritetspakke for hver K datapakker, slik at serveren kan gjenskape én tapt pakke per gruppe uten retransmisjon (krever sr-modus, standard: 0, av)")
+    parser.add_argument('--compress', choices=AVAILABLE_CODECS, help="Komprimer filen i blokker med valgt kodek hvis serveren støtter den. Blokker som ikke lar seg komprimere (f.eks. JPEG) sendes som de er.")
+    parser.add_argument('--delta', action='store_true', help="Send bare det som er endret siden forrige versjon av filen serveren har (rsync-lignende deltaoverføring)")
+    parser.add_argument('--prefetch', action='store_true', help="Klienten leser filen inn i minnet i en egen tråd foran sendingen, nyttig når filen ikke ligger i sidehurtigbufferen")
+    parser.add_argument('-o', '--output-dir', type=valid_directory, help="Mappen serveren lagrer mottatte filer i (standard: mappen programmet ligger i)")
+    parser.add_argument('--max-connections', type=valid_window_size, default=256, help="Hvor mange klienter serveren tar imot samtidig (standard: 256)")
+    return parser.parse_args()
+    
+
+# Versjon 1 av pakkehodet: '!HHH' med 16-bits sekvensnummer, bekreftelsesnummer og flagg (6 byte)
+# Versjon 2 av pakkehodet: '!BBHII' med versjon, flagg, lengden på nyttelasten og 32-bits sekvens- og bekreftelsesnummer (12 byte)
+# Formatene kompileres én gang slik at pakking og tolking per pakke blir så billig som mulig
+HEADER_V1 = struct.Struct('!HHH')
+HEADER_V2 = struct.Struct('!BBHII')
+HEADERS = {1: HEADER_V1, 2: HEADER_V2}
+# Høyeste versjon av pakkehodet denne implementasjonen støtter
+HEADER_VERSION = 2
+# Antall bits i sekvensnummeret for hver versjon
+SEQ_BITS = {1: 16, 2: 32}
+# ACK-pakker i sr-modus kan ha en nyttelast med selektive bekreftelser (SACK): sekvensnumre (32 bits) som er mottatt
+# etter et hull. Feltet ack er alltid kumulativt, det vil si neste sekvensnummer serveren venter på.
+SACK_ENTRY = struct.Struct('!I')
+
+# Størrelsen på et datagram, pakkehodet og nyttelasten til sammen, før nyttelasten er forhandlet
+PACKET_SIZE = 1000
+# Standard nyttelast, gir datagram på 1000 byte med pakkehode versjon 2. Med versjon 1 er nyttelasten alltid 994 byte.
+DEFAULT_PAYLOAD = PACKET_SIZE - HEADER_V2.size
+# Minste og største nyttelast som kan forhandles (et UDP-datagram over IPv4 kan ha maks 65507 byte)
+MIN_PAYLOAD = 64
+MAX_PAYLOAD = 65507 - HEADER_V2.size
+# Størrelsen på IPv4- og UDP-hodene, brukes for å regne om fra MTU til nyttelast
+IP_UDP_OVERHEAD = 28
+# Vanlige MTU-er som prøves ved path-MTU-søk, fra største til minste
+PROBE_MTUS = (9000, 4352, 1500, 1492, 1280)
+# Om socketen kan sende pakkehodet og nyttelasten fra hver sin buffer i ett datagram (sendmsg, scatter/gather).
+# Plattformer uten sendmsg (f.eks. Windows) setter dem sammen før sending.
+SCATTER_GATHER = hasattr(socket.socket, 'sendmsg')
+
+# Definerer flaggene for SYN, ACK, FIN, PROBE (path-MTU-søk), RESUME (svar på gjenopptak av en overføring),
+# DELTA (signaturene til den forrige versjonen av filen ved deltaoverføring), FEC (paritetspakke for feilretting)
+# og RST (klienten avbryter overføringen, og serveren regner den ikke som fullført)
+SYN = 1
+ACK = 2
+FIN = 4
+PROBE = 8
+RESUME = 16
+DELTA = 32
+FEC = 64
+RST = 128
+
+# Definerer modusene klienten kan be om i SYN-pakken. Koden sendes i ack-feltet til SYN-pakken,
+# og serveren svarer med den aksepterte modusen i seq-feltet til SYN-ACK-pakken.
+# En server som ikke kjenner til modusene svarer med 0, og da faller klienten tilbake til Go-Back-N.
+MODE_GBN = 0
+MODE_SR = 1
+MODES = {'gbn': MODE_GBN, 'sr': MODE_SR}
+
+# SYN- og SYN-ACK-pakkene sendes alltid med versjon 1 av pakkehodet, slik at eldre motparter forstår dem.
+# Den høyeste versjonen klienten støtter sendes i den øvre byten av ack-feltet i SYN-pakken (sammen med modusen i den nedre),
+# og serveren svarer med valgt versjon og modus på samme måte i seq-feltet til SYN-ACK-pakken.
+# En eldre motpart sender 0 her, som betyr versjon 1 og Go-Back-N.
+
+# Beskrivelse av funksjonen:
+# Funksjon for å pakke versjon og modus inn i ett 16-bits felt til SYN- og SYN-ACK-pakkene
+# Argumenter:
+# version: versjonen av pakkehodet
+# mode: modusen (MODE_GBN eller MODE_SR)
+# Retur: Returnerer verdien som skal sendes i feltet
+def encode_handshake(version, mode):
+    return (version << 8) | mode
+
+# Beskrivelse av funksjonen:
+# Funksjon for å hente ut versjon og modus fra feltet i SYN- og SYN-ACK-pakkene
+# Argumenter:
+# value: verdien i feltet
+# Retur: Returnerer versjonen (minst 1) og modusen
+def decode_handshake(value):
+    return max(value >> 8, 1), value & 0xFF
+
+# Med pakkehode versjon 2 kan SYN-ACK- og ACK-pakken i håndtrykket ha en nyttelast med forhandlingsvalg, kodet som JSON.
+# SYN-ACK sender serverens grenser (f.eks. største nyttelast), og ACK sender det klienten har valgt innenfor dem.
+
+# Beskrivelse av funksjonen:
+# Funksjon for å kode forhandlingsvalg til nyttelasten i en håndtrykkpakke
+# Argumenter:
+# options: ordbok med valgene
+# Retur: Returnerer valgene som bytes
+def encode_options(options):
+    return json.dumps(options, separators=(',', ':')).encode()
+
+# Beskrivelse av funksjonen:
+# Funksjon for å hente ut forhandlingsvalg fra nyttelasten i en håndtrykkpakke
+# Argumenter:
+# payload: nyttelasten, kan være tom
+# Retur: Returnerer en ordbok med valgene, tom hvis det ikke var noen eller de ikke kunne tolkes
+def decode_options(payload):
+    if not payload:
+        return {}
+    try:
+        options = json.loads(bytes(payload))
+    except ValueError:
+        return {}
+    return options if isinstance(options, dict) else {}
+
+# Beskrivelse av funksjonen:
+# Funksjon for å finne størrelsen på pakkehodet for en versjon
+# Argumenter:
+# version: versjonen av pakkehodet
+# Retur: Returnerer størrelsen på pakkehodet i byte
+def header_size(version=1):
+    return HEADERS[version].size
+
+# Beskrivelse av funksjonen:
+# Funksjon for å lage en pakke med et formatert hode
+# Funksjonen gjør:
+# Bruker det ferdigkompilerte formatet for versjonen til å skape et binært hode
+# Sekvens- og bekreftelsesnummeret tas modulo 2^16 eller 2^32, så de kan gå rundt (se unwrap_seq)
+# Argumenter:
+# seq: sekvensnummeret for pakken
+# ack: bekreftelsesnummeret for pakken
+# flags: flaggene for pakken (SYN, ACK, FIN)
+# version: versjonen av pakkehodet (standard: 1)
+# length: lengden på nyttelasten som følger etter hodet (brukes bare i versjon 2)
+# Retur: Returnerer en pakke med formatert hode
+def create_packet(seq, ack, flags, version=1, length=0):
+    if version == 1:
+        return HEADER_V1.pack(seq & 0xFFFF, ack & 0xFFFF, flags)
+    return HEADER_V2.pack(version, flags, length, seq & 0xFFFFFFFF, ack & 0xFFFFFFFF)
+
+# Beskrivelse av funksjonen:
+# Funksjon for å skrive et pakkehode inn i en buffer som allerede finnes
+# Funksjonen gjør:
+# Som create_packet, men hodet pakkes rett inn i bufferen med pack_into, slik at det ikke lages et nytt bytes-objekt per pakke
+# Argumenter:
+# buffer: bufferen hodet skrives til, fra starten
+# seq, ack, flags, version, length: som for create_packet
+# Retur: Returnerer størrelsen på hodet i byte
+def pack_header_into(buffer, seq, ack, flags, version=1, length=0):
+    if version == 1:
+        HEADER_V1.pack_into(buffer, 0, seq & 0xFFFF, ack & 0xFFFF, flags)
+        return HEADER_V1.size
+    HEADER_V2.pack_into(buffer, 0, version, flags, length, seq & 0xFFFFFFFF, ack & 0xFFFFFFFF)
+    return HEADER_V2.size
+
+# Beskrivelse av funksjonen:
+# Funksjon for å tolke et pakkehode
+# Funksjonen gjør:
+# Bruker det ferdigkompilerte formatet for versjonen til å trekke ut sekvensnummeret, bekreftelsesnummeret, flaggene og lengden på nyttelasten
+# Tolker direkte fra starten av pakken, så hodet trenger ikke å kopieres ut først
+# Argumenter:
+# packet: pakken som skal tolkes
+# version: versjonen av pakkehodet (standard: 1)
+# Retur: Returnerer sekvensnummeret, bekreftelsesnummeret, flaggene og lengden på nyttelasten
+# Unntakshåndtering: Kaster ValueError hvis pakken har feil versjon eller er kortere enn lengden i hodet sier
+def parse_header(packet, version=1):
+    if version == 1:
+        seq, ack, flags = HEADER_V1.unpack_from(packet)
+        return seq, ack, flags, len(packet) - HEADER_V1.size
+    packet_version, flags, length, seq, ack = HEADER_V2.unpack_from(packet)
+    if packet_version != version:
+        raise ValueError(f"Uventet versjon av pakkehodet: {packet_version}")
+    if length > len(packet) - HEADER_V2.size:
+        raise ValueError(f"Avkortet pakke: {len(packet)} byte, men hodet sier {length} byte nyttelast")
+    return seq, ack, flags, length
+
+# Beskrivelse av funksjonen:
+# Funksjon for å gjøre om et sekvens- eller bekreftelsesnummer fra pakken til et fullt sekvensnummer
+# Funksjonen gjør:
+# Nummeret i pakken har bare 16 eller 32 bits og går rundt. Funksjonen velger det fulle nummeret med de samme nedre bitene
+# som ligger nærmest referansen (seriell aritmetikk, RFC 1982). Sammenligninger kan da gjøres med vanlige heltall.
+# Argumenter:
+# value: nummeret fra pakken
+# reference: et fullt sekvensnummer i nærheten, f.eks. forventet sekvensnummer
+# version: versjonen av pakkehodet
+# Retur: Returnerer det fulle sekvensnummeret
+def unwrap_seq(value, reference, version=1):
+    modulus = 1 << SEQ_BITS[version]
+    diff = (value - reference) % modulus
+    if diff >= modulus // 2:
+        diff -= modulus
+    return reference + diff
+
+# Loggnivåer. Meldinger på LOG_QUIET skrives alltid (feil og rapporter), -q begrenser utskriften til dem.
+# LOG_INFO er standard (håndtrykk og faser), -v gir LOG_VERBOSE (tap, retransmisjoner og timeouts) og -vv gir LOG_DEBUG (hver pakke).
+# LOG_SILENT skriver ingenting og brukes når DRTP er bygd inn i et annet program (drtp.py).
+LOG_SILENT = -1
+LOG_QUIET = 0
+LOG_INFO = 1
+LOG_VERBOSE = 2
+LOG_DEBUG = 3
+# Hvor mange meldinger som kan vente på skrivetråden. Er køen full, forkastes meldinger på LOG_VERBOSE og LOG_DEBUG
+# i stedet for å bremse overføringen.
+LOG_QUEUE_SIZE = 10000
+
+# Binær sporingsfil (--trace): et hode (TRACE_MAGIC) og deretter én post per hendelse med tidsstempel,
+# hendelse, sekvensnummer og vindu. Vinduet er metningsvinduet på klienten og antall bufrede pakker på serveren.
+# Filen leses med --decode-trace.
+TRACE_MAGIC = b'DRTPTRC1'
+TRACE_RECORD = struct.Struct('!dBII')
+TRACE_SEND = 1
+TRACE_RETRANSMIT = 2
+TRACE_ACK = 3
+TRACE_DUPACK = 4
+TRACE_TIMEOUT = 5
+TRACE_RECEIVE = 6
+TRACE_BUFFER = 7
+TRACE_DROP = 8
+TRACE_DUPLICATE = 9
+TRACE_EVENTS = {TRACE_SEND: 'SEND', TRACE_RETRANSMIT: 'RETRANSMIT', TRACE_ACK: 'ACK', TRACE_DUPACK: 'DUPACK', TRACE_TIMEOUT: 'TIMEOUT',
+                TRACE_RECEIVE: 'RECEIVE', TRACE_BUFFER: 'BUFFER', TRACE_DROP: 'DROP', TRACE_DUPLICATE: 'DUPLICATE'}
+# Hvor mange byte med sporingsposter som samles før de skrives til filen
+TRACE_FLUSH_SIZE = 1 << 16
+
+# Logg for klienten og serveren. Meldingene legges i en begrenset kø og skrives av en egen tråd, slik at
+# terminalen og formateringen av tidsstempler ikke bremser sende- og mottaksløkkene.
+# Kall som er dyre å lage (én per pakke) skal sjekke nivået først: if self.log.level >= LOG_DEBUG: ...
+class EventLog:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til EventLog-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle EventLog-objektet
+    # level: Hvor mye som skal skrives ut (LOG_QUIET, LOG_INFO, LOG_VERBOSE eller LOG_DEBUG)
+    # trace_path: Filen sporingsposter skal skrives til, eller None
+    # queue_size: Hvor mange meldinger som kan vente på skrivetråden
+    # Funksjonen gjør:
+    # Oppretter køen, åpner sporingsfilen og starter skrivetråden
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, level=LOG_INFO, trace_path=None, queue_size=LOG_QUEUE_SIZE):
+        self.level = level
+        self.dropped = 0
+        self.queue = queue.Queue(queue_size)
+        self.trace_file = None
+        self.trace_buffer = bytearray()
+        if trace_path is not None:
+            self.trace_file = open(trace_path, 'wb')
+            self.trace_file.write(TRACE_MAGIC)
+        self.thread = threading.Thread(target=self.writer, daemon=True)
+        self.thread.start()
+
+    # Beskrivelse av funksjonen:
+    # Legger en melding i køen hvis nivået skal skrives ut
+    # Argumenter:
+    # self: Referanse til det aktuelle EventLog-objektet
+    # level: Nivået til meldingen
+    # message: Meldingen
+    # timestamp: Om meldingen skal ha tidsstempel (tiden hentes her, men formateres av skrivetråden)
+    # Funksjonen gjør:
+    # Meldinger på LOG_QUIET og LOG_INFO venter på plass i køen. Andre meldinger forkastes og telles hvis køen er full.
+    # Retur: Ingen returverdi for denne funksjonen
+    def write(self, level, message, timestamp=False):
+        if level > self.level:
+            return
+        item = (time.time() if timestamp else None, message)
+        if level <= LOG_INFO:
+            self.queue.put(item)
+            return
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    # Beskrivelse av funksjonen:
+    # Legger en melding med tidsstempel i køen, brukes for hendelser under overføringen
+    # Argumenter:
+    # self: Referanse til det aktuelle EventLog-objektet
+    # level: Nivået til meldingen
+    # message: Meldingen
+    # Retur: Ingen returverdi for denne funksjonen
+    def event(self, level, message):
+        self.write(level, message, timestamp=True)
+
+    # Beskrivelse av funksjonen:
+    # Legger til en post i sporingsfilen
+    # Argumenter:
+    # self: Referanse til det aktuelle EventLog-objektet
+    # event: Hendelsen (en av TRACE_*-konstantene)
+    # seq: Sekvensnummeret hendelsen gjelder
+    # window: Vinduet da hendelsen skjedde
+    # Funksjonen gjør:
+    # Samler postene i en buffer og skriver dem til filen i større blokker
+    # Retur: Ingen returverdi for denne funksjonen
+    def trace(self, event, seq, window):
+        if self.trace_file is None:
+            return
+        self.trace_buffer += TRACE_RECORD.pack(time.time(), event, seq & 0xFFFFFFFF, window)
+        if len(self.trace_buffer) >= TRACE_FLUSH_SIZE:
+            self.trace_file.write(self.trace_buffer)
+            self.trace_buffer.clear()
+
+    # Beskrivelse av funksjonen:
+    # Skrivetråden. Henter meldinger fra køen og skriver dem til standard ut.
+    # Argumenter:
+    # self: Referanse til det aktuelle EventLog-objektet
+    # Funksjonen gjør:
+    # Skriver alle meldinger som ligger i køen samlet, og tømmer bufferen når køen er tom. None i køen stopper tråden.
+    # Retur: Ingen returverdi for denne funksjonen
+    def writer(self):
+        while True:
+            items = [self.queue.get()]
+            while not self.queue.empty() and len(items) < 1000:
+                items.append(self.queue.get_nowait())
+            lines = []
+            for item in items:
+                if item is None:
+                    sys.stdout.write(''.join(lines))
+                    sys.stdout.flush()
+                    return
+                stamp, message = item
+                if stamp is None:
+                    lines.append(f"{message}\n")
+                else:
+                    lines.append(f"{datetime.datetime.fromtimestamp(stamp).strftime('%H:%M:%S.%f')} -- {message}\n")
+            sys.stdout.write(''.join(lines))
+            sys.stdout.flush()
+
+    # Beskrivelse av funksjonen:
+    # Stopper skrivetråden og lukker sporingsfilen
+    # Argumenter:
+    # self: Referanse til det aktuelle EventLog-objektet
+    # Funksjonen gjør:
+    # Venter til alle meldinger i køen er skrevet, og skriver ut hvor mange meldinger som ble forkastet
+    # Retur: Ingen returverdi for denne funksjonen
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.dropped:
+            print(f"{self.dropped} loggmeldinger ble forkastet fordi loggkøen var full")
+            self.dropped = 0
+        if self.trace_file is not None:
+            self.trace_file.write(self.trace_buffer)
+            self.trace_file.close()
+            self.trace_file = None
+
+# Beskrivelse av funksjonen:
+# Funksjon for å skrive ut en sporingsfil laget med --trace
+# Argumenter:
+# path: Banen til sporingsfilen
+# Funksjonen gjør:
+# Leser postene og skriver ut én linje per hendelse med tidsstempel, tid siden første hendelse, hendelse, sekvensnummer og vindu
+# Retur: Ingen returverdi for denne funksjonen
+# Unntakshåndtering: Kaster ValueError hvis filen ikke er en sporingsfil
+def decode_trace(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(TRACE_MAGIC):
+        raise ValueError(f"{path} er ikke en DRTP-sporingsfil")
+    start = None
+    for stamp, event, seq, window in TRACE_RECORD.iter_unpack(data[len(TRACE_MAGIC):len(data) - (len(data) - len(TRACE_MAGIC)) % TRACE_RECORD.size]):
+        if start is None:
+            start = stamp
+        name = TRACE_EVENTS.get(event, str(event))
+        print(f"{datetime.datetime.fromtimestamp(stamp).strftime('%H:%M:%S.%f')} {(stamp - start) * 1000:10.3f} ms  {name:<10} seq={seq} vindu={window}")
+
+# Øvre grenser (sekunder) for bøttene i RTT-histogrammet. Målinger over siste grense havner i en egen bøtte (+Inf).
+RTT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Største antall målinger av vinduet som tas vare på. Blir listen full, beholdes annenhver måling og intervallet dobles.
+MAX_WINDOW_SAMPLES = 2048
+
+# Statistikk for én forbindelse, på klienten eller serveren. Tellerne oppdateres i sende- og mottaksløkkene,
+# og statistikken kan lagres som JSON (--stats) eller skrives i Prometheus sitt tekstformat (--metrics på serveren).
+class TransferStats:
+    # Tellerne som finnes i statistikken. Byte er nyttelast, så goodput (unike byte levert) og gjennomstrømning
+    # (alle byte sendt eller mottatt, også retransmisjoner og duplikater) kan sammenlignes direkte.
+    COUNTERS = ('packets_sent', 'packets_retransmitted', 'bytes_sent', 'packets_received', 'bytes_received', 'bytes_delivered',
+                'duplicates', 'out_of_order', 'dropped', 'acks_sent', 'acks_received', 'duplicate_acks', 'fast_retransmits', 'timeouts',
+                'parity_sent', 'parity_received', 'packets_recovered', 'pacing_waits', 'zero_window_probes', 'window_updates',
+                'handshake_retransmits', 'early_packets')
+
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til TransferStats-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle TransferStats-objektet
+    # Funksjonen gjør:
+    # Nullstiller tellerne, RTT-histogrammet, målingene av vinduet og fasene
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self):
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.rtt_buckets = [0] * (len(RTT_BUCKETS) + 1)
+        self.rtt_sum = 0.0
+        self.rtt_count = 0
+        self.created = time.time()
+        # Målinger av vinduet: (sekunder siden start, pakker underveis eller i buffer, vindusstørrelse)
+        self.window_samples = []
+        self.sample_interval = 0.01
+        self.next_sample = 0.0
+        # Fasene (handshake, data, teardown) med start- og sluttid
+        self.phases = {}
+        self.current_phase = None
+
+    # Beskrivelse av funksjonen:
+    # Starter en ny fase og avslutter den forrige
+    # Argumenter:
+    # self: Referanse til det aktuelle TransferStats-objektet
+    # name: Navnet på fasen ('handshake', 'data' eller 'teardown')
+    # Retur: Ingen returverdi for denne funksjonen
+    def begin_phase(self, name):
+        now = time.time()
+        self.end_phase(now)
+        self.phases[name] = [now, None]
+        self.current_phase = name
+
+    # Beskrivelse av funksjonen:
+    # Avslutter fasen som pågår
+    # Argumenter:
+    # self: Referanse til det aktuelle TransferStats-objektet
+    # now: Tiden fasen sluttet, eller None for nå
+    # Retur: Ingen returverdi for denne funksjonen
+    def end_phase(self, now=None):
+        if self.current_phase is not None:
+            self.phases[self.current_phase][1] = now if now is not None else time.time()
+            self.current_phase = None
+
+    # Beskrivelse av funksjonen:
+    # Gir hvor lenge en fase varte
+    # Argumenter:
+    # self: Referanse til det aktuelle TransferStats-objektet
+    # name: Navnet på fasen
+    # Retur: Returnerer varigheten i sekunder (til nå hvis fasen pågår), eller 0 hvis fasen ikke har startet
+    def phase_duration(self, name):
+        if name not in self.phases:
+            return 0.0
+        start, end = self.phases[name]
+        return (end if end is not None else time.time()) - start
+
+    # Beskrivelse av funksjonen:
+    # Registrerer en pakke som er sendt
+    # Argumenter:
+    # self: Referanse til det aktuelle TransferStats-objektet
+    # length: Nyttelasten i byte
+    # retransmit: Om pakken ble sendt på nytt
+    # Retur: Ingen returverdi for denne funksjonen
+    def sent(self, length, retransmit=False):
+        self.packets_sent += 1
+        self.bytes_sent += length
+        if retransmit:
+            self.packets_retransmitted += 1
+
+    # Beskrivelse av funksjonen:
+    # Legger en RTT-måling til i histogrammet
+    # Argumenter:
+    # self: Referanse til det aktuelle TransferStats-objektet
+    # rtt: Målt rundtur i sekunder
+    # Retur: Ingen returverdi for denne funksjonen
+    def add_rtt(self, rtt):
+        self.rtt_buckets[bisect.bisect_left(RTT_BUCKETS, rtt)] += 1
+        self.rtt_sum += rtt
+        self.rtt_count += 1
+
+    # Beskrivelse av funksjonen:
+    # Måler hvor fullt vinduet er, høyst én gang per intervall
+    # Argumenter:
+    # self: Referanse til det aktuelle TransferStats-objektet
+    # now: Tiden nå
+    # occupancy: Antall pakker underveis (klienten) eller i bufferen (serveren)
+    # window: Størrelsen på vinduet eller bufferen
+    # Retur: Ingen returverdi for denne funksjonen
+    def sample_window(self, now, occupancy, window):
+        if now < self.next_sample:
+            return
+        self.window_samples.append((round(now - self.created, 6), occupancy, window))
+        if len(self.window_samples) >= MAX_WINDOW_SAMPLES:
+            # Holder minnebruken fast for lange overføringer
+            self.window_samples = self.window_samples[::2]
+            self.sample_interval *= 2
+        self.next_sample = now + self.sample_interval
+
+    # Beskrivelse av funksjonen:
+    # Legger tellerne og RTT-histogrammet fra en annen forbindelse til denne, brukes for totaler på serveren
+    # Argumenter:
+    # self: Referanse til det aktuelle TransferStats-objektet
+    # other: Statistikken som skal legges til
+    # Retur: Ingen returverdi for denne funksjonen
+    def add(self, other):
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.rtt_buckets = [a + b for a, b in zip(self.rtt_buckets, other.rtt_buckets)]
+        self.rtt_sum += other.rtt_sum
+        self.rtt_count += other.rtt_count
+
+    # Beskrivelse av funksjonen:
+    # Gjør statistikken om til en ordbok som kan lagres som JSON
+    # Argumenter:
+    # self: Referanse til det aktuelle TransferStats-objektet
+    # Funksjonen gjør:
+    # Tar med tellerne, fasene, RTT-histogrammet og målingene av vinduet, og regner ut goodput og gjennomstrømning i datafasen
+    # Retur: Returnerer ordboken
+    def to_dict(self):
+        data_time = self.phase_duration('data')
+        raw_bytes = max(self.bytes_sent, self.bytes_received)
+        return {
+            'counters': {name: getattr(self, name) for name in self.COUNTERS},
+            'phases': {name: round(self.phase_duration(name), 6) for name in self.phases},
+            'goodput_mbps': round(self.bytes_delivered * 8 / data_time / 1e6, 3) if data_time else 0.0,
+            'throughput_mbps': round(raw_bytes * 8 / data_time / 1e6, 3) if data_time else 0.0,
+            'rtt': {
+                'count': self.rtt_count,
+                'mean_ms': round(self.rtt_sum / self.rtt_count * 1000, 3) if self.rtt_count else None,
+                'buckets': {str(le): count for le, count in zip(RTT_BUCKETS + ('+Inf',), self.rtt_buckets)},
+            },
+            # Paritetspakker i forhold til datapakker (klienten), og pakker serveren gjenskapte uten retransmisjon
+            'fec_overhead': round(self.parity_sent / self.packets_sent, 4) if self.packets_sent else 0.0,
+            'window_samples': self.window_samples,
+        }
+
+    # Beskrivelse av funksjonen:
+    # Skriver tellerne og RTT-histogrammet i Prometheus sitt tekstformat
+    # Argumenter:
+    # self: Referanse til det aktuelle TransferStats-objektet
+    # prefix: Prefikset til navnene på målingene
+    # Retur: Returnerer en liste med linjer
+    def prometheus(self, prefix='drtp'):
+        lines = []
+        for name in self.COUNTERS:
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {getattr(self, name)}")
+        lines.append(f"# TYPE {prefix}_rtt_seconds histogram")
+        cumulative = 0
+        for le, count in zip(RTT_BUCKETS + ('+Inf',), self.rtt_buckets):
+            cumulative += count
+            lines.append(f'{prefix}_rtt_seconds_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f"{prefix}_rtt_seconds_sum {self.rtt_sum}")
+        lines.append(f"{prefix}_rtt_seconds_count {self.rtt_count}")
+        return lines
+
+# Beskrivelse av funksjonen:
+# Funksjon for å lagre en ordbok som JSON
+# Argumenter:
+# path: Filen som skal skrives
+# data: Ordboken
+# Funksjonen gjør:
+# Skriver først til en midlertidig fil og bytter den inn, slik at en leser aldri ser en halvskrevet fil
+# Retur: Ingen returverdi for denne funksjonen
+def write_json(path, data):
+    write_text(path, json.dumps(data, indent=2))
+
+# Beskrivelse av funksjonen:
+# Funksjon for å skrive en tekstfil atomisk
+# Argumenter:
+# path: Filen som skal skrives
+# text: Teksten
+# Retur: Ingen returverdi for denne funksjonen
+def write_text(path, text):
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as f:
+        f.write(text)
+    os.replace(temporary, path)
+
+# Beskrivelse av funksjonen:
+# Kontekst som profilerer koden inne i with-blokken, brukes rundt sende- og mottaksløkkene
+# Argumenter:
+# log: Loggen resultatene skrives til
+# profile_path: Filen cProfile-resultatet lagres i (les med python -m pstats), eller None
+# trace_memory: Om minnebruken skal måles med tracemalloc
+# Funksjonen gjør:
+# Starter cProfile og/eller tracemalloc før blokken og lagrer eller skriver ut resultatene etterpå
+# Retur: Ingen returverdi for denne funksjonen
+@contextlib.contextmanager
+def profiling(log, profile_path=None, trace_memory=False):
+    profiler = cProfile.Profile() if profile_path else None
+    if trace_memory:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            log.write(LOG_QUIET, f"Profil lagret i {profile_path} (les med python -m pstats {profile_path})")
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:5]
+            tracemalloc.stop()
+            log.write(LOG_QUIET, f"Minnebruk: {current / 1024:.0f} KiB nå, {peak / 1024:.0f} KiB på det meste")
+            for statistic in top:
+                log.write(LOG_QUIET, f"  {statistic}")
+
+# Klasse som estimerer rundturstiden (RTT) og regner ut retransmisjonstimeouten (RTO)
+# Bruker Jacobson/Karels-algoritmen (RFC 6298): SRTT og RTTVAR oppdateres for hver måling,
+# og RTO = SRTT + 4 * RTTVAR, begrenset av rto_min og rto_max.
+# Hvis serveren sender samlede ACK-er, legges den lengste tiden en ACK kan vente (max_ack_delay) til, slik QUIC gjør.
+class RttEstimator:
+    # Vekter for glidende gjennomsnitt av RTT og variasjonen i RTT
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    # Klokkegranularitet i sekunder
+    GRANULARITY = 0.001
+
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til RttEstimator-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle RttEstimator-objektet
+    # rto_min: Nedre grense for RTO i sekunder
+    # rto_max: Øvre grense for RTO i sekunder
+    # initial_rto: RTO som brukes før første måling (0.5 sekunder som tidligere)
+    # Funksjonen gjør:
+    # Initialiserer estimatet uten målinger
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, rto_min=0.01, rto_max=10.0, initial_rto=0.5):
+        if rto_min > rto_max:
+            raise ValueError(f"rto_min ({rto_min}) kan ikke være større enn rto_max ({rto_max})")
+        self.rto_min = rto_min
+        self.rto_max = rto_max
+        self.srtt = None
+        self.rttvar = None
+        self.max_ack_delay = 0.0
+        self.rto = min(max(initial_rto, rto_min), rto_max)
+
+    # Beskrivelse av funksjonen:
+    # Oppdaterer estimatet med en ny RTT-måling.
+    # Argumenter:
+    # self: Referanse til det aktuelle RttEstimator-objektet
+    # rtt: Målt rundtur i sekunder. Etter Karns regel skal bare pakker som ikke er sendt på nytt måles.
+    # Funksjonen gjør:
+    # Oppdaterer SRTT og RTTVAR og regner ut ny RTO. En ny måling nullstiller også eksponentiell backoff.
+    # Retur: Ingen returverdi for denne funksjonen.
+    def sample(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        rto = self.srtt + max(self.GRANULARITY, 4 * self.rttvar) + self.max_ack_delay
+        self.rto = min(max(rto, self.rto_min), self.rto_max)
+
+    # Beskrivelse av funksjonen:
+    # Dobler RTO etter en timeout (eksponentiell backoff).
+    # Argumenter:
+    # self: Referanse til det aktuelle RttEstimator-objektet
+    # Funksjonen gjør:
+    # Dobler RTO, men aldri over rto_max
+    # Retur: Ingen returverdi for denne funksjonen.
+    def backoff(self):
+        self.rto = min(self.rto * 2, self.rto_max)
+
+    # Beskrivelse av funksjonen:
+    # Lager en tekst som beskriver estimatet, til bruk i rapporten etter overføringen.
+    # Argumenter:
+    # self: Referanse til det aktuelle RttEstimator-objektet
+    # Retur: Returnerer en tekst med SRTT, RTTVAR og RTO i millisekunder
+    def summary(self):
+        if self.srtt is None:
+            return f"Ingen RTT-målinger, RTO = {self.rto * 1000:.1f} ms"
+        return f"SRTT = {self.srtt * 1000:.2f} ms, RTTVAR = {self.rttvar * 1000:.2f} ms, RTO = {self.rto * 1000:.1f} ms"
+
+# Grensesnitt for metningskontroll (congestion control) på klienten
+# Klienten spør kontrolleren om hvor mange pakker som kan være underveis, og melder fra om ACK-er, tap og timeouts.
+# Nye algoritmer (f.eks. CUBIC eller BBR) lages som underklasser og legges til i CONGESTION_CONTROLLERS.
+class CongestionControl:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til CongestionControl-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle CongestionControl-objektet
+    # max_window: Øvre grense for vinduet, gitt med -w/--window
+    # Funksjonen gjør:
+    # Lagrer grensen og starter med et vindu på én pakke
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, max_window):
+        self.max_window = max_window
+        self.cwnd = 1.0
+
+    # Beskrivelse av funksjonen:
+    # Gir hvor mange pakker som kan være underveis nå.
+    # Argumenter:
+    # self: Referanse til det aktuelle CongestionControl-objektet
+    # Retur: Returnerer metningsvinduet som et heltall mellom 1 og max_window
+    @property
+    def window(self):
+        return max(1, min(int(self.cwnd), self.max_window))
+
+    # Beskrivelse av funksjonen:
+    # Kalles når en eller flere pakker er bekreftet.
+    # Argumenter:
+    # self: Referanse til det aktuelle CongestionControl-objektet
+    # acked: Antall pakker som ble bekreftet
+    # rtt: RTT-måling for ACK-en, eller None hvis den ikke kan måles (Karns regel)
+    # Retur: Ingen returverdi for denne funksjonen.
+    def on_ack(self, acked, rtt=None):
+        pass
+
+    # Beskrivelse av funksjonen:
+    # Kalles når en pakke er tapt, men ACK-er fortsatt kommer (pakken sendes på nytt før timeout).
+    # Argumenter:
+    # self: Referanse til det aktuelle CongestionControl-objektet
+    # Retur: Ingen returverdi for denne funksjonen.
+    def on_loss(self):
+        pass
+
+    # Beskrivelse av funksjonen:
+    # Kalles når retransmisjonstimeren har gått ut.
+    # Argumenter:
+    # self: Referanse til det aktuelle CongestionControl-objektet
+    # Retur: Ingen returverdi for denne funksjonen.
+    def on_timeout(self):
+        pass
+
+    # Beskrivelse av funksjonen:
+    # Lager en tekst som beskriver tilstanden, til bruk i rapporten etter overføringen.
+    # Argumenter:
+    # self: Referanse til det aktuelle CongestionControl-objektet
+    # Retur: Returnerer en tekst med metningsvinduet
+    def summary(self):
+        return f"cwnd = {self.cwnd:.1f}"
+
+# Fast vindu på -w pakker gjennom hele overføringen, slik klienten oppførte seg før metningskontroll ble lagt til
+class FixedWindow(CongestionControl):
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til FixedWindow-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle FixedWindow-objektet
+    # max_window: Størrelsen på vinduet
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, max_window):
+        super().__init__(max_window)
+        self.cwnd = float(max_window)
+
+# Reno-lignende metningskontroll: slow start, AIMD og multiplikativ reduksjon ved tap
+class RenoCongestionControl(CongestionControl):
+    # Startvinduet i pakker
+    INITIAL_WINDOW = 4
+    # Faktoren vinduet ganges med ved tap
+    DECREASE_FACTOR = 0.5
+
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til RenoCongestionControl-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle RenoCongestionControl-objektet
+    # max_window: Øvre grense for vinduet
+    # Funksjonen gjør:
+    # Starter i slow start med terskelen satt til øvre grense
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, max_window):
+        super().__init__(max_window)
+        self.cwnd = float(min(self.INITIAL_WINDOW, max_window))
+        self.ssthresh = float(max_window)
+
+    # Beskrivelse av funksjonen:
+    # Øker vinduet for bekreftede pakker.
+    # Argumenter:
+    # self: Referanse til det aktuelle RenoCongestionControl-objektet
+    # acked: Antall pakker som ble bekreftet
+    # rtt: Brukes ikke av Reno
+    # Funksjonen gjør:
+    # I slow start økes vinduet med én pakke per ACK (dobling per RTT), ellers med 1/cwnd per ACK (én pakke per RTT)
+    # Retur: Ingen returverdi for denne funksjonen.
+    def on_ack(self, acked, rtt=None):
+        for _ in range(acked):
+            if self.cwnd < self.ssthresh:
+                self.cwnd += 1
+            else:
+                self.cwnd += 1 / self.cwnd
+        self.cwnd = min(self.cwnd, float(self.max_window))
+
+    # Beskrivelse av funksjonen:
+    # Multiplikativ reduksjon av vinduet ved tap.
+    # Argumenter:
+    # self: Referanse til det aktuelle RenoCongestionControl-objektet
+    # Retur: Ingen returverdi for denne funksjonen.
+    def on_loss(self):
+        self.ssthresh = max(self.cwnd * self.DECREASE_FACTOR, 2.0)
+        self.cwnd = self.ssthresh
+
+    # Beskrivelse av funksjonen:
+    # Halverer terskelen og starter slow start på nytt fra én pakke etter en timeout.
+    # Argumenter:
+    # self: Referanse til det aktuelle RenoCongestionControl-objektet
+    # Retur: Ingen returverdi for denne funksjonen.
+    def on_timeout(self):
+        self.ssthresh = max(self.cwnd * self.DECREASE_FACTOR, 2.0)
+        self.cwnd = 1.0
+
+    # Beskrivelse av funksjonen:
+    # Lager en tekst som beskriver tilstanden, til bruk i rapporten etter overføringen.
+    # Argumenter:
+    # self: Referanse til det aktuelle RenoCongestionControl-objektet
+    # Retur: Returnerer en tekst med metningsvinduet og terskelen for slow start
+    def summary(self):
+        return f"cwnd = {self.cwnd:.1f}, ssthresh = {self.ssthresh:.1f}"
+
+# Algoritmene for metningskontroll som kan velges med --cc
+CONGESTION_CONTROLLERS = {'reno': RenoCongestionControl, 'fixed': FixedWindow}
+
+# Minste størrelse på socketbufferne som kan velges med --socket-buffer (byte)
+MIN_SOCKET_BUFFER = 4096
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sette størrelsen på sende- og mottaksbufferen til en socket
+# Argumenter:
+# sock: Socketen
+# size: Ønsket størrelse i byte
+# log: Loggen advarsler skrives til
+# Funksjonen gjør:
+# Setter SO_SNDBUF og SO_RCVBUF og leser dem tilbake. Linux dobler verdien for å gi plass til egne strukturer, men begrenser
+# den til net.core.wmem_max og net.core.rmem_max, så det skrives en advarsel hvis bufferen ble mindre enn ønsket.
+# Retur: Ingen returverdi for denne funksjonen
+def set_socket_buffers(sock, size, log):
+    for option, name, limit in ((socket.SO_SNDBUF, 'SO_SNDBUF', 'net.core.wmem_max'), (socket.SO_RCVBUF, 'SO_RCVBUF', 'net.core.rmem_max')):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, option, size)
+        except OSError as e:
+            log.write(LOG_QUIET, f"Kunne ikke sette {name} til {size} byte: {e}")
+            continue
+        actual = sock.getsockopt(socket.SOL_SOCKET, option)
+        if actual < size:
+            log.write(LOG_QUIET, f"Advarsel: {name} ble {actual} byte i stedet for {size} (øk {limit})")
+
+# Pacing med en tokenbøtte: i stedet for å sende hele vinduet på en gang sprer klienten pakkene utover, slik at korte
+# buffere i svitsjer og i serverens socket ikke flyter over. Bøtta fylles med raten (byte per sekund) og tømmes med størrelsen
+# på hver pakke som sendes, også retransmisjoner og paritetspakker. Den kan gå i minus, og da venter klienten til den er
+# positiv igjen. Raten er enten fast (--rate) eller regnes ut fra metningsvinduet og SRTT (--pace), som i Linux sin fq-pacing.
+class Pacer:
+    # Raten regnet ut fra vinduet ganges med denne, slik at vinduet fortsatt kan vokse
+    GAIN = 1.25
+    # Bøtta rommer data for så mange sekunder, men minst MIN_BURST pakker. Python kan ikke vente kortere enn omtrent
+    # et millisekund presist, så ved høye rater sendes små grupper av pakker i stedet for én og én.
+    QUANTUM = 0.001
+    MIN_BURST = 2
+
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til Pacer-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle Pacer-objektet
+    # rate: Fast rate i byte per sekund, eller None for å regne ut raten fra vinduet og SRTT
+    # packet_size: Størrelsen på en full pakke i byte (pakkehode og nyttelast)
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, rate, packet_size):
+        self.rate = rate
+        self.packet_size = packet_size
+        self.tokens = float(self.MIN_BURST * packet_size)
+        self.last = time.time()
+        # Raten som ble brukt sist, for rapporten
+        self.current = rate
+
+    # Beskrivelse av funksjonen:
+    # Fyller bøtta og gir hvor lenge klienten må vente før neste pakke kan sendes
+    # Argumenter:
+    # self: Referanse til det aktuelle Pacer-objektet
+    # now: Tiden nå
+    # cwnd: Metningsvinduet i pakker
+    # srtt: Glattet RTT i sekunder, eller None før første måling
+    # Funksjonen gjør:
+    # Uten fast rate og før første RTT-måling er det ingen pacing
+    # Retur: Returnerer ventetiden i sekunder, 0 hvis pakken kan sendes nå
+    def wait(self, now, cwnd, srtt):
+        rate = self.rate
+        if rate is None:
+            if srtt is None:
+                return 0.0
+            rate = self.GAIN * cwnd * self.packet_size / max(srtt, RttEstimator.GRANULARITY)
+        self.current = rate
+        self.tokens = min(self.tokens + (now - self.last) * rate, max(self.MIN_BURST * self.packet_size, rate * self.QUANTUM))
+        self.last = now
+        return 0.0 if self.tokens > 0 else -self.tokens / rate
+
+    # Beskrivelse av funksjonen:
+    # Tømmer bøtta for en pakke som er sendt
+    # Argumenter:
+    # self: Referanse til det aktuelle Pacer-objektet
+    # size: Størrelsen på pakken i byte
+    # Retur: Ingen returverdi for denne funksjonen
+    def consume(self, size):
+        self.tokens -= size
+
+    # Beskrivelse av funksjonen:
+    # Lager en tekst som beskriver pacingen, til bruk i rapporten etter overføringen.
+    # Argumenter:
+    # self: Referanse til det aktuelle Pacer-objektet
+    # Retur: Returnerer en tekst med raten i Mbit/s
+    def summary(self):
+        kind = "fast" if self.rate is not None else "fra cwnd/SRTT"
+        if self.current is None:
+            return f"{kind}, ingen RTT-målinger"
+        return f"{kind}, {self.current * 8 / 1e6:.2f} Mbps"
+
+# Hvor langt foran sendeposisjonen lesetråden (--prefetch) leser filen, og hvor mye den leser om gangen (byte)
+PREFETCH_AHEAD = 32 << 20
+PREFETCH_CHUNK = 1 << 20
+
+# Ringbuffer for pakkene klienten har sendt, men som ikke er bekreftet ennå
+# Pakke seq ligger på plass seq % kapasitet. Hver plass har et memoryview av nyttelasten, sendetiden og om pakken er sendt på nytt.
+# Er filen minnekartlagt (map_file), er nyttelasten et utsnitt av kartleggingen og kopieres aldri. Ellers har hver plass
+# en forhåndsallokert buffer som fildata leses rett inn i. Minnebruken er dermed O(vindu) uansett filstørrelse,
+# og det å bekrefte en pakke er O(1).
+class SendBuffer:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til SendBuffer-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # capacity: Største antall pakker fra den eldste ubekreftede til den neste som sendes. Rundes opp til en toerpotens.
+    # payload_size: Største nyttelast per pakke
+    # Funksjonen gjør:
+    # Lager tomme plasser. Bufferne til plassene allokeres først når de tas i bruk.
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, capacity, payload_size):
+        size = 1
+        while size < capacity:
+            size *= 2
+        self.capacity = size
+        self.mask = size - 1
+        self.payload_size = payload_size
+        self.buffers = [None] * size
+        self.views = [None] * size
+        self.sent_times = [0.0] * size
+        self.retransmitted = [False] * size
+        self.acked = [True] * size
+        # Minnekartleggingen av filen, memoryview-et av området som sendes og hvor langt i området det er lest
+        self.mapping = None
+        self.source = None
+        self.position = 0
+        # Lesetråden som henter filen inn i minnet foran sendingen (--prefetch)
+        self.prefetch_thread = None
+        self.prefetching = False
+        # Den eldste ubekreftede pakken, neste sekvensnummer og antall ubekreftede pakker
+        self.base = 1
+        self.next_seq = 1
+        self.outstanding = 0
+
+    # Beskrivelse av funksjonen:
+    # Gir antall pakker som er sendt, men ikke bekreftet.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # Retur: Returnerer antall ubekreftede pakker
+    def __len__(self):
+        return self.outstanding
+
+    # Beskrivelse av funksjonen:
+    # Sjekker om det er plass til en ny pakke.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # Retur: Returnerer True hvis neste sekvensnummer får plass uten å overskrive en ubekreftet pakke
+    def has_room(self):
+        return self.next_seq - self.base < self.capacity
+
+    # Beskrivelse av funksjonen:
+    # Minnekartlegger området av filen som skal sendes.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # f: Filen, åpnet for lesing
+    # offset: Hvor i filen området starter, i byte
+    # length: Lengden på området i byte
+    # Funksjonen gjør:
+    # Kartlegger filen med mmap, slik at nyttelasten blir utsnitt (memoryview) rett inn i sidehurtigbufferen og aldri kopieres i Python.
+    # Tomme filer og filer som ikke kan kartlegges (f.eks. pipes) leses i stedet med readinto i read_next.
+    # Retur: Returnerer True hvis filen ble kartlagt, ellers False
+    def map_file(self, f, offset, length):
+        try:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            return False
+        if hasattr(self.mapping, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            # Ber kjernen lese filen fortløpende og aggressivt fremover
+            self.mapping.madvise(mmap.MADV_SEQUENTIAL)
+        self.source = memoryview(self.mapping)[offset:offset + length]
+        return True
+
+    # Beskrivelse av funksjonen:
+    # Sender innholdet i en buffer i stedet for en fil, brukes for deltaoverføring
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # data: Bufferen som skal sendes
+    # Retur: Ingen returverdi for denne funksjonen
+    def use_buffer(self, data):
+        self.source = memoryview(data)
+
+    # Beskrivelse av funksjonen:
+    # Starter lesetråden som henter filen inn i minnet foran sendingen
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # Funksjonen gjør:
+    # Lesetråden gjør at sidefeil (lesing fra disk) skjer i lesetråden i stedet for i sendeløkken. Krever at filen er kartlagt.
+    # Retur: Returnerer True hvis tråden ble startet
+    def start_prefetch(self):
+        if self.source is None:
+            return False
+        self.prefetching = True
+        self.prefetch_thread = threading.Thread(target=self.prefetch, daemon=True)
+        self.prefetch_thread.start()
+        return True
+
+    # Beskrivelse av funksjonen:
+    # Lesetråden. Går gjennom området som skal sendes, høyst PREFETCH_AHEAD byte foran sendeposisjonen.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # Funksjonen gjør:
+    # Leser hver blokk med zlib.crc32, som berører alle sidene uten å kopiere dem og slipper GIL-en mens den leser
+    # Retur: Ingen returverdi for denne funksjonen
+    def prefetch(self):
+        position = 0
+        end = len(self.source)
+        while self.prefetching and position < end:
+            if position - self.position >= PREFETCH_AHEAD:
+                time.sleep(0.001)
+                continue
+            block = min(position + PREFETCH_CHUNK, end)
+            zlib.crc32(self.source[position:block])
+            position = block
+
+    # Beskrivelse av funksjonen:
+    # Slipper nyttelasten til alle plassene og lukker minnekartleggingen.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # Funksjonen gjør:
+    # Kartleggingen kan bare lukkes når ingen utsnitt av den finnes lenger, så alle plassene tømmes først
+    # Retur: Ingen returverdi for denne funksjonen.
+    def close(self):
+        if self.prefetch_thread is not None:
+            self.prefetching = False
+            self.prefetch_thread.join()
+            self.prefetch_thread = None
+        self.views = [None] * self.capacity
+        if self.mapping is not None:
+            self.source.release()
+            self.source = None
+            try:
+                self.mapping.close()
+            except BufferError:
+                # Et utsnitt lever fortsatt (f.eks. etter et unntak), og kartleggingen lukkes når det blir ryddet bort
+                pass
+            self.mapping = None
+        elif self.source is not None:
+            self.source.release()
+            self.source = None
+
+    # Beskrivelse av funksjonen:
+    # Henter neste pakke fra filen til neste ledige plass.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # f: Filen det leses fra, eller et annet objekt med readinto (f.eks. ChunkCompressor). Brukes ikke når filen er minnekartlagt.
+    # limit: Største antall byte som kan leses, eller None for å lese til slutten av filen
+    # Funksjonen gjør:
+    # Tar et utsnitt av kartleggingen, eller leser opptil payload_size byte med readinto, slik at ingen ny buffer lages per pakke.
+    # Reserverer neste sekvensnummer.
+    # Retur: Returnerer sekvensnummeret til pakken, eller None hvis filen (eller området) er lest ferdig
+    def read_next(self, f, limit=None):
+        index = self.next_seq & self.mask
+        if self.source is not None:
+            length = min(self.payload_size, len(self.source) - self.position)
+            if limit is not None:
+                length = min(length, limit)
+            if length <= 0:
+                return None
+            self.views[index] = self.source[self.position:self.position + length]
+            self.position += length
+        else:
+            if self.buffers[index] is None:
+                self.buffers[index] = bytearray(self.payload_size)
+            if limit is not None and limit < self.payload_size:
+                length = f.readinto(memoryview(self.buffers[index])[:limit]) if limit > 0 else 0
+            else:
+                length = f.readinto(self.buffers[index])
+            if not length:
+                return None
+            self.views[index] = memoryview(self.buffers[index])[:length]
+        self.acked[index] = False
+        self.retransmitted[index] = False
+        seq = self.next_seq
+        self.next_seq += 1
+        self.outstanding += 1
+        return seq
+
+    # Beskrivelse av funksjonen:
+    # Gir nyttelasten til en pakke.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # seq: Sekvensnummeret til pakken
+    # Retur: Returnerer et memoryview av nyttelasten
+    def payload(self, seq):
+        return self.views[seq & self.mask]
+
+    # Beskrivelse av funksjonen:
+    # Registrerer at en pakke er sendt.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # seq: Sekvensnummeret til pakken
+    # retransmit: Om pakken ble sendt på nytt
+    # sent_at: Tiden pakken ble sendt, eller None for nå
+    # Retur: Ingen returverdi for denne funksjonen.
+    def mark_sent(self, seq, retransmit=False, sent_at=None):
+        index = seq & self.mask
+        self.sent_times[index] = time.time() if sent_at is None else sent_at
+        if retransmit:
+            self.retransmitted[index] = True
+
+    # Beskrivelse av funksjonen:
+    # Gir tiden en pakke sist ble sendt.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # seq: Sekvensnummeret til pakken
+    # Retur: Returnerer sendetiden
+    def sent_time(self, seq):
+        return self.sent_times[seq & self.mask]
+
+    # Beskrivelse av funksjonen:
+    # Sjekker om en pakke er sendt, men ikke bekreftet.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # seq: Sekvensnummeret til pakken
+    # Retur: Returnerer True hvis pakken venter på bekreftelse
+    def is_outstanding(self, seq):
+        return self.base <= seq < self.next_seq and not self.acked[seq & self.mask]
+
+    # Beskrivelse av funksjonen:
+    # Bekrefter en pakke og frigjør plassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # seq: Sekvensnummeret til pakken
+    # Funksjonen gjør:
+    # Merker pakken som bekreftet og slipper nyttelasten. Hvis den var den eldste, flyttes base frem forbi alle bekreftede pakker.
+    # Retur: Returnerer (True, om pakken var sendt på nytt) hvis pakken ventet på bekreftelse, ellers (False, False)
+    def ack(self, seq):
+        if not self.is_outstanding(seq):
+            return False, False
+        index = seq & self.mask
+        self.acked[index] = True
+        self.views[index] = None
+        self.outstanding -= 1
+        while self.base < self.next_seq and self.acked[self.base & self.mask]:
+            self.base += 1
+        return True, self.retransmitted[index]
+
+    # Beskrivelse av funksjonen:
+    # Bekrefter alle pakker før et sekvensnummer (kumulativ ACK).
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # ack: Neste sekvensnummer mottakeren venter på
+    # Funksjonen gjør:
+    # Flytter base frem til ack og frigjør plassene på veien. Hver pakke bekreftes bare én gang, så arbeidet er O(1) per pakke.
+    # Retur: Returnerer antall pakker som ble bekreftet nå
+    def ack_through(self, ack):
+        acked = 0
+        end = min(ack, self.next_seq)
+        while self.base < end:
+            index = self.base & self.mask
+            if not self.acked[index]:
+                self.acked[index] = True
+                self.views[index] = None
+                self.outstanding -= 1
+                acked += 1
+            self.base += 1
+        while self.base < self.next_seq and self.acked[self.base & self.mask]:
+            self.base += 1
+        return acked
+
+    # Beskrivelse av funksjonen:
+    # Sjekker om en pakke er sendt på nytt.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # seq: Sekvensnummeret til pakken
+    # Retur: Returnerer True hvis pakken er sendt mer enn én gang
+    def was_retransmitted(self, seq):
+        return self.retransmitted[seq & self.mask]
+
+    # Beskrivelse av funksjonen:
+    # Går gjennom pakkene som venter på bekreftelse, fra den eldste.
+    # Argumenter:
+    # self: Referanse til det aktuelle SendBuffer-objektet
+    # Retur: Returnerer sekvensnumrene som en generator
+    def unacked(self):
+        for seq in range(self.base, self.next_seq):
+            if not self.acked[seq & self.mask]:
+                yield seq
+
+# Hvor lenge en forbindelse kan være stille før serveren gir den opp (sekunder)
+CONNECTION_TIMEOUT = 30.0
+# Hvor lenge en avsluttet forbindelse huskes, slik at en FIN som sendes på nytt (fordi FIN-ACK gikk tapt) kan bekreftes igjen
+TIME_WAIT = 2.0
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om en pakke er en SYN-pakke
+# Argumenter:
+# packet: pakken som skal sjekkes
+# Funksjonen gjør:
+# SYN-pakken sendes alltid med versjon 1 av pakkehodet og uten nyttelast, så den er nøyaktig 6 byte.
+# Pakker med versjon 2 er minst 12 byte, så en SYN kan kjennes igjen uansett hvilken versjon forbindelsen bruker.
+# Retur: Returnerer True hvis pakken er en SYN-pakke, ellers False
+def is_syn_packet(packet):
+    return len(packet) == HEADER_V1.size and HEADER_V1.unpack_from(packet)[2] == SYN
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om en pakke er en SYN-ACK-pakke
+# Argumenter:
+# packet: pakken som skal sjekkes
+# Funksjonen gjør:
+# SYN-ACK-pakken sendes alltid med versjon 1 av pakkehodet. Andre pakker fra serveren med versjon 2 har ACK-flagget i
+# den andre byten, mens SYN-ACK har modusen der, så de kan ikke forveksles.
+# Retur: Returnerer True hvis pakken er en SYN-ACK-pakke, ellers False
+def is_syn_ack_packet(packet):
+    return len(packet) >= HEADER_V1.size and not packet[1] & ACK and HEADER_V1.unpack_from(packet)[2] == SYN | ACK
+
+# Håndtrykket tåler tap: klienten sender SYN-pakken på nytt og serveren SYN-ACK-pakken på nytt, med dobbel ventetid
+# for hver gang (eksponentiell backoff), opptil HANDSHAKE_RETRIES ganger. En SYN som kommer på nytt gir samme SYN-ACK.
+HANDSHAKE_TIMEOUT = 0.5
+HANDSHAKE_RETRIES = 6
+# Datapakker som kommer før ACK-pakken i håndtrykket (0-RTT, eller fordi ACK-pakken gikk tapt eller kom i feil rekkefølge),
+# holdes av serveren og bekreftes, men skrives ikke før forbindelsen er bekreftet. Høyst så mange pakker tas vare på.
+EARLY_DATA_PACKETS = 64
+
+# Størrelsen på blokkene forbindelsene samler nyttelast i før de gis til skrivetråden (byte)
+WRITE_CHUNK_SIZE = 1 << 18
+# Hvor mange byte som kan vente på skrivetråden. Er disken så treg at grensen nås, forkastes nye datapakker
+# (klienten sender dem på nytt) i stedet for at serverens hendelsesløkke venter på disken.
+MAX_WRITE_BACKLOG = 64 << 20
+# Mottaksvinduet (rwnd) serveren annonserer i hver ACK: hvor mange pakker etter det kumulative bekreftelsesnummeret den har
+# plass til. Kjernen regner hvert datagram i socketens mottaksbuffer med bufferen det ligger i, ikke bare selve pakken:
+# plass foran dataene, rundet opp til en toerpotens for små datagrammer og til hele sider for store, pluss sk_buff-strukturen.
+SKB_HEADROOM = 320
+SKB_OVERHEAD = 256
+SKB_SMALL_LIMIT = 32768
+# Hvor ofte serveren sjekker om et lukket mottaksvindu har åpnet seg igjen (sekunder)
+WINDOW_CHECK_INTERVAL = 0.01
+
+# Beskrivelse av funksjonen:
+# Funksjon som anslår hvor mye av socketens mottaksbuffer et datagram bruker
+# Argumenter:
+# size: Størrelsen på datagrammet (pakkehode og nyttelast) i byte
+# Retur: Returnerer anslaget i byte
+def datagram_cost(size):
+    size += SKB_HEADROOM
+    if size <= SKB_SMALL_LIMIT:
+        return (1 << (size - 1).bit_length()) + SKB_OVERHEAD
+    return -(-size // mmap.PAGESIZE) * mmap.PAGESIZE + SKB_OVERHEAD
+# Største antall blokker som skrives med ett pwritev-kall
+MAX_WRITE_BATCH = 64
+# Sjekkpunktet for en overføring som kan gjenopptas (--resume) lagres ved siden av filen med denne endelsen,
+# og oppdateres høyst så ofte (sekunder)
+CHECKPOINT_SUFFIX = '.ckpt'
+CHECKPOINT_INTERVAL = 1.0
+# Hvor mange ganger klienten sender en forespørsel på nytt (f.eks. ACK-pakken mens den venter på svaret om gjenopptak)
+REPLY_RETRIES = 5
+
+# Skrivetråden på serveren. Forbindelsene samler nyttelasten som kommer i rekkefølge i blokker på WRITE_CHUNK_SIZE byte
+# og legger blokkene i en kø. Tråden skriver blokker som ligger etter hverandre i samme fil med ett pwritev-kall, og
+# forhåndsallokerer og lukker filene, slik at hendelsesløkken aldri venter på disken. Blokkene brukes om igjen.
+class DiskWriter:
+    # Operasjonene i køen
+    ALLOCATE = 0
+    WRITE = 1
+    CLOSE = 2
+    COPY = 3
+    DECOMPRESS = 4
+
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til DiskWriter-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle DiskWriter-objektet
+    # log: Loggen feil skrives til
+    # on_close: Funksjon som kalles fra skrivetråden med hver fil som er lukket, eller None
+    # Funksjonen gjør:
+    # Oppretter køen og lageret av ledige blokker og starter skrivetråden
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, log, on_close=None):
+        self.log = log
+        self.on_close = on_close
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.pool = []
+        # Antall byte som ligger i køen og venter på å bli skrevet
+        self.backlog = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # Beskrivelse av funksjonen:
+    # Gir en ledig blokk å samle nyttelast i
+    # Argumenter:
+    # self: Referanse til det aktuelle DiskWriter-objektet
+    # Retur: Returnerer en bytearray på WRITE_CHUNK_SIZE byte
+    def buffer(self):
+        with self.lock:
+            if self.pool:
+                return self.pool.pop()
+        return bytearray(WRITE_CHUNK_SIZE)
+
+    # Beskrivelse av funksjonen:
+    # Sjekker om skrivetråden ligger for langt etter
+    # Argumenter:
+    # self: Referanse til det aktuelle DiskWriter-objektet
+    # Retur: Returnerer True hvis mer enn MAX_WRITE_BACKLOG byte venter på å bli skrevet
+    def overloaded(self):
+        return self.backlog > MAX_WRITE_BACKLOG
+
+    # Beskrivelse av funksjonen:
+    # Ber skrivetråden forhåndsallokere en fil
+    # Argumenter:
+    # self: Referanse til det aktuelle DiskWriter-objektet
+    # transfer: Filen som skal forhåndsallokeres
+    # Retur: Ingen returverdi for denne funksjonen
+    def allocate(self, transfer):
+        self.queue.put((self.ALLOCATE, transfer, 0, None, 0))
+
+    # Beskrivelse av funksjonen:
+    # Legger en blokk i køen
+    # Argumenter:
+    # self: Referanse til det aktuelle DiskWriter-objektet
+    # transfer: Filen blokken skal skrives til
+    # position: Posisjonen i filen, i byte fra starten
+    # buffer: Blokken (fra buffer()). Den tilhører skrivetråden til den er skrevet.
+    # length: Antall byte i blokken som skal skrives
+    # Retur: Ingen returverdi for denne funksjonen
+    def write(self, transfer, position, buffer, length):
+        with self.lock:
+            self.backlog += length
+        self.queue.put((self.WRITE, transfer, position, buffer, length))
+
+    # Beskrivelse av funksjonen:
+    # Ber skrivetråden kopiere et område fra den forrige versjonen av filen (deltaoverføring)
+    # Argumenter:
+    # self: Referanse til det aktuelle DiskWriter-objektet
+    # transfer: Filen området skal skrives til
+    # position: Posisjonen i filen, i byte fra starten
+    # source: Posisjonen i den forrige versjonen
+    # length: Antall byte som skal kopieres
+    # Retur: Ingen returverdi for denne funksjonen
+    def copy(self, transfer, position, source, length):
+        self.queue.put((self.COPY, transfer, position, source, length))
+
+    # Beskrivelse av funksjonen:
+    # Ber skrivetråden dekomprimere en blokk og skrive den
+    # Argumenter:
+    # self: Referanse til det aktuelle DiskWriter-objektet
+    # transfer: Filen blokken skal skrives til
+    # position: Posisjonen i filen, i byte fra starten
+    # data: Den komprimerte blokken
+    # length: Lengden blokken skal ha
+    # Retur: Ingen returverdi for denne funksjonen
+    def decompress(self, transfer, position, data, length):
+        with self.lock:
+            self.backlog += len(data)
+        self.queue.put((self.DECOMPRESS, transfer, position, data, length))
+
+    # Beskrivelse av funksjonen:
+    # Ber skrivetråden lukke en fil når alt som ligger foran i køen er skrevet
+    # Argumenter:
+    # self: Referanse til det aktuelle DiskWriter-objektet
+    # transfer: Filen som skal lukkes
+    # Retur: Ingen returverdi for denne funksjonen
+    def close_file(self, transfer):
+        self.queue.put((self.CLOSE, transfer, 0, None, 0))
+
+    # Beskrivelse av funksjonen:
+    # Skrivetråden. Henter operasjoner fra køen og utfører dem i rekkefølge.
+    # Argumenter:
+    # self: Referanse til det aktuelle DiskWriter-objektet
+    # Funksjonen gjør:
+    # Blokker som ligger etter hverandre i køen og i samme fil, samles og skrives med ett kall. None i køen stopper tråden.
+    # Retur: Ingen returverdi for denne funksjonen
+    def run(self):
+        batch = []
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.flush(batch)
+                return
+            operation, transfer, position, buffer, length = item
+            if batch and (operation != self.WRITE or transfer is not batch[0][1] or position != batch[-1][2] + batch[-1][4] or len(batch) >= MAX_WRITE_BATCH):
+                self.flush(batch)
+                batch = []
+            if operation == self.WRITE:
+                batch.append(item)
+                # Skriver når køen er tom, ellers samles flere blokker først
+                if not self.queue.empty():
+                    continue
+                self.flush(batch)
+                batch = []
+            else:
+                try:
+                    if operation == self.ALLOCATE:
+                        transfer.allocate()
+                    elif operation == self.COPY:
+                        transfer.copy(position, buffer, length)
+                    elif operation == self.DECOMPRESS:
+                        transfer.write([decompress_frame(transfer.codec, buffer, length)], position)
+                    else:
+                        transfer.close()
+                except (OSError, ValueError) as e:
+                    if operation in (self.COPY, self.DECOMPRESS, self.CLOSE):
+                        transfer.complete = False
+                    action = {self.ALLOCATE: 'forhåndsallokering', self.COPY: 'kopiering til', self.DECOMPRESS: 'dekomprimering til', self.CLOSE: 'lukking'}[operation]
+                    self.log.write(LOG_QUIET, f"Feil ved {action} av {transfer.filename}: {e}")
+                finally:
+                    if operation == self.DECOMPRESS:
+                        with self.lock:
+                            self.backlog -= len(buffer)
+                    elif operation == self.CLOSE and self.on_close is not None:
+                        # Først nå er alt skrevet, så complete sier om hele filen faktisk ligger på disk
+                        self.on_close(transfer)
+
+    # Beskrivelse av funksjonen:
+    # Skriver blokker som ligger etter hverandre i samme fil
+    # Argumenter:
+    # self: Referanse til det aktuelle DiskWriter-objektet
+    # batch: Listen med blokkene (operasjonene fra køen)
+    # Funksjonen gjør:
+    # Skriver blokkene og legger dem tilbake i lageret av ledige blokker
+    # Retur: Ingen returverdi for denne funksjonen
+    def flush(self, batch):
+        if not batch:
+            return
+        transfer = batch[0][1]
+        try:
+            transfer.write([memoryview(buffer)[:length] for _, _, _, buffer, length in batch], batch[0][2])
+            if transfer.resume_id is not None and time.time() >= transfer.next_checkpoint:
+                transfer.save_checkpoint()
+        except OSError as e:
+            transfer.complete = False
+            self.log.write(LOG_QUIET, f"Feil ved skriving til {transfer.filename}: {e}")
+        with self.lock:
+            self.backlog -= sum(item[4] for item in batch)
+            # Holder på nok blokker til å fylle køen, resten ryddes bort
+            for item in batch:
+                if len(self.pool) < MAX_WRITE_BACKLOG // WRITE_CHUNK_SIZE:
+                    self.pool.append(item[3])
+
+    # Beskrivelse av funksjonen:
+    # Stopper skrivetråden når alt i køen er skrevet
+    # Argumenter:
+    # self: Referanse til det aktuelle DiskWriter-objektet
+    # Retur: Ingen returverdi for denne funksjonen
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+# En fil som tas imot på serveren, fra én eller flere forbindelser (strømmer). Med --streams deler klienten filen i
+# byteområder og sender hvert område over sin egen forbindelse. Alle strømmene skriver til samme fil med posisjonelle
+# skrivinger (pwrite), så de trenger ikke å vente på hverandre, og filen lukkes når den siste strømmen er ferdig.
+# Skrivingen, forhåndsallokeringen og lukkingen gjøres av serverens skrivetråd (DiskWriter).
+class Transfer:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til Transfer-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle Transfer-objektet
+    # filename: Filen dataene skal skrives til
+    # streams: Antall forbindelser filen sendes over
+    # size: Størrelsen klienten har oppgitt for filen, eller None hvis den ikke er kjent
+    # resume_id: Overførings-ID-en hvis overføringen kan gjenopptas (--resume), ellers None
+    # ranges: Byteområdene som allerede er lagret når en avbrutt overføring gjenopptas, eller None for en ny fil
+    # Funksjonen gjør:
+    # Oppretter (eller tømmer) filen og initialiserer variabler for å beregne gjennomstrømningen. En fil som gjenopptas, tømmes ikke.
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, filename, streams=1, size=None, resume_id=None, ranges=None):
+        self.filename = filename
+        self.fd = os.open(filename, os.O_WRONLY | os.O_CREAT | (0 if ranges is not None else os.O_TRUNC), 0o644)
+        self.streams = streams
+        self.size = size
+        self.allocated = False
+        self.resume_id = resume_id
+        # Lagrede byteområder [start, slutt), sortert og slått sammen. Skrivetråden bytter ut listen i stedet for å endre den,
+        # så hendelsesløkken kan lese den uten lås.
+        self.ranges = ranges or []
+        self.next_checkpoint = 0.0
+        # Navnet filen hadde hos klienten, den forrige versjonen av filen (Basis) ved deltaoverføring og kodeken ved komprimering
+        self.name = None
+        self.basis = None
+        self.codec = None
+        # Slutten av det som er skrevet lengst ut i filen (oppdateres av skrivetråden)
+        self.end = max((end for _, end in self.ranges), default=0)
+        self.finished = 0
+        self.complete = True
+        self.start_time = time.time()
+        self.total_bytes = 0
+
+    # Beskrivelse av funksjonen:
+    # Lagrer sjekkpunktet for overføringen
+    # Argumenter:
+    # self: Referanse til det aktuelle Transfer-objektet
+    # Funksjonen gjør:
+    # Tvinger dataene ut på disken først (fdatasync), slik at sjekkpunktet aldri sier at noe er lagret som kan gå tapt ved strømbrudd.
+    # Sjekkpunktet er en JSON-fil med overførings-ID-en, størrelsen og de lagrede byteområdene, og skrives atomisk.
+    # Retur: Ingen returverdi for denne funksjonen
+    def save_checkpoint(self):
+        if hasattr(os, 'fdatasync'):
+            os.fdatasync(self.fd)
+        else:
+            os.fsync(self.fd)
+        write_json(self.filename + CHECKPOINT_SUFFIX, {'transfer': self.resume_id, 'size': self.size, 'ranges': self.ranges})
+        self.next_checkpoint = time.time() + CHECKPOINT_INTERVAL
+
+    # Beskrivelse av funksjonen:
+    # Gir hvor mange byte fra en posisjon som allerede er lagret
+    # Argumenter:
+    # self: Referanse til det aktuelle Transfer-objektet
+    # offset: Posisjonen i filen, i byte fra starten
+    # length: Største antall byte som kan hoppes over (lengden på området strømmen sender)
+    # Retur: Returnerer antall byte fra offset som ligger sammenhengende i et lagret område
+    def stored_from(self, offset, length):
+        for start, end in self.ranges:
+            if start <= offset < end:
+                return min(end - offset, length)
+        return 0
+
+    # Beskrivelse av funksjonen:
+    # Forhåndsallokerer filen til størrelsen klienten har oppgitt
+    # Argumenter:
+    # self: Referanse til det aktuelle Transfer-objektet
+    # Funksjonen gjør:
+    # Reserverer plassen på disken med posix_fallocate, slik at filsystemet ikke må finne nye blokker for hver skriving
+    # og en full disk oppdages med en gang. Der posix_fallocate ikke finnes, settes bare lengden med ftruncate.
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster OSError hvis plassen ikke kan reserveres
+    def allocate(self):
+        if not self.size:
+            return
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(self.fd, 0, self.size)
+        else:
+            os.ftruncate(self.fd, self.size)
+        self.allocated = True
+
+    # Beskrivelse av funksjonen:
+    # Skriver blokker som ligger etter hverandre til en gitt posisjon i filen
+    # Argumenter:
+    # self: Referanse til det aktuelle Transfer-objektet
+    # buffers: Blokkene som skal skrives, i rekkefølge
+    # position: Posisjonen i filen, i byte fra starten
+    # Funksjonen gjør:
+    # Skriver alle blokkene med ett pwritev-kall. Plattformer uten pwritev, og det som eventuelt ikke ble skrevet,
+    # skrives med pwrite (eller lseek og write der pwrite ikke finnes, f.eks. Windows).
+    # Retur: Ingen returverdi for denne funksjonen
+    def write(self, buffers, position):
+        total = sum(len(buffer) for buffer in buffers)
+        written = os.pwritev(self.fd, buffers, position) if hasattr(os, 'pwritev') else 0
+        if written < total:
+            data = memoryview(b''.join(buffers))[written:]
+            offset = position + written
+            while data:
+                if hasattr(os, 'pwrite'):
+                    count = os.pwrite(self.fd, data, offset)
+                else:
+                    os.lseek(self.fd, offset, os.SEEK_SET)
+                    count = os.write(self.fd, data)
+                data = data[count:]
+                offset += count
+        self.end = max(self.end, position + total)
+        if self.resume_id is not None:
+            self.ranges = merge_ranges(self.ranges + [[position, position + total]])
+
+    # Beskrivelse av funksjonen:
+    # Kopierer et område fra den forrige versjonen av filen
+    # Argumenter:
+    # self: Referanse til det aktuelle Transfer-objektet
+    # position: Posisjonen i filen, i byte fra starten
+    # source: Posisjonen i den forrige versjonen
+    # length: Antall byte som skal kopieres
+    # Funksjonen gjør:
+    # Bruker copy_file_range, som kopierer inne i kjernen, og pread/pwrite der den ikke finnes
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster OSError hvis den forrige versjonen er kortere enn området
+    def copy(self, position, source, length):
+        done = 0
+        while done < length:
+            count = min(length - done, WRITE_CHUNK_SIZE)
+            if hasattr(os, 'copy_file_range'):
+                count = os.copy_file_range(self.basis.fd, self.fd, count, source + done, position + done)
+            else:
+                count = os.pwrite(self.fd, os.pread(self.basis.fd, count, source + done), position + done)
+            if not count:
+                raise OSError(f"den forrige versjonen slutter ved byte {source + done}")
+            done += count
+        self.end = max(self.end, position + length)
+
+    # Beskrivelse av funksjonen:
+    # Registrerer at en strøm er ferdig
+    # Argumenter:
+    # self: Referanse til det aktuelle Transfer-objektet
+    # complete: Om strømmen sendte hele området sitt (False hvis forbindelsen ble tidsavbrutt)
+    # Retur: Returnerer True hvis alle strømmene er ferdige og filen kan lukkes, ellers False
+    def release(self, complete):
+        self.finished += 1
+        self.complete = self.complete and complete
+        return self.finished >= self.streams
+
+    # Beskrivelse av funksjonen:
+    # Lukker filen
+    # Argumenter:
+    # self: Referanse til det aktuelle Transfer-objektet
+    # Funksjonen gjør:
+    # Ble overføringen avbrutt, kortes en forhåndsallokert fil ned til det som faktisk ble skrevet.
+    # For en overføring som kan gjenopptas, lagres sjekkpunktet, eller det slettes hvis hele filen er mottatt.
+    # Retur: Ingen returverdi for denne funksjonen
+    def close(self):
+        try:
+            if self.allocated and self.end < self.size:
+                os.ftruncate(self.fd, self.end)
+            if self.resume_id is not None:
+                if self.complete:
+                    if os.path.exists(self.filename + CHECKPOINT_SUFFIX):
+                        os.remove(self.filename + CHECKPOINT_SUFFIX)
+                else:
+                    self.save_checkpoint()
+        finally:
+            os.close(self.fd)
+            if self.basis is not None:
+                self.basis.close()
+
+# En overføring der dataene gis til en funksjon (handler) i stedet for å lagres i en fil, brukes når serveren er bygd
+# inn i et annet program (drtp.py). Den har de samme metodene som Transfer, så forbindelsene og skrivetråden behandler
+# den som en fil. Funksjonen kalles fra skrivetråden, og er den treg, fylles køen til skrivetråden og mottaksvinduet
+# krymper, slik at klienten bremses i stedet for at dataene hoper seg opp i minnet.
+class StreamTransfer:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til StreamTransfer-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle StreamTransfer-objektet
+    # handler: Funksjonen som kalles som handler(stream, data), med stream lik dette objektet. data er bytes i rekkefølge,
+    # og None når overføringen er ferdig (complete sier da om alt kom frem, og error hva funksjonen eventuelt kastet).
+    # address: Adressen til klienten
+    # streams: Antall forbindelser dataene sendes over
+    # size: Størrelsen klienten har oppgitt, eller None hvis den ikke er kjent
+    # name: Navnet klienten har gitt dataene, eller None
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, handler, address, streams=1, size=None, name=None):
+        self.handler = handler
+        self.address = address
+        self.streams = streams
+        self.size = size
+        self.name = name
+        self.filename = f"<{name or 'strøm'} fra {address[0]}:{address[1]}>" if address else f"<{name or 'strøm'}>"
+        self.resume_id = None
+        self.basis = None
+        self.codec = None
+        self.end = 0
+        self.finished = 0
+        self.complete = True
+        self.start_time = time.time()
+        self.total_bytes = 0
+        # Blokker som har kommet foran det som er gitt til funksjonen (bare med flere strømmer), med posisjonen som nøkkel
+        self.pending = {}
+        # Unntaket funksjonen kastet, eller None
+        self.error = None
+
+    # Beskrivelse av funksjonen:
+    # Gir hvor mange byte fra en posisjon som allerede er mottatt
+    # Argumenter:
+    # self: Referanse til det aktuelle StreamTransfer-objektet
+    # offset: Posisjonen, i byte fra starten
+    # length: Største antall byte som kan hoppes over
+    # Retur: Returnerer alltid 0, dataene er ikke tatt vare på og kan ikke gjenopptas
+    def stored_from(self, offset, length):
+        return 0
+
+    # Beskrivelse av funksjonen:
+    # Gjør ingenting, det finnes ingen fil å forhåndsallokere
+    # Argumenter:
+    # self: Referanse til det aktuelle StreamTransfer-objektet
+    # Retur: Ingen returverdi for denne funksjonen
+    def allocate(self):
+        pass
+
+    # Beskrivelse av funksjonen:
+    # Gir blokker som ligger etter hverandre til funksjonen
+    # Argumenter:
+    # self: Referanse til det aktuelle StreamTransfer-objektet
+    # buffers: Blokkene, i rekkefølge. De kopieres, siden skrivetråden bruker bufferne på nytt.
+    # position: Posisjonen til den første blokken, i byte fra starten
+    # Funksjonen gjør:
+    # Blokker som kommer foran det funksjonen har fått (fra en annen strøm), holdes tilbake til hullet foran dem er fylt
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster OSError hvis funksjonen feiler. Funksjonen kalles ikke igjen før overføringen er ferdig.
+    def write(self, buffers, position):
+        data = b''.join(buffers)
+        if position != self.end:
+            self.pending[position] = data
+            return
+        self.deliver(data)
+        while self.end in self.pending:
+            self.deliver(self.pending.pop(self.end))
+
+    # Beskrivelse av funksjonen:
+    # Kaller funksjonen med neste blokk
+    # Argumenter:
+    # self: Referanse til det aktuelle StreamTransfer-objektet
+    # data: Blokken
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster OSError hvis funksjonen feiler
+    def deliver(self, data):
+        self.end += len(data)
+        if self.error is not None:
+            return
+        try:
+            self.handler(self, data)
+        except Exception as e:
+            self.error = e
+            raise OSError(f"mottakeren feilet: {e!r}") from e
+
+    # Beskrivelse av funksjonen:
+    # Kopiering fra en forrige versjon støttes ikke, siden mottatte data ikke lagres
+    # Argumenter:
+    # self: Referanse til det aktuelle StreamTransfer-objektet
+    # position: Posisjonen, i byte fra starten
+    # source: Posisjonen i den forrige versjonen
+    # length: Antall byte som skal kopieres
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster alltid OSError
+    def copy(self, position, source, length):
+        raise OSError("det finnes ingen forrige versjon når dataene gis til en funksjon")
+
+    # Beskrivelse av funksjonen:
+    # Registrerer at en strøm er ferdig
+    # Argumenter:
+    # self: Referanse til det aktuelle StreamTransfer-objektet
+    # complete: Om strømmen sendte hele området sitt
+    # Retur: Returnerer True hvis alle strømmene er ferdige, ellers False
+    def release(self, complete):
+        self.finished += 1
+        self.complete = self.complete and complete
+        return self.finished >= self.streams
+
+    # Beskrivelse av funksjonen:
+    # Forteller funksjonen at overføringen er ferdig
+    # Argumenter:
+    # self: Referanse til det aktuelle StreamTransfer-objektet
+    # Funksjonen gjør:
+    # Kaller funksjonen med data=None. Blokker som fortsatt venter på et hull, betyr at noe mangler.
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster OSError hvis funksjonen feiler
+    def close(self):
+        if self.pending or self.error is not None:
+            self.complete = False
+        self.pending.clear()
+        try:
+            self.handler(self, None)
+        except Exception as e:
+            raise OSError(f"mottakeren feilet: {e!r}") from e
+
+# Beskrivelse av funksjonen:
+# Funksjon for å slå sammen byteområder
+# Argumenter:
+# ranges: Liste med områder [start, slutt)
+# Retur: Returnerer en ny, sortert liste der områder som overlapper eller ligger inntil hverandre er slått sammen
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+# Beskrivelse av funksjonen:
+# Funksjon for å lage en overførings-ID for en fil som skal kunne gjenopptas (--resume)
+# Argumenter:
+# path: Filen som sendes
+# Funksjonen gjør:
+# Bygger ID-en av filnavnet, størrelsen og endringstiden, slik at samme fil gir samme ID neste gang,
+# mens en fil som er endret i mellomtiden starter på nytt
+# Retur: Returnerer ID-en som en heksadesimal tekst
+def transfer_key(path):
+    info = os.stat(path)
+    return hashlib.sha256(f"{os.path.basename(path)}:{info.st_size}:{info.st_mtime_ns}".encode()).hexdigest()[:16]
+
+# Filen på serveren som husker siste fullstendige fil mottatt under hvert navn, brukt som forrige versjon ved --delta
+RECEIVED_INDEX = 'drtp_received.json'
+
+# Økter: flere filer over én forbindelse. Strømmen er filene etter hverandre, hver med en metadataramme foran:
+# lengden på metadataene (!H) og JSON med navnet (relativt til mappen som sendes) og størrelsen, og så innholdet i filen.
+# Filene pakkes tett i de samme pakkene, så vinduet tømmes aldri mellom to filer.
+SESSION_META = struct.Struct('!H')
+
+# Beskrivelse av funksjonen:
+# Funksjon for å finne filene som skal sendes i en økt
+# Argumenter:
+# paths: Liste med filer og mapper
+# Funksjonen gjør:
+# En fil sendes under sitt eget navn. Filene i en mappe (og undermapper) sendes sortert, med navnet relativt til mappen.
+# Retur: Returnerer en liste med (filbane, navn, størrelse)
+def session_files(paths):
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append((path, os.path.basename(path), os.path.getsize(path)))
+            continue
+        for root, directories, names in os.walk(path):
+            directories.sort()
+            for name in sorted(names):
+                filename = os.path.join(root, name)
+                if os.path.isfile(filename):
+                    files.append((filename, os.path.relpath(filename, path).replace(os.sep, '/'), os.path.getsize(filename)))
+    return files
+
+# Beskrivelse av funksjonen:
+# Funksjon for å lage metadatarammen til en fil i en økt
+# Argumenter:
+# name: Navnet filen skal lagres under
+# size: Størrelsen på filen i byte
+# Retur: Returnerer rammen som bytes
+def encode_meta(name, size):
+    meta = encode_options({'name': name, 'size': size})
+    return SESSION_META.pack(len(meta)) + meta
+
+# Lager strømmen klienten sender i en økt. Brukes av SendBuffer som en fil (readinto).
+class SessionReader:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til SessionReader-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle SessionReader-objektet
+    # files: Filene som skal sendes, fra session_files
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, files):
+        self.files = collections.deque(files)
+        self.file = None
+        self.path = None
+        # Det som gjenstår av metadatarammen og av filen som leses
+        self.meta = memoryview(b'')
+        self.remaining = 0
+        self.count = 0
+
+    # Beskrivelse av funksjonen:
+    # Fyller bufferen med neste del av strømmen
+    # Argumenter:
+    # self: Referanse til det aktuelle SessionReader-objektet
+    # buffer: Bufferen som fylles (bytearray eller memoryview)
+    # Funksjonen gjør:
+    # Leser metadatarammen og så filen rett inn i bufferen med readinto, og går videre til neste fil uten å stoppe
+    # Retur: Returnerer antall byte som ble skrevet i bufferen, 0 når strømmen er slutt
+    # Unntakshåndtering: Kaster OSError hvis en fil er blitt kortere siden økten startet
+    def readinto(self, buffer):
+        buffer = memoryview(buffer)
+        filled = 0
+        while filled < len(buffer):
+            if not self.meta and not self.remaining and not self.next_file():
+                break
+            if self.meta:
+                count = min(len(self.meta), len(buffer) - filled)
+                buffer[filled:filled + count] = self.meta[:count]
+                self.meta = self.meta[count:]
+            else:
+                count = self.file.readinto(buffer[filled:filled + min(self.remaining, len(buffer) - filled)])
+                if not count:
+                    raise OSError(f"{self.path} er blitt kortere siden økten startet")
+                self.remaining -= count
+            filled += count
+        return filled
+
+    # Beskrivelse av funksjonen:
+    # Lukker filen som er lest ferdig og åpner den neste
+    # Argumenter:
+    # self: Referanse til det aktuelle SessionReader-objektet
+    # Retur: Returnerer False hvis det ikke er flere filer
+    def next_file(self):
+        self.close()
+        if not self.files:
+            return False
+        self.path, name, self.remaining = self.files.popleft()
+        self.meta = memoryview(encode_meta(name, self.remaining))
+        self.file = open(self.path, 'rb')
+        self.count += 1
+        return True
+
+    # Beskrivelse av funksjonen:
+    # Lukker filen som leses
+    # Argumenter:
+    # self: Referanse til det aktuelle SessionReader-objektet
+    # Retur: Ingen returverdi for denne funksjonen.
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+# Tolker strømmen i en økt på serveren. Metadatarammene og filene kan være delt over flere pakker.
+class SessionDecoder:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til SessionDecoder-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle SessionDecoder-objektet
+    # connection: Forbindelsen (Connection) som tar imot strømmen
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, connection):
+        self.connection = connection
+        self.header = bytearray()
+        # Lengden på metadatarammen som leses, med lengdefeltet, eller 0 før lengdefeltet er lest
+        self.meta_size = 0
+        # Antall byte som gjenstår av filen som leses
+        self.remaining = 0
+
+    # Beskrivelse av funksjonen:
+    # Tar imot neste del av strømmen
+    # Argumenter:
+    # self: Referanse til det aktuelle SessionDecoder-objektet
+    # data: Nyttelasten til neste pakke i rekkefølge
+    # Funksjonen gjør:
+    # En metadataramme åpner en ny fil med connection.begin_file, innholdet skrives med connection.store,
+    # og filen lukkes med connection.end_file så snart den er mottatt
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster ValueError hvis strømmen er ødelagt
+    def feed(self, data):
+        data = memoryview(data)
+        while data:
+            if self.remaining:
+                count = min(self.remaining, len(data))
+                self.connection.store(data[:count])
+                self.remaining -= count
+                data = data[count:]
+                if not self.remaining:
+                    self.connection.end_file()
+                continue
+            size = self.meta_size or SESSION_META.size
+            count = min(size - len(self.header), len(data))
+            self.header.extend(data[:count])
+            data = data[count:]
+            if len(self.header) < size:
+                break
+            if not self.meta_size:
+                self.meta_size = SESSION_META.size + SESSION_META.unpack(self.header)[0]
+                if self.meta_size == SESSION_META.size:
+                    raise ValueError("tom metadataramme i økten")
+                continue
+            meta = decode_options(self.header[SESSION_META.size:])
+            self.header.clear()
+            self.meta_size = 0
+            name, size = meta.get('name'), meta.get('size')
+            if not isinstance(name, str) or not isinstance(size, int) or size < 0:
+                raise ValueError("ugyldig metadataramme i økten")
+            self.connection.begin_file(name, size)
+            self.remaining = size
+            if not size:
+                self.connection.end_file()
+
+    # Beskrivelse av funksjonen:
+    # Sjekker om strømmen slutter mellom to filer
+    # Argumenter:
+    # self: Referanse til det aktuelle SessionDecoder-objektet
+    # Retur: Returnerer True hvis ingen fil eller metadataramme er halvveis mottatt
+    def idle(self):
+        return not self.remaining and not self.header
+
+# Sending uten fil, når klienten er bygd inn i et annet program (drtp.py). Et objekt med bufferprotokollen sendes
+# rett fra minnet med utsnitt, som en minnekartlagt fil. Andre kilder leses med SourceReader, og lengden er da ikke
+# kjent før kilden er tom, så serveren får ingen størrelse i håndtrykket.
+# Hvor mange byte som leses om gangen fra en kilde som bare har read
+SOURCE_READ_SIZE = 1 << 16
+
+# Beskrivelse av funksjonen:
+# Funksjon for å få en kilde som bytes
+# Argumenter:
+# source: Kilden
+# Funksjonen gjør:
+# Gjør om bufferen til et sammenhengende memoryview av byte. En buffer som ikke er sammenhengende, kopieres.
+# Retur: Returnerer et memoryview, eller None hvis kilden ikke har bufferprotokollen
+def source_view(source):
+    try:
+        view = memoryview(source)
+    except TypeError:
+        return None
+    return view.cast('B') if view.c_contiguous else memoryview(view.tobytes())
+
+# Leser en strøm eller en iterator med bytes i pakkestore biter for sendebufferen
+class SourceReader:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til SourceReader-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle SourceReader-objektet
+    # source: Et objekt med readinto (f.eks. en fil eller en socket.makefile) eller read, eller en iterator med bytes-lignende biter
+    # Retur: Ingen returverdi for denne funksjonen.
+    # Unntakshåndtering: Kaster TypeError hvis kilden ikke kan leses
+    def __init__(self, source):
+        self.direct = getattr(source, 'readinto', None)
+        if self.direct is not None:
+            self.chunks = None
+        elif hasattr(source, 'read'):
+            self.chunks = iter(lambda: source.read(SOURCE_READ_SIZE), b'')
+        else:
+            self.chunks = iter(source)
+        # Resten av biten som leses fra
+        self.part = memoryview(b'')
+        # Antall byte som er lest
+        self.total = 0
+        # Unntaket kilden kastet, slik at den som kaller kan få det i stedet for bare en mislykket overføring
+        self.error = None
+
+    # Beskrivelse av funksjonen:
+    # Fyller en buffer fra kilden
+    # Argumenter:
+    # self: Referanse til det aktuelle SourceReader-objektet
+    # buffer: Bufferen som skal fylles
+    # Funksjonen gjør:
+    # Leser til bufferen er full eller kilden er tom, slik at pakkene blir fulle selv om kilden gir korte biter
+    # Retur: Returnerer antall byte som ble lest, 0 når kilden er tom
+    # Unntakshåndtering: Unntak fra kilden tas vare på i error og kastes videre. En bit som ikke er bytes, gir TypeError.
+    def readinto(self, buffer):
+        try:
+            return self.fill(memoryview(buffer))
+        except Exception as e:
+            self.error = e
+            raise
+
+    # Beskrivelse av funksjonen:
+    # Fyller et memoryview fra kilden, brukes av readinto
+    # Argumenter:
+    # self: Referanse til det aktuelle SourceReader-objektet
+    # view: Bufferen som skal fylles
+    # Retur: Returnerer antall byte som ble lest
+    def fill(self, view):
+        filled = 0
+        while filled < len(view):
+            if self.direct is not None:
+                count = self.direct(view[filled:])
+                if not count:
+                    break
+                filled += count
+                continue
+            if not self.part:
+                chunk = next(self.chunks, None)
+                if chunk is None:
+                    break
+                self.part = source_view(chunk)
+                if self.part is None:
+                    raise TypeError(f"kilden ga {type(chunk).__name__}, ikke bytes")
+                continue
+            count = min(len(self.part), len(view) - filled)
+            view[filled:filled + count] = self.part[:count]
+            self.part = self.part[count:]
+            filled += count
+        self.total += filled
+        return filled
+
+# Tilstanden til én klient på serveren. Serveren har én socket og sender hver pakke videre til forbindelsen
+# som hører til avsenderadressen. Forbindelsen går gjennom tilstandene SYN_RECEIVED (SYN-ACK er sendt),
+# ESTABLISHED (data tas imot) og CLOSED (FIN er bekreftet eller RST mottatt), og har sin egen fil, sitt eget forventede sekvensnummer
+# og sin egen buffer, slik at mange klienter kan sende samtidig.
+class Connection:
+    SYN_RECEIVED = 'SYN_RECEIVED'
+    ESTABLISHED = 'ESTABLISHED'
+    CLOSED = 'CLOSED'
+
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til Connection-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # server: Serveren forbindelsen hører til. Socketen og innstillingene hentes derfra.
+    # address: Adressen (IP, port) til klienten
+    # Funksjonen gjør:
+    # Initialiserer tilstanden for en ny forbindelse. Filen åpnes først når forbindelsen er etablert.
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, server, address):
+        self.server = server
+        self.sock = server.sock
+        self.events = server.log
+        self.stats = TransferStats()
+        self.stats.begin_phase('handshake')
+        self.address = address
+        self.name = f"{address[0]}:{address[1]}"
+        self.discard = server.discard
+        self.buffer_size = server.buffer_size
+        self.max_payload = server.max_payload
+        self.ack_every = server.ack_every
+        self.ack_delay = server.ack_delay
+        self.state = self.SYN_RECEIVED
+        self.last_activity = time.time()
+        # Modusen og versjonen av pakkehodet blir satt når SYN-pakken er mottatt
+        self.mode = MODE_GBN
+        self.version = 1
+        # Nyttelasten blir satt når ACK-pakken i håndtrykket er mottatt
+        self.payload_size = PACKET_SIZE - HEADER_V1.size
+        # Filen som tas imot, og hvor i filen denne forbindelsen skriver. Med flere strømmer sender hver forbindelse
+        # et eget byteområde som starter på offset, og position er antall byte som er skrevet i rekkefølge så langt.
+        self.transfer = None
+        self.transfer_id = None
+        self.offset = 0
+        # Starten av området forbindelsen ble opprettet for, før det som allerede var lagret ble hoppet over,
+        # og slutten av området hvis klienten har oppgitt den. FIN-pakken regnes bare som fullført overføring når alt er mottatt.
+        self.range_start = 0
+        self.range_end = None
+        self.position = 0
+        # Blokken nyttelast i rekkefølge samles i før den gis til skrivetråden, og hvor i filen og hvor langt den er fylt
+        self.chunk = None
+        self.chunk_position = 0
+        self.chunk_used = 0
+        # Svaret på ACK-pakken i håndtrykket (RESUME eller DELTA), sendes på nytt hvis ACK-pakken kommer igjen
+        self.reply = None
+        # Tolkeren av strømmen ved deltaoverføring (DeltaDecoder) eller komprimering (FrameDecoder), ellers None
+        self.decoder = None
+        # Den forrige versjonen av filen ved deltaoverføring
+        self.basis = None
+        # Om forbindelsen er en økt med flere filer, og antall filer klienten sender og som er mottatt i økten
+        self.session = False
+        self.files_expected = 0
+        self.files_received = 0
+        # Gjenskaper tapte pakker fra paritetspakker (--fec), ellers None
+        self.fec = None
+        # Forventet sekvensnummer og buffer for pakker som kom før tur i sr-modus (sekvensnummer -> data)
+        self.expected_seq = 1
+        self.reorder_buffer = {}
+        self.discard_done = False
+        # Antall pakker i rekkefølge som venter på en samlet ACK, og når den senest må sendes
+        self.pending_acks = 0
+        self.ack_deadline = None
+        # Settes når serveren har annonsert et mottaksvindu på 0, til tidspunktet den skal sjekke om det har åpnet seg
+        self.window_check = None
+        # Sekvensnummeret fra SYN-pakken, og når og hvor mange ganger SYN-ACK-pakken er sendt på nytt
+        self.syn_seq = 0
+        self.syn_ack_timeout = HANDSHAKE_TIMEOUT
+        self.syn_ack_deadline = None
+        self.syn_ack_retries = 0
+        # Datapakker som kom før ACK-pakken i håndtrykket (sekvensnummer -> pakke), og neste sekvensnummer som ikke er mottatt.
+        # None med pakkehode versjon 1, der en datapakke i stedet etablerer forbindelsen med en gang.
+        self.early = None
+        self.early_expected = 1
+        # Settes mens de tidlige pakkene behandles, da sendes ingen ACK-er for dem på nytt
+        self.replaying = False
+        # Variabler for å beregne gjennomstrømningen
+        self.start_time = None
+        self.total_bytes = 0
+        self.total_packets = 0
+
+    # Beskrivelse av funksjonen:
+    # Skriver ut en melding om forbindelsen med tidsstempel og klientens adresse
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # level: Loggnivået til meldingen
+    # message: Meldingen som skal skrives ut
+    # Retur: Ingen returverdi for denne funksjonen
+    def log(self, level, message):
+        self.events.event(level, f"{self.name} -- {message}")
+
+    # Beskrivelse av funksjonen:
+    # Behandler en pakke fra klienten ut fra tilstanden til forbindelsen.
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # packet: Pakken som er mottatt
+    # Funksjonen gjør:
+    # Sender pakken videre til håndtrykket, datamottaket eller (etter FIN) til en ny bekreftelse av FIN
+    # Ødelagte eller avkortede pakker forkastes, klienten sender dem på nytt
+    # Retur: Ingen returverdi for denne funksjonen
+    def handle_packet(self, packet):
+        self.last_activity = time.time()
+        if is_syn_packet(packet):
+            # SYN-ACK gikk trolig tapt, så den sendes på nytt. Etter håndtrykket er SYN-pakken en forsinket kopi og ignoreres.
+            if self.state == self.SYN_RECEIVED:
+                self.send_syn_ack(self.syn_seq)
+            return
+        try:
+            if self.state == self.SYN_RECEIVED:
+                self.receive_ack(packet)
+            elif self.state == self.ESTABLISHED:
+                self.receive_data_packet(packet)
+            else:
+                seq, ack, flags, _ = parse_header(packet, self.version)
+                if flags == FIN:
+                    self.send_fin_ack(seq)
+        except (ValueError, struct.error):
+            self.log(LOG_VERBOSE, "Ugyldig pakke ble forkastet")
+
+    # Beskrivelse av funksjonen:
+    # Behandler en SYN-pakke fra klienten.
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # seq: Sekvensnummeret til SYN-pakken
+    # ack: ack-feltet til SYN-pakken, med høyeste versjon av pakkehodet og ønsket modus
+    # Funksjonen gjør:
+    # Velger versjon og modus for forbindelsen og svarer med en SYN-ACK-pakke
+    # Retur: Ingen returverdi for denne funksjonen
+    def receive_syn_packet(self, seq, ack):
+        self.log(LOG_INFO, "SYN-pakke mottatt")
+        # Klienten sender høyeste versjon av pakkehodet og ønsket modus i ack-feltet.
+        # Serveren velger den høyeste versjonen begge støtter. Ukjente moduser gir Go-Back-N.
+        version, mode = decode_handshake(ack)
+        self.version = min(version, HEADER_VERSION)
+        self.mode = mode if mode in MODES.values() else MODE_GBN
+        # Eldre klienter (versjon 1) forventer en ACK for hver pakke og forstår ikke samlede ACK-er
+        if self.version < 2:
+            self.ack_every = 1
+        else:
+            self.early = {}
+        self.syn_seq = seq
+        #Kjører neste funksjon
+        self.send_syn_ack(seq)
+
+    # Beskrivelse av funksjonen:
+    # Sjekker om en SYN-pakke hører til denne forbindelsen
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # packet: SYN-pakken
+    # Funksjonen gjør:
+    # Klienten sender et tilfeldig startnummer (ISN) i seq-feltet og bruker det samme når SYN-pakken sendes på nytt.
+    # Eldre klienter sender alltid 0, og da kan en kopi bare kjennes igjen mens serveren venter på ACK-pakken, som før.
+    # Retur: Returnerer True hvis pakken er en kopi av SYN-pakken som opprettet forbindelsen, False hvis klienten har startet på nytt
+    def is_duplicate_syn(self, packet):
+        seq = HEADER_V1.unpack_from(packet)[0]
+        if seq == 0:
+            return self.state == self.SYN_RECEIVED
+        return seq == self.syn_seq
+
+    # Beskrivelse av funksjonen:
+    # Sender en SYN-ACK-pakke tilbake til klienten for å etablere forbindelse.
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # seq: Sekvensnummeret til den mottatte SYN-pakken
+    # Funksjonen gjør:
+    # Lager en SYN-ACK-pakke og sender den tilbake til klienten for å etablere en forbindelse (DRTP)
+    # Den valgte versjonen av pakkehodet og den aksepterte modusen sendes i seq-feltet slik at klienten vet hvordan den skal sende
+    # Med versjon 2 sendes også serverens største nyttelast, hvor lenge en samlet ACK kan vente, kodekene den kan dekomprimere,
+    # om den tar imot paritetspakker (bare i sr-modus), om ACK-ene har et mottaksvindu, hvor mange datapakker den holder på
+    # før håndtrykket er ferdig (0-RTT) og om den tar imot flere filer i én økt som forhandlingsvalg.
+    # SYN-ACK-pakken sendes på nytt med eksponentiell backoff til ACK-pakken kommer (se on_timer).
+    # Retur: Ingen returverdi for denne funksjonen
+    def send_syn_ack(self, seq):
+        packet = create_packet(encode_handshake(self.version, self.mode), seq+1, SYN | ACK)
+        if self.version >= 2:
+            packet += encode_options({'max_payload': self.max_payload, 'ack_delay': self.ack_delay if self.ack_every > 1 else 0,
+                                      'codecs': list(AVAILABLE_CODECS), 'fec': self.mode == MODE_SR, 'rwnd': True, 'early': EARLY_DATA_PACKETS, 'session': True})
+        self.sock.sendto(packet, self.address)
+        self.syn_ack_deadline = time.time() + self.syn_ack_timeout
+        self.log(LOG_INFO, f"SYN-ACK-pakke sendt (pakkehode versjon {self.version})")
+
+    # Beskrivelse av funksjonen:
+    # Behandler en pakke som kommer mens serveren venter på ACK-pakken i håndtrykket.
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # packet: Pakken som er mottatt
+    # Funksjonen gjør:
+    # Før ACK-pakken kan klienten sende PROBE-pakker for å finne største nyttelast uten fragmentering. Hver av dem bekreftes med størrelsen på datagrammet.
+    # ACK-pakken har nyttelasten klienten har valgt, og forbindelsen blir etablert
+    # Hvis klienten sender filen over flere strømmer, har ACK-pakken også hvilken overføring strømmen hører til og hvor i filen den starter
+    # Hvis ACK-pakken gikk tapt eller klienten bruker 0-RTT, kommer data før ACK-pakken. Med versjon 2 holdes dataene til
+    # ACK-pakken kommer (serveren sender SYN-ACK på nytt), med versjon 1 blir forbindelsen etablert og pakken behandlet som data.
+    # Det samme gjelder en FIN-pakke: med versjon 2 svarer serveren med SYN-ACK, og klienten sender ACK-pakken og så FIN-pakken på nytt.
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster ValueError hvis nyttelasten i ACK-pakken ikke er et heltall på minst MIN_PAYLOAD
+    def receive_ack(self, packet):
+        seq, ack, flags, length = parse_header(packet, self.version)
+        if flags == PROBE:
+            # Bekrefter at et datagram av denne størrelsen kom frem
+            self.sock.sendto(create_packet(seq, len(packet), PROBE | ACK, self.version), self.address)
+            return
+        if flags == ACK:
+            self.log(LOG_INFO, "ACK-pakke mottatt")
+            if self.version >= 2:
+                hsize = header_size(self.version)
+                options = decode_options(packet[hsize:hsize + length])
+                payload = options.get('payload', DEFAULT_PAYLOAD)
+                # En nyttelast som ikke er et heltall på minst MIN_PAYLOAD, ville gitt deling på null eller et negativt mottaksvindu
+                # i tidtakerne. ACK-pakken forkastes da som ugyldig (se handle_packet), og forbindelsen blir aldri etablert.
+                if type(payload) is not int or payload < MIN_PAYLOAD:
+                    raise ValueError(f"ugyldig nyttelast i ACK-pakken: {payload!r}")
+                self.payload_size = min(payload, self.max_payload)
+                fec = int(options.get('fec', 0))
+                if 2 <= fec <= MAX_FEC_GROUP and self.mode == MODE_SR:
+                    self.fec = FecDecoder(fec, self.payload_size)
+                # Størrelsen på filen, slik at den kan forhåndsallokeres
+                size = int(options['size']) if 'size' in options and int(options['size']) > 0 else None
+                name = os.path.basename(str(options['name'])) if 'name' in options else None
+                codec = options.get('codec') if options.get('codec') in AVAILABLE_CODECS else None
+                if 'session' in options:
+                    self.establish(session=True, files=int(options['session']))
+                    return
+                if 'transfer' in options:
+                    length = int(options['length']) if 'length' in options else None
+                    resume = bool(options.get('resume')) and length is not None
+                    self.establish(str(options['transfer']), int(options.get('offset', 0)), int(options.get('streams', 1)), size, resume, name, codec=codec, length=length)
+                    return
+                self.establish(size=size, name=name, delta=bool(options.get('delta')), codec=codec)
+                return
+            self.establish()
+            return
+        if flags == RST:
+            self.log(LOG_QUIET, "RST-pakke mottatt, klienten avbrøt overføringen")
+            self.close()
+            return
+        if flags == 0 and self.early is not None:
+            self.receive_early(seq, length, packet)
+            return
+        if flags == FIN and self.early is not None:
+            # Med versjon 2 sender klienten FIN-pakken på nytt. Navnet og størrelsen står i ACK-pakken, så serveren ber om den først.
+            self.send_syn_ack(self.syn_seq)
+            return
+        # Med versjon 1 betyr pakken at ACK-pakken gikk tapt, så forbindelsen etableres
+        self.establish()
+        self.receive_data_packet(packet)
+
+    # Beskrivelse av funksjonen:
+    # Tar vare på en datapakke som kom før ACK-pakken i håndtrykket
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # seq: Sekvensnummeret til pakken
+    # length: Lengden på nyttelasten
+    # packet: Pakken
+    # Funksjonen gjør:
+    # Pakken kopieres (mottaksbufferen brukes igjen) og bekreftes med en kumulativ ACK, slik at klienten kan fortsette uten
+    # å vente på at håndtrykket blir ferdig. Ingenting skrives til disk før ACK-pakken har bekreftet klientens adresse.
+    # Pakker utenfor de første EARLY_DATA_PACKETS forkastes, og klienten sender dem på nytt.
+    # Retur: Ingen returverdi for denne funksjonen
+    def receive_early(self, seq, length, packet):
+        if not 1 <= seq <= EARLY_DATA_PACKETS or length > self.max_payload:
+            return
+        if seq not in self.early:
+            self.early[seq] = bytes(packet)
+            self.stats.early_packets += 1
+            if len(self.early) == 1:
+                self.log(LOG_INFO, "Datapakker kom før ACK-pakken i håndtrykket, de holdes til forbindelsen er bekreftet")
+        while self.early_expected in self.early:
+            self.early_expected += 1
+        # Vinduet er plassen som er igjen for tidlige pakker
+        window = EARLY_DATA_PACKETS + 1 - self.early_expected
+        self.stats.acks_sent += 1
+        self.sock.sendto(create_packet(window, self.early_expected, ACK, self.version), self.address)
+
+    # Beskrivelse av funksjonen:
+    # Behandler datapakkene som kom før ACK-pakken i håndtrykket, når forbindelsen er etablert
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # Funksjonen gjør:
+    # Pakkene behandles som om de kom nå, men uten ACK for hver av dem, siden de allerede er bekreftet. Til slutt sendes én ACK.
+    # Retur: Ingen returverdi for denne funksjonen
+    def replay_early(self):
+        early, self.early = self.early, None
+        if not early:
+            return
+        self.replaying = True
+        try:
+            for seq in sorted(early):
+                self.receive_data_packet(early[seq])
+        finally:
+            self.replaying = False
+        self.send_data_ack()
+
+    # Beskrivelse av funksjonen:
+    # Etablerer forbindelsen og åpner filen dataene skal skrives til
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # transfer_id: Overføringen strømmen hører til, eller None hvis filen sendes over én forbindelse
+    # offset: Hvor i filen strømmen starter, i byte
+    # streams: Antall strømmer filen sendes over
+    # size: Størrelsen på hele filen, eller None hvis klienten ikke har oppgitt den
+    # resume: Om klienten vil gjenoppta overføringen (--resume)
+    # name: Navnet filen har hos klienten, eller None
+    # delta: Om klienten vil sende en deltastrøm (--delta)
+    # codec: Kodeken hvis klienten sender komprimerte rammer (--compress), ellers None
+    # session: Om klienten sender flere filer i én økt
+    # files: Antall filer klienten sender i økten
+    # length: Lengden på området strømmen sender, eller None hvis klienten ikke har oppgitt den
+    # Funksjonen gjør:
+    # Slutten av området er offset + length for en strøm, ellers størrelsen på filen.
+    # Ved gjenopptak hopper forbindelsen over det som allerede er lagret fra starten av området, og forteller klienten hvor mye det er.
+    # Ved deltaoverføring åpnes den forrige versjonen av filen, og klienten får vite blokkstørrelsen og antall blokker
+    # (0 hvis serveren ikke har noen forrige versjon, og da sender klienten hele filen).
+    # Retur: Ingen returverdi for denne funksjonen
+    def establish(self, transfer_id=None, offset=0, streams=1, size=None, resume=False, name=None, delta=False, codec=None, session=False, files=0, length=None):
+        if session:
+            # Filene åpnes etter hvert som metadatarammene kommer
+            self.session = True
+            self.files_expected = files
+            self.decoder = SessionDecoder(self)
+            self.state = self.ESTABLISHED
+            self.syn_ack_deadline = None
+            self.start_time = time.time()
+            self.stats.begin_phase('data')
+            self.log(LOG_INFO, f"Forbindelsen er etablert, nyttelast per pakke: {self.payload_size} byte, økt med flere filer som lagres i {self.server.output_dir}")
+            self.replay_early()
+            return
+        if resume:
+            # En forbindelse fra en klient som døde, kan fortsatt holde området
+            self.server.supersede(self, transfer_id, offset)
+        self.transfer = self.server.open_transfer(transfer_id, streams, size, resume, name, self.address)
+        self.transfer_id = transfer_id
+        self.range_start = offset
+        self.range_end = offset + length if length is not None else size if transfer_id is None else None
+        if resume:
+            skip = self.transfer.stored_from(offset, length)
+            offset += skip
+            self.send_reply(RESUME | ACK, {'skip': skip})
+            self.log(LOG_INFO, f"Overføringen gjenopptas, {skip} byte var allerede lagret")
+        if delta:
+            basis = self.server.open_basis(name)
+            if basis is not None:
+                self.transfer.basis = basis
+                self.basis = basis
+                self.decoder = DeltaDecoder(self, basis)
+                self.log(LOG_INFO, f"Deltaoverføring fra {basis.filename} med {basis.blocks} blokker på {basis.block} byte")
+            self.send_reply(DELTA | ACK, {'block': basis.block, 'blocks': basis.blocks, 'size': basis.size} if basis else {'blocks': 0})
+        if codec is not None:
+            self.transfer.codec = codec
+            self.decoder = FrameDecoder(self)
+            self.log(LOG_INFO, f"Filen sendes komprimert med {codec}")
+        self.offset = offset
+        self.state = self.ESTABLISHED
+        self.syn_ack_deadline = None
+        self.start_time = time.time()
+        self.stats.begin_phase('data')
+        self.log(LOG_INFO, f"Forbindelsen er etablert, nyttelast per pakke: {self.payload_size} byte, lagres i {self.transfer.filename}" + (f" fra byte {offset} (strøm av {streams})" if transfer_id is not None else ""))
+        self.replay_early()
+
+    # Beskrivelse av funksjonen:
+    # Svarer på ACK-pakken i håndtrykket, f.eks. med hvor mange byte av området som allerede er lagret
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # flags: Flaggene til svaret (RESUME | ACK eller DELTA | ACK)
+    # options: Ordbok med det klienten skal vite, kodes som JSON
+    # Funksjonen gjør:
+    # Svaret tas vare på og sendes på nytt hvis ACK-pakken kommer igjen
+    # Retur: Ingen returverdi for denne funksjonen
+    def send_reply(self, flags, options):
+        payload = encode_options(options)
+        self.reply = create_packet(0, 0, flags, self.version, len(payload)) + payload
+        self.sock.sendto(self.reply, self.address)
+
+    # Beskrivelse av funksjonen:
+    # Sender sjekksummene til en rekke blokker i den forrige versjonen av filen
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # seq: Nummeret på forespørselen, fra 1. Forespørsel n gjelder så mange blokker som får plass i én pakke, fra blokk (n - 1) ganger det.
+    # Retur: Ingen returverdi for denne funksjonen
+    def send_signatures(self, seq):
+        count = self.payload_size // SIGNATURE_ENTRY.size
+        entries = self.basis.signatures((seq - 1) * count, count) if seq >= 1 else b''
+        self.sock.sendto(create_packet(seq, 0, DELTA | ACK, self.version, len(entries)) + entries, self.address)
+
+    # Beskrivelse av funksjonen:
+    # Leverer nyttelasten til neste pakke i rekkefølge
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # payload: Nyttelasten som skal skrives
+    # Funksjonen gjør:
+    # Skriver nyttelasten til filen, eller gir den til tolkeren av deltastrømmen ved deltaoverføring, og teller den i statistikken
+    # Retur: Ingen returverdi for denne funksjonen
+    def deliver(self, payload):
+        length = len(payload)
+        if self.decoder is not None:
+            self.decoder.feed(payload)
+        else:
+            self.store(payload)
+        if self.transfer is not None:
+            self.transfer.total_bytes += length
+        self.stats.bytes_delivered += length
+        self.total_bytes += length
+        self.total_packets += 1
+
+    # Beskrivelse av funksjonen:
+    # Gir blokken som fylles til skrivetråden
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # Retur: Ingen returverdi for denne funksjonen
+    def flush(self):
+        if self.chunk is not None:
+            self.server.writer.write(self.transfer, self.chunk_position, self.chunk, self.chunk_used)
+            self.chunk = None
+
+    # Beskrivelse av funksjonen:
+    # Mottar en datapakke fra klienten, skriver dataene til filen og sender ACK-pakker tilbake til klienten.
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # packet: Pakken som er mottatt
+    # Funksjonen gjør:
+    # ACK-ene er kumulative: ack-feltet er neste sekvensnummer serveren venter på, så én ACK bekrefter alt foran.
+    # Pakker i rekkefølge kan bekreftes samlet (hver ack_every pakke eller etter ack_delay sekunder). Duplikater, pakker i feil rekkefølge
+    # og pakker som fyller et hull bekreftes med en gang, slik at klienten kan oppdage tap med dupliserte ACK-er (fast retransmit).
+    # I sr-modus blir pakker i feil rekkefølge lagt i en begrenset buffer og skrevet til filen så snart hullet foran dem er fylt.
+    # De bekreftes i tillegg selektivt (SACK), slik at klienten bare trenger å sende de pakkene som faktisk mangler.
+    # Denne funksjonen bruker også et "discard"-nummer for testformål. Hvis en pakke med dette sekvensnummeret mottas, vil den bli forkastet.
+    # En FIN-pakke bekreftes, og forbindelsen avsluttes.
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster ValueError eller struct.error hvis pakken er ødelagt
+    def receive_data_packet(self, packet):
+        seq, ack, flags, length = parse_header(packet, self.version)
+
+        if flags == FIN:
+            self.log(LOG_INFO, "FIN-pakke mottatt")
+            #Kjører neste funksjon
+            self.send_fin_ack(seq)
+            self.finish()
+            return
+        if flags == RST:
+            self.log(LOG_QUIET, "RST-pakke mottatt, klienten avbrøt overføringen")
+            self.close()
+            return
+        if flags == ACK:
+            # ACK-pakken fra håndtrykket er sendt på nytt fordi svaret på den gikk tapt
+            if self.reply is not None:
+                self.sock.sendto(self.reply, self.address)
+            return
+        if flags == DELTA:
+            if self.basis is not None:
+                self.send_signatures(seq)
+            return
+        if flags == PROBE:
+            # Klienten har fått et mottaksvindu på 0 og spør om det har åpnet seg
+            self.send_data_ack()
+            return
+
+        # Sekvensnummeret i pakken kan ha gått rundt, så det gjøres om til et fullt nummer nær det forventede
+        seq = unwrap_seq(seq, self.expected_seq, self.version)
+        hsize = header_size(self.version)
+        payload = packet[hsize:hsize + length]
+        stats = self.stats
+        if flags == FEC:
+            stats.parity_received += 1
+            recovered = self.fec.recover(seq, ack, payload, self.expected_seq) if self.fec is not None else None
+            if recovered is None:
+                return
+            # Den gjenskapte pakken behandles som om den var mottatt
+            seq, payload = recovered
+            stats.packets_recovered += 1
+            self.log(LOG_VERBOSE, f"Pakke {seq} ble gjenskapt fra paritetspakken")
+        else:
+            stats.packets_received += 1
+            stats.bytes_received += length
+        stats.sample_window(time.time(), len(self.reorder_buffer), self.buffer_size)
+
+        # Hvis sekvensnummeret er lik self.discard og vi ikke allerede har forkastet en pakke
+        if seq == self.discard and not self.discard_done:
+            # Informer om at pakken er forkastet
+            self.log(LOG_VERBOSE, f"Pakke {seq} ble forkastet")
+            self.events.trace(TRACE_DROP, seq, len(self.reorder_buffer))
+            stats.dropped += 1
+            self.discard_done = True  # Oppdater flagget for å indikere at vi har forkastet en pakke
+            return
+
+        # Skrivetråden ligger for langt etter, så nye data forkastes uten ACK til disken har tatt igjen (klienten sender dem på nytt)
+        if seq >= self.expected_seq and self.server.writer.overloaded():
+            self.log(LOG_VERBOSE, f"Pakke {seq} ble forkastet fordi skrivingen til disk ligger etter")
+            self.events.trace(TRACE_DROP, seq, len(self.reorder_buffer))
+            stats.dropped += 1
+            return
+
+        # Om ACK-en skal sendes med en gang, og eventuelt hvilket sekvensnummer som skal bekreftes selektivt
+        immediate = False
+        sack = None
+
+        if seq < self.expected_seq or seq in self.reorder_buffer:
+            # Duplikat, ACK-en gikk trolig tapt, så den sendes på nytt
+            self.log(LOG_VERBOSE, f"Duplikat av pakke {seq} er mottatt")
+            self.events.trace(TRACE_DUPLICATE, seq, len(self.reorder_buffer))
+            stats.duplicates += 1
+            immediate = True
+            if seq in self.reorder_buffer:
+                sack = seq
+
+        # Hvis sekvensnummeret er det vi forventer
+        elif seq == self.expected_seq:
+            if self.events.level >= LOG_DEBUG:
+                self.log(LOG_DEBUG, f"Pakke {seq} er mottatt")
+            self.events.trace(TRACE_RECEIVE, seq, len(self.reorder_buffer))
+            if self.fec is not None:
+                self.fec.add(seq, payload)
+            self.deliver(payload)
+            self.expected_seq += 1
+            self.pending_acks += 1
+            # I sr-modus skrives alle pakker som nå ligger i riktig rekkefølge til filen
+            if self.expected_seq in self.reorder_buffer:
+                immediate = True
+                while self.expected_seq in self.reorder_buffer:
+                    self.deliver(self.reorder_buffer.pop(self.expected_seq))
+                    self.expected_seq += 1
+
+        # Selective Repeat: pakken bufres hvis den er innenfor bufferen, og bekreftes selektivt
+        elif self.mode == MODE_SR and seq < self.expected_seq + self.buffer_size:
+            self.log(LOG_VERBOSE, f"Uordnet pakke {seq} er mottatt og lagt i buffer")
+            self.events.trace(TRACE_BUFFER, seq, len(self.reorder_buffer) + 1)
+            stats.out_of_order += 1
+            # Pakken ligger i serverens mottaksbuffer, som brukes igjen for neste pakke, så nyttelasten må kopieres
+            self.reorder_buffer[seq] = bytes(payload)
+            if self.fec is not None:
+                self.fec.add(seq, payload)
+            immediate = True
+            sack = seq
+
+        # Hvis pakken har et høyere sekvensnummer enn forventet (eller er utenfor bufferen i sr-modus)
+        else:
+            self.log(LOG_VERBOSE, f"Uordnet pakke {seq} er mottatt og forkastet")
+            self.events.trace(TRACE_DROP, seq, len(self.reorder_buffer))
+            stats.out_of_order += 1
+            stats.dropped += 1
+            # En duplisert ACK sendes med en gang slik at klienten kan oppdage tapet
+            immediate = True
+
+        if immediate or self.pending_acks >= self.ack_every:
+            self.send_data_ack(sack)
+        elif self.ack_deadline is None:
+            self.ack_deadline = time.time() + self.ack_delay
+
+    # Beskrivelse av funksjonen:
+    # Sender en kumulativ ACK-pakke for data til klienten
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # sack: Sekvensnummer som er mottatt etter et hull og skal bekreftes selektivt, eller None
+    # Funksjonen gjør:
+    # Bekrefter alle pakker foran forventet sekvensnummer og nullstiller ventende samlede ACK-er
+    # ACK-en pakkes inn i serverens ACK-buffer, så det lages ingen nye bytes-objekter per ACK
+    # Retur: Ingen returverdi for denne funksjonen
+    def send_data_ack(self, sack=None):
+        if self.replaying:
+            return
+        if self.events.level >= LOG_DEBUG:
+            self.log(LOG_DEBUG, f"Sender ack for alt før {self.expected_seq}" + (f" og for {sack}" if sack is not None else ""))
+        self.events.trace(TRACE_ACK, self.expected_seq, len(self.reorder_buffer))
+        self.stats.acks_sent += 1
+        # Med versjon 2 har sekvensnummerfeltet i ACK-en mottaksvinduet
+        window = self.receive_window() if self.version >= 2 else 0
+        if window == 0 and self.version >= 2:
+            if self.window_check is None:
+                self.log(LOG_VERBOSE, "Mottaksvinduet er fullt, annonserer et vindu på 0")
+            self.window_check = time.time() + WINDOW_CHECK_INTERVAL
+        else:
+            self.window_check = None
+        buffer = self.server.ack_buffer
+        size = pack_header_into(buffer, window, self.expected_seq, ACK, self.version, SACK_ENTRY.size if sack is not None else 0)
+        if sack is not None:
+            SACK_ENTRY.pack_into(buffer, size, sack & 0xFFFFFFFF)
+            size += SACK_ENTRY.size
+        self.sock.sendto(buffer[:size], self.address)
+        self.pending_acks = 0
+        self.ack_deadline = None
+
+    # Beskrivelse av funksjonen:
+    # Regner ut mottaksvinduet serveren annonserer til klienten
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # Funksjonen gjør:
+    # Vinduet er det minste av plassen i skrivekøen og i socketens mottaksbuffer, begge delt likt mellom forbindelsene,
+    # og i sr-modus plassen i bufferen for pakker i feil rekkefølge (den dekker pakkene etter det forventede sekvensnummeret)
+    # Retur: Returnerer vinduet i antall pakker
+    def receive_window(self):
+        server = self.server
+        connections = max(1, len(server.connections))
+        queued = max(0, MAX_WRITE_BACKLOG - server.writer.backlog) // connections // self.payload_size
+        buffered = server.receive_capacity // connections // datagram_cost(header_size(self.version) + self.payload_size)
+        window = min(queued, buffered)
+        if self.mode == MODE_SR:
+            window = min(window, self.buffer_size)
+        return min(window, 0xFFFFFFFF)
+
+    # Beskrivelse av funksjonen:
+    # Sender en FIN-ACK-pakke tilbake til klienten for å avslutte forbindelsen.
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # seq: Sekvensnummeret til den mottatte FIN-pakken
+    # Retur: Ingen returverdi for denne funksjonen
+    def send_fin_ack(self, seq):
+        self.sock.sendto(create_packet(0, (seq + 1) & ((1 << SEQ_BITS[self.version]) - 1), ACK, self.version), self.address)
+        self.log(LOG_INFO, "FIN ACK-pakke sendt")
+
+    # Beskrivelse av funksjonen:
+    # Avslutter overføringen når klienten har sendt FIN-pakken
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # Funksjonen gjør:
+    # Lukker filen, beregner og skriver ut gjennomstrømningen og setter forbindelsen i tilstanden CLOSED
+    # Overføringen regnes bare som fullført hvis hele området er mottatt (se received_all). Ellers lagres sjekkpunktet
+    # som ved et avbrudd, og filen blir ikke siste versjon av navnet sitt.
+    # Retur: Ingen returverdi for denne funksjonen
+    def finish(self):
+        if self.start_time is not None:
+            elapsed = max(time.time() - self.start_time, 1e-9)
+            throughput = self.total_bytes / elapsed * 8 / 1e6
+            self.events.write(LOG_QUIET, f"{self.name}: Gjennomstrømningen er {throughput:.2f} Mbps ({self.total_packets / elapsed:.0f} pakker/s med {self.payload_size} byte nyttelast)")
+        if self.session:
+            self.events.write(LOG_QUIET, f"{self.name}: {self.files_received} filer mottatt i økten")
+        complete = self.received_all()
+        if not complete:
+            self.log(LOG_QUIET, "FIN-pakken kom før alt klienten oppga var mottatt")
+        self.close(complete=complete)
+        self.log(LOG_INFO, "Forbindelsen er avsluttet")
+
+    # Beskrivelse av funksjonen:
+    # Sjekker om hele området til forbindelsen er mottatt
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # Funksjonen gjør:
+    # Ingen pakker kan vente i bufferen for pakker i feil rekkefølge. I en økt må alle filene være mottatt og ingen være halvveis,
+    # ellers må strømmen (etter dekomprimering eller deltatolking) ha nådd slutten av området. Uten oppgitt slutt stoles det på FIN-pakken.
+    # Retur: Returnerer True hvis alt er mottatt, ellers False
+    def received_all(self):
+        if self.reorder_buffer:
+            return False
+        if self.session:
+            return self.decoder.idle() and self.transfer is None and self.files_received >= self.files_expected
+        return self.range_end is None or self.offset + self.position >= self.range_end
+
+    # Beskrivelse av funksjonen:
+    # Gir fra seg filen og setter forbindelsen i tilstanden CLOSED
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # complete: Om hele området til forbindelsen er mottatt
+    # Retur: Ingen returverdi for denne funksjonen
+    def close(self, complete=False):
+        self.stats.end_phase()
+        self.flush()
+        # Referansen fjernes før filen gis fra seg, slik at et avbrudd (Ctrl+C eller SIGTERM) midt i release ikke gir den fra seg to ganger
+        transfer, self.transfer = self.transfer, None
+        if transfer is not None:
+            self.server.release_transfer(self.transfer_id, transfer, complete)
+        self.state = self.CLOSED
+
+    # Beskrivelse av funksjonen:
+    # Skriver byte til filen der strømmen har kommet til
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # data: Byte som skal skrives
+    # Funksjonen gjør:
+    # Kopierer dataene inn i blokken som fylles, og gir blokken til skrivetråden når den er full.
+    # Posisjonen strømmen har kommet til i filen flyttes frem.
+    # Retur: Ingen returverdi for denne funksjonen
+    def store(self, data):
+        length = len(data)
+        if self.chunk is not None and self.chunk_used + length > len(self.chunk):
+            self.flush()
+        if self.chunk is None:
+            self.chunk = self.server.writer.buffer()
+            self.chunk_position = self.offset + self.position
+            self.chunk_used = 0
+        self.chunk[self.chunk_used:self.chunk_used + length] = data
+        self.chunk_used += length
+        self.position += length
+
+    # Beskrivelse av funksjonen:
+    # Åpner neste fil i en økt
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # name: Navnet filen hadde hos klienten, relativt til mappen som ble sendt
+    # size: Størrelsen på filen i byte
+    # Funksjonen gjør:
+    # Filen lagres under navnet sitt i output_dir. Kan den ikke lagres der, lagres den under et nytt navn som andre filer.
+    # Retur: Ingen returverdi for denne funksjonen
+    def begin_file(self, name, size):
+        self.end_file()
+        try:
+            self.transfer = self.server.open_session_file(name, size, self.address)
+        except (ValueError, OSError) as e:
+            self.transfer = self.server.open_transfer(None, 1, size, name=name, address=self.address)
+            self.log(LOG_QUIET, f"Kan ikke lagre {name} under navnet sitt ({e}), lagres som {self.transfer.filename}")
+        self.offset = 0
+        self.position = 0
+        self.log(LOG_VERBOSE, f"Tar imot {name} ({size} byte)")
+
+    # Beskrivelse av funksjonen:
+    # Lukker filen som er mottatt i en økt
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # Funksjonen gjør:
+    # Data som venter i blokken gis til skrivetråden først, og skrivetråden lukker filen etter dem
+    # Retur: Ingen returverdi for denne funksjonen
+    def end_file(self):
+        if self.transfer is None:
+            return
+        self.flush()
+        transfer, self.transfer = self.transfer, None
+        self.server.release_transfer(None, transfer, True)
+        self.files_received += 1
+
+    # Beskrivelse av funksjonen:
+    # Kopierer et område fra den forrige versjonen av filen dit strømmen har kommet til
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # source: Posisjonen i den forrige versjonen
+    # length: Antall byte som skal kopieres
+    # Funksjonen gjør:
+    # Blokken som fylles, gis til skrivetråden først, slik at skrivingene kommer i rekkefølge
+    # Retur: Ingen returverdi for denne funksjonen
+    def copy(self, source, length):
+        self.flush()
+        self.server.writer.copy(self.transfer, self.offset + self.position, source, length)
+        self.position += length
+
+    # Beskrivelse av funksjonen:
+    # Gir en komprimert blokk til skrivetråden, som dekomprimerer den og skriver den dit strømmen har kommet til
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # data: Den komprimerte blokken
+    # length: Lengden blokken skal ha
+    # Retur: Ingen returverdi for denne funksjonen
+    def decompress(self, data, length):
+        self.flush()
+        self.server.writer.decompress(self.transfer, self.offset + self.position, data, length)
+        self.position += length
+
+    # Beskrivelse av funksjonen:
+    # Slipper filen uten å regne strømmen som ferdig, brukes når en ny forbindelse gjenopptar samme område
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # Funksjonen gjør:
+    # Data som venter i blokken skrives først. Den nye forbindelsen tar over plassen strømmen hadde i overføringen.
+    # Retur: Ingen returverdi for denne funksjonen
+    def detach(self):
+        self.stats.end_phase()
+        self.flush()
+        self.transfer = None
+        self.state = self.CLOSED
+        self.log(LOG_INFO, "Forbindelsen er erstattet av en ny forbindelse som gjenopptar overføringen")
+
+    # Beskrivelse av funksjonen:
+    # Gir tidspunktet forbindelsen neste gang trenger å bli vekket, enten for en samlet ACK eller for å bli tidsavbrutt
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # Retur: Returnerer tidspunktet (som time.time())
+    def next_deadline(self):
+        deadline = self.last_activity + (TIME_WAIT if self.state == self.CLOSED else CONNECTION_TIMEOUT)
+        if self.ack_deadline is not None:
+            deadline = min(deadline, self.ack_deadline)
+        if self.window_check is not None:
+            deadline = min(deadline, self.window_check)
+        if self.syn_ack_deadline is not None and self.state == self.SYN_RECEIVED:
+            deadline = min(deadline, self.syn_ack_deadline)
+        return deadline
+
+    # Beskrivelse av funksjonen:
+    # Håndterer tidsfristene til forbindelsen
+    # Argumenter:
+    # self: Referanse til det aktuelle Connection-objektet
+    # now: Tiden nå
+    # Funksjonen gjør:
+    # Sender en samlet ACK hvis tiden for den har gått ut, eller en vindusoppdatering hvis et lukket mottaksvindu har åpnet seg,
+    # og lukker forbindelsen hvis klienten har vært stille for lenge. Venter serveren fortsatt på ACK-pakken i håndtrykket,
+    # sendes SYN-ACK-pakken på nytt med dobbel ventetid hver gang, opptil HANDSHAKE_RETRIES ganger.
+    # Retur: Returnerer False hvis forbindelsen skal fjernes fra serveren, ellers True
+    def on_timer(self, now):
+        if self.state == self.SYN_RECEIVED and self.syn_ack_deadline is not None and now >= self.syn_ack_deadline:
+            if self.syn_ack_retries < HANDSHAKE_RETRIES:
+                self.syn_ack_retries += 1
+                self.syn_ack_timeout *= 2
+                self.stats.handshake_retransmits += 1
+                self.log(LOG_VERBOSE, f"Ingen ACK-pakke i håndtrykket, sender SYN-ACK-pakken på nytt ({self.syn_ack_retries}. gang)")
+                self.send_syn_ack(self.syn_seq)
+            else:
+                self.syn_ack_deadline = None
+        if self.ack_deadline is not None and now >= self.ack_deadline:
+            # Tiden for en samlet ACK har gått ut
+            self.send_data_ack()
+        elif self.window_check is not None and now >= self.window_check and self.state == self.ESTABLISHED:
+            if self.receive_window() > 0:
+                # Vinduet har åpnet seg, så klienten får vite det uten å måtte spørre
+                self.log(LOG_VERBOSE, "Mottaksvinduet har åpnet seg igjen, sender vindusoppdatering")
+                self.stats.window_updates += 1
+                self.send_data_ack()
+            else:
+                self.window_check = now + WINDOW_CHECK_INTERVAL
+        if self.state == self.CLOSED:
+            return now < self.last_activity + TIME_WAIT
+        if now >= self.last_activity + CONNECTION_TIMEOUT:
+            self.log(LOG_INFO, "Ingen pakker fra klienten på lenge, forbindelsen blir lukket")
+            self.close()
+            return False
+        return True
+
+# Beskrivelse av funksjonen:
+# Signalhåndterer som stopper serveren
+# Argumenter:
+# signum: Signalet som ble mottatt
+# frame: Stakkrammen som ble avbrutt
+# Retur: Returnerer ikke, kaster KeyboardInterrupt slik at hendelsesløkken avsluttes som ved Ctrl+C
+def stop_on_signal(signum, frame):
+    raise KeyboardInterrupt
+
+# Server klasse med all server kode
+class Server:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til Server-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # ip: IP-adressen til serveren
+    # port: Portnummeret til serveren
+    # file: Filen som skal overføres. Denne parameteren er ikke relevant i servermodus, siden det er server som skal ta imot pakkene og lage en fil ut av det.
+    # Hvis filen (-f) er satt, vil programmet avsluttes med en feilmelding.
+    # window_size: Størrelsen på skyvevinduet. I servermodus, er denne parameteren fastsatt til 3, og hvis en annen verdi er valgt, vil programmet avsluttes med en feilmelding.
+    # discard: Sekvensnummeret/pakken som skal forkastes for testformål (én gang for hver forbindelse).
+    # mode: Modusen klienten har valgt. Modusen forhandles i SYN-pakken, så den kan kun velges av klienten.
+    # buffer_size: Hvor mange pakker i feil rekkefølge serveren kan holde på i sr-modus.
+    # max_payload: Største nyttelast per pakke serveren tillater. Klienten velger en nyttelast innenfor denne grensen i håndtrykket.
+    # ack_every: Antall pakker i rekkefølge som bekreftes med én samlet ACK (1 betyr en ACK per pakke)
+    # ack_delay: Hvor lenge en samlet ACK kan vente i sekunder før den sendes uansett
+    # output_dir: Mappen mottatte filer lagres i (standard: mappen programmet ligger i)
+    # max_connections: Hvor mange klienter serveren tar imot samtidig
+    # log_level: Hvor mye som skrives ut (LOG_QUIET, LOG_INFO, LOG_VERBOSE eller LOG_DEBUG)
+    # trace: Filen sporingsposter skrives til, eller None
+    # stats: Filen statistikk for alle forbindelser lagres i som JSON når serveren stoppes, eller None
+    # metrics: Filen målinger skrives til i Prometheus sitt tekstformat hvert sekund, eller None
+    # profile: Filen cProfile-resultatet for hendelsesløkken lagres i, eller None
+    # trace_memory: Om minnebruken i hendelsesløkken skal måles med tracemalloc
+    # socket_buffer: Størrelsen på SO_SNDBUF og SO_RCVBUF i byte, eller None for operativsystemets standard
+    # handler: Funksjon som får de mottatte dataene i stedet for at de lagres i filer, eller None. Den kalles som
+    # handler(stream, data) fra skrivetråden for hver blokk i rekkefølge, og med data=None når overføringen er ferdig (se StreamTransfer).
+    # Funksjonen gjør:
+    # Validerer inngangsparameterne, initialiserer variabler for klassen og oppretter en socket for serveren.
+    # Brukes for å sette opp serveren med de gitte parameterne
+    # Retur: Ingen returverdi for denne funksjonen.
+    # Unntakshåndtering: Kaster ValueError hvis parameterne ikke kan brukes, eller OSError hvis socketen ikke kan opprettes
+    def __init__(self, ip, port, file, window_size, discard, mode='gbn', buffer_size=64, max_payload=MAX_PAYLOAD, ack_every=1, ack_delay=0.04, output_dir=None, max_connections=256, log_level=LOG_INFO, trace=None, stats=None, metrics=None, profile=None, trace_memory=False, socket_buffer=None, handler=None):
+        # Validerer inngangsparameterne
+        if file:
+            raise ValueError("-s valget kan ikke ta -f argument.")
+        if window_size != 3:
+            raise ValueError("Kun klient (-c) kan endre vindusstørrelsen")
+        if mode != 'gbn':
+            raise ValueError("Kun klient (-c) kan velge modus")
+
+        # Initialiserer variablene for klassen
+        self.ip = ip
+        self.port = port
+        self.discard = int(discard) if discard is not None else None
+        self.buffer_size = buffer_size
+        self.max_payload = max_payload
+        self.ack_every = ack_every
+        self.ack_delay = ack_delay
+        self.output_dir = output_dir if output_dir is not None else os.path.dirname(os.path.abspath(__file__))
+        self.max_connections = max_connections
+        self.log = EventLog(log_level, trace)
+        self.stats_path = stats
+        self.metrics_path = metrics
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.socket_buffer = socket_buffer
+        self.handler = handler
+        # Settes av stop() for å avslutte hendelsesløkken fra en annen tråd
+        self.stopping = False
+        # Summen av statistikken for avsluttede forbindelser, og statistikken for de siste av dem
+        self.totals = TransferStats()
+        self.closed_stats = collections.deque(maxlen=1000)
+        self.accepted = 0
+        self.next_metrics = 0.0
+        # Forbindelsene serveren har nå, med klientens adresse som nøkkel
+        self.connections = {}
+        # Filer som tas imot over flere strømmer, med overførings-ID-en fra klienten som nøkkel
+        self.transfers = {}
+        # Antall filer som er tatt imot, gir hver mottatt fil et eget nummer
+        self.transfer_count = 0
+        # Skrivetråden som skriver mottatte data til disk, og filene den har lukket som ikke er registrert ennå
+        self.closed_files = queue.Queue()
+        self.writer = DiskWriter(self.log, self.file_closed)
+        # Avbrutte overføringer som kan gjenopptas, med overførings-ID-en som nøkkel
+        self.checkpoints = self.load_checkpoints()
+        # Siste fullstendige fil mottatt under hvert navn hos klienten, brukes som forrige versjon ved deltaoverføring.
+        # Dataene som gis til en handler lagres ikke, så da finnes det ingen forrige versjon.
+        self.received = self.load_received() if handler is None else {}
+        # Mottaksbufferen må ha plass til den største pakken noen forbindelse kan sende. Den allokeres én gang, og hver pakke
+        # leses rett inn i den (recvfrom_into). Pakkene gis videre som memoryview-utsnitt, så nyttelasten i rekkefølge skrives
+        # til filen uten å kopieres. Løkken behandler hver pakke ferdig før neste leses, så én buffer er nok.
+        self.bufsize = header_size(HEADER_VERSION) + self.max_payload
+        self.receive_buffer = bytearray(self.bufsize)
+        self.receive_view = memoryview(self.receive_buffer)
+        # Buffer for ACK-pakker: pakkehodet og én SACK-oppføring
+        self.ack_buffer = memoryview(bytearray(header_size(HEADER_VERSION) + SACK_ENTRY.size))
+        #Kjører neste funksjon
+        self.sock = self.create_socket()
+        # Hvor mange byte socketens mottaksbuffer rommer, brukes for mottaksvinduet
+        self.receive_capacity = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        # Socketpar som vekker hendelsesløkken når stop() kalles eller skrivetråden har lukket en fil
+        self.wakeup_receiver, self.wakeup_sender = socket.socketpair()
+
+    # Beskrivelse av funksjonen:
+    # Denne metoden oppretter en UDP-socket for serveren.
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # Funksjonen gjør:
+    # Oppretter en UDP-socket og binder den til den gitte IP-adressen og porten
+    # Brukes for å opprette en socket for serveren til å kommunisere med klienten
+    # Retur: Dersom alt går bra returneres socketen som ble opprettet
+    # Unntakshåndtering: Kaster OSError med en feilmelding hvis socketen ikke kan bindes
+    def create_socket(self):
+        # Oppretter en UDP-socket
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Standardbufferen i mottaksretningen rommer bare noen hundre pakker, som ikke er nok for raske klienter
+        if self.socket_buffer:
+            set_socket_buffers(sock, self.socket_buffer, self.log)
+        try:
+            # Binder socketen til den gitte IP-adressen og porten
+            sock.bind((self.ip, self.port))
+        except Exception as e:
+            # Håndterer feil ved opprettelse av server socket
+            sock.close()
+            raise OSError(f"Feil ved opprettelse av server socket: {e}") from e
+        return sock
+
+    # Beskrivelse av funksjonen:
+    # Starter serveren og tar imot filer fra klienter til den blir stoppet (Ctrl+C, SIGTERM eller stop()).
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # Funksjonen gjør:
+    # Kjører en hendelsesløkke med selectors på én ikke-blokkerende socket. Løkken venter til socketen har pakker
+    # eller til neste tidsfrist for en forbindelse (samlet ACK eller tidsavbrudd), og behandler så pakkene og tidsfristene.
+    # Retur: Ingen returverdi for denne funksjonen
+    def start(self):
+        self.log.write(LOG_INFO, f'\nServeren kjører med IP-adresse = {self.ip} og portadresse = {self.port}\n')
+        # SIGTERM (f.eks. fra kill eller en tjenestebehandler) stopper serveren på samme måte som Ctrl+C,
+        # slik at forbindelser lukkes og statistikken lagres
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, stop_on_signal)
+        selector = selectors.DefaultSelector()
+        self.sock.setblocking(False)
+        selector.register(self.sock, selectors.EVENT_READ)
+        self.wakeup_receiver.setblocking(False)
+        selector.register(self.wakeup_receiver, selectors.EVENT_READ)
+        try:
+            with profiling(self.log, self.profile, self.trace_memory):
+                while not self.stopping:
+                    for key, _ in selector.select(self.next_timeout()):
+                        if key.fileobj is self.sock:
+                            self.receive_packets()
+                        else:
+                            self.wakeup_receiver.recv(64)
+                    self.record_received()
+                    self.run_timers()
+                    if self.metrics_path and time.time() >= self.next_metrics:
+                        self.write_metrics()
+        except KeyboardInterrupt:
+            self.log.write(LOG_INFO, "\nServeren stoppes")
+        finally:
+            selector.close()
+            for address in list(self.connections):
+                self.remove_connection(address)
+            self.sock.close()
+            self.wakeup_receiver.close()
+            self.wakeup_sender.close()
+            # Venter til skrivetråden har skrevet og lukket alle filene
+            self.writer.close()
+            self.record_received()
+            if self.metrics_path:
+                self.write_metrics()
+            if self.stats_path:
+                write_json(self.stats_path, {'total': self.totals.to_dict(), 'connections': list(self.closed_stats)})
+            self.log.close()
+
+    # Beskrivelse av funksjonen:
+    # Stopper serveren, kan kalles fra en annen tråd enn den som kjører start()
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # Funksjonen gjør:
+    # Vekker hendelsesløkken, som så lukker forbindelsene og venter på skrivetråden på samme måte som ved Ctrl+C
+    # Retur: Ingen returverdi for denne funksjonen
+    def stop(self):
+        self.stopping = True
+        try:
+            self.wakeup_sender.send(b'\0')
+        except OSError:
+            # Serveren er allerede stoppet og socketparet lukket
+            pass
+
+    # Beskrivelse av funksjonen:
+    # Regner ut hvor lenge hendelsesløkken kan vente på pakker
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # Retur: Returnerer antall sekunder til neste tidsfrist, eller None hvis det ikke er noen forbindelser eller målinger å skrive
+    def next_timeout(self):
+        deadlines = [connection.next_deadline() for connection in self.connections.values()]
+        if self.metrics_path:
+            deadlines.append(self.next_metrics)
+        if not deadlines:
+            return None
+        return max(min(deadlines) - time.time(), 0)
+
+    # Beskrivelse av funksjonen:
+    # Leser alle pakker som ligger klare på socketen og sender dem videre til riktig forbindelse
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # Funksjonen gjør:
+    # Med en handler gis dataene videre når socketen er tømt, ikke først når blokken til forbindelsen er full,
+    # slik at mottakeren får dataene omtrent når de kommer
+    # Retur: Ingen returverdi for denne funksjonen
+    def receive_packets(self):
+        while True:
+            try:
+                size, address = self.sock.recvfrom_into(self.receive_buffer)
+            except BlockingIOError:
+                if self.handler is not None:
+                    for connection in self.connections.values():
+                        connection.flush()
+                return
+            except OSError as e:
+                self.log.write(LOG_QUIET, f"Feil ved mottakelse av pakke: {e}")
+                return
+            self.dispatch(self.receive_view[:size], address)
+
+    # Beskrivelse av funksjonen:
+    # Sender en pakke videre til forbindelsen for avsenderadressen
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # packet: Pakken som er mottatt
+    # address: Adressen til avsenderen
+    # Funksjonen gjør:
+    # En SYN-pakke fra en ny adresse (eller fra en adresse der forbindelsen er avsluttet) oppretter en ny forbindelse.
+    # Kommer en SYN-pakke med ny ISN midt i en overføring, har klienten startet på nytt, og den gamle forbindelsen lukkes.
+    # En SYN-pakke med samme ISN er sendt på nytt eller forsinket i nettet, og gis til forbindelsen (se handle_packet),
+    # slik at en gammel kopi aldri avbryter en overføring som pågår. Andre pakker fra ukjente adresser forkastes.
+    # Retur: Ingen returverdi for denne funksjonen
+    def dispatch(self, packet, address):
+        connection = self.connections.get(address)
+        try:
+            if is_syn_packet(packet) and (connection is None or not connection.is_duplicate_syn(packet)):
+                if connection is not None:
+                    self.remove_connection(address)
+                self.accept(packet, address)
+            elif connection is not None:
+                connection.handle_packet(packet)
+        except Exception as e:
+            self.log.write(LOG_QUIET, f"Feil ved behandling av pakke fra {address[0]}:{address[1]}: {e}")
+
+    # Beskrivelse av funksjonen:
+    # Oppretter en ny forbindelse for en SYN-pakke
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # packet: SYN-pakken
+    # address: Adressen til klienten
+    # Funksjonen gjør:
+    # Avviser klienten hvis serveren allerede har max_connections åpne forbindelser. Klienten får da ikke noe svar.
+    # Retur: Ingen returverdi for denne funksjonen
+    def accept(self, packet, address):
+        active = sum(1 for connection in self.connections.values() if connection.state != Connection.CLOSED)
+        if active >= self.max_connections:
+            self.log.write(LOG_INFO, f"For mange forbindelser ({active}), SYN-pakke fra {address[0]}:{address[1]} ble avvist")
+            return
+        seq, ack, flags, _ = parse_header(packet)
+        connection = Connection(self, address)
+        self.accepted += 1
+        self.connections[address] = connection
+        connection.receive_syn_packet(seq, ack)
+
+    # Beskrivelse av funksjonen:
+    # Gir filen en ny forbindelse skal skrive til
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # transfer_id: Overføringen forbindelsen hører til, eller None hvis filen sendes over én forbindelse
+    # streams: Antall strømmer filen sendes over
+    # size: Størrelsen på filen, eller None
+    # resume: Om klienten vil gjenoppta overføringen
+    # name: Navnet filen har hos klienten, eller None
+    # address: Adressen til klienten
+    # Funksjonen gjør:
+    # Strømmer med samme overførings-ID skriver til samme fil. Finnes et sjekkpunkt for ID-en og samme størrelse, åpnes den
+    # avbrutte filen igjen. Ellers opprettes en ny fil, Photo_received_<n> med filendelsen fra klienten (.jpg hvis den ikke er kjent),
+    # i output_dir (numre som er reservert, hoppes over). Har serveren en handler, gis dataene til den i stedet (StreamTransfer).
+    # Filen forhåndsallokeres av skrivetråden hvis størrelsen er kjent.
+    # Retur: Returnerer Transfer-objektet for filen
+    def open_transfer(self, transfer_id, streams, size=None, resume=False, name=None, address=None):
+        if transfer_id is not None and transfer_id in self.transfers:
+            return self.transfers[transfer_id]
+        checkpoint = self.checkpoints.pop(transfer_id, None) if resume else None
+        if self.handler is not None:
+            transfer = StreamTransfer(self.handler, address, streams, size, name)
+        elif checkpoint is not None and checkpoint['size'] == size and os.path.exists(checkpoint['filename']):
+            transfer = Transfer(checkpoint['filename'], streams, size, transfer_id, checkpoint['ranges'])
+        else:
+            extension = os.path.splitext(name)[1] if name else ''
+            extension = extension if extension[1:].isalnum() else '.jpg'
+            self.transfer_count += 1
+            while self.reserved(os.path.join(self.output_dir, f'Photo_received_{self.transfer_count}{extension}')):
+                self.transfer_count += 1
+            transfer = Transfer(os.path.join(self.output_dir, f'Photo_received_{self.transfer_count}{extension}'), streams, size, transfer_id if resume else None)
+        transfer.name = name
+        self.writer.allocate(transfer)
+        if transfer_id is not None:
+            self.transfers[transfer_id] = transfer
+        return transfer
+
+    # Beskrivelse av funksjonen:
+    # Oppretter en fil som tas imot i en økt, under navnet den hadde hos klienten
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # name: Navnet filen hadde hos klienten, relativt til mappen som ble sendt ('/' mellom mapper)
+    # size: Størrelsen klienten har oppgitt
+    # address: Adressen til klienten
+    # Funksjonen gjør:
+    # Lager undermappene som trengs. Navn som er absolutte eller går ut av output_dir (..), avvises.
+    # Finnes filen fra før, blir den erstattet. Har serveren en handler, gis filen til den under navnet fra klienten.
+    # Retur: Returnerer et Transfer-objekt for filen
+    # Unntakshåndtering: Kaster ValueError hvis navnet ikke kan brukes, eller OSError hvis filen ikke kan opprettes
+    def open_session_file(self, name, size, address=None):
+        if self.handler is not None:
+            return StreamTransfer(self.handler, address, 1, size, name)
+        parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.')]
+        if not parts or '..' in parts or os.path.isabs(name) or os.path.splitdrive(name)[0]:
+            raise ValueError("ugyldig filnavn")
+        filename = os.path.join(self.output_dir, *parts)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        transfer = Transfer(filename, 1, size)
+        self.writer.allocate(transfer)
+        return transfer
+
+    # Beskrivelse av funksjonen:
+    # Registrerer at en forbindelse er ferdig med filen sin
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # transfer_id: Overføringen forbindelsen hørte til, eller None
+    # transfer: Transfer-objektet for filen
+    # complete: Om hele området til forbindelsen er mottatt
+    # Funksjonen gjør:
+    # Når alle strømmene er ferdige, lukkes filen av skrivetråden, og for filer sendt over flere strømmer skrives samlet gjennomstrømning ut.
+    # En fullstendig fil blir siste versjon av navnet sitt først når skrivetråden har lukket den (se record_received).
+    # Retur: Ingen returverdi for denne funksjonen
+    def release_transfer(self, transfer_id, transfer, complete):
+        if not transfer.release(complete):
+            return
+        self.writer.close_file(transfer)
+        self.transfers.pop(transfer_id, None)
+        if transfer.resume_id is not None and not transfer.complete:
+            # Kan gjenopptas uten at serveren startes på nytt. Områdene kan mangle det skrivetråden ikke har skrevet ennå,
+            # og da sendes litt mer enn nødvendig på nytt.
+            self.checkpoints[transfer.resume_id] = {'filename': transfer.filename, 'size': transfer.size, 'ranges': transfer.ranges}
+        if not transfer.complete:
+            self.log.write(LOG_QUIET, f"Filen {transfer.filename} ble ikke fullstendig mottatt")
+        elif transfer.streams > 1:
+            elapsed = max(time.time() - transfer.start_time, 1e-9)
+            self.log.write(LOG_QUIET, f"Filen {transfer.filename} er mottatt over {transfer.streams} strømmer: {transfer.total_bytes / elapsed * 8 / 1e6:.2f} Mbps")
+
+    # Beskrivelse av funksjonen:
+    # Tar imot en fil skrivetråden har lukket. Kalles fra skrivetråden.
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # transfer: Transfer-objektet for filen
+    # Funksjonen gjør:
+    # Legger filen i køen og vekker hendelsesløkken, som registrerer den (se record_received)
+    # Retur: Ingen returverdi for denne funksjonen
+    def file_closed(self, transfer):
+        self.closed_files.put(transfer)
+        try:
+            self.wakeup_sender.send(b'\0')
+        except OSError:
+            # Serveren stoppes, og filene registreres etter at skrivetråden er ferdig
+            pass
+
+    # Beskrivelse av funksjonen:
+    # Registrerer filene skrivetråden har lukket som siste versjon av navnet sitt
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # Funksjonen gjør:
+    # Bare filer som ble mottatt fullstendig og skrevet uten feil, kommer i oversikten (RECEIVED_INDEX). En avbrutt eller avkortet fil
+    # ville ellers blitt den forrige versjonen ved neste deltaoverføring, og den forrige fullstendige filen ville falt ut av oversikten.
+    # Retur: Ingen returverdi for denne funksjonen
+    def record_received(self):
+        changed = False
+        while not self.closed_files.empty():
+            transfer = self.closed_files.get()
+            if transfer.complete and transfer.name is not None and self.handler is None:
+                self.received[transfer.name] = os.path.basename(transfer.filename)
+                changed = True
+        if changed:
+            write_json(os.path.join(self.output_dir, RECEIVED_INDEX), self.received)
+
+    # Beskrivelse av funksjonen:
+    # Erstatter gamle forbindelser som holder samme område av en overføring som gjenopptas
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # connection: Den nye forbindelsen
+    # transfer_id: Overførings-ID-en
+    # offset: Starten av området
+    # Funksjonen gjør:
+    # Klienten til den gamle forbindelsen har gitt opp, så den gamle forbindelsen slipper filen uten å telle som ferdig
+    # Retur: Ingen returverdi for denne funksjonen
+    def supersede(self, connection, transfer_id, offset):
+        for other in self.connections.values():
+            if other is not connection and other.transfer is not None and other.transfer_id == transfer_id and other.range_start == offset:
+                other.detach()
+
+    # Beskrivelse av funksjonen:
+    # Sjekker om et filnavn ikke kan brukes til en ny fil
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # filename: Filnavnet
+    # Retur: Returnerer True hvis filen har et sjekkpunkt eller er siste versjon av en fil (brukes ved deltaoverføring)
+    def reserved(self, filename):
+        return os.path.exists(filename + CHECKPOINT_SUFFIX) or os.path.basename(filename) in self.received.values()
+
+    # Beskrivelse av funksjonen:
+    # Åpner den forrige versjonen av en fil for deltaoverføring
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # name: Navnet filen har hos klienten
+    # Retur: Returnerer et Basis-objekt, eller None hvis serveren ikke har noen forrige versjon (eller den er tom)
+    def open_basis(self, name):
+        if name not in self.received:
+            return None
+        filename = os.path.join(self.output_dir, self.received[name])
+        try:
+            basis = Basis(filename)
+        except OSError as e:
+            self.log.write(LOG_QUIET, f"Kan ikke åpne forrige versjon {filename}: {e}")
+            return None
+        if not basis.blocks:
+            basis.close()
+            return None
+        return basis
+
+    # Beskrivelse av funksjonen:
+    # Leser hvilken fil som sist ble mottatt under hvert navn
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # Retur: Returnerer en ordbok fra navnet hos klienten til navnet på filen i output_dir, tom hvis indeksen ikke finnes
+    def load_received(self):
+        try:
+            with open(os.path.join(self.output_dir, RECEIVED_INDEX)) as f:
+                received = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {str(name): str(filename) for name, filename in received.items()} if isinstance(received, dict) else {}
+
+    # Beskrivelse av funksjonen:
+    # Leser sjekkpunktene til avbrutte overføringer i output_dir
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # Funksjonen gjør:
+    # Sjekkpunkter som ikke kan leses, eller der filen er borte, hoppes over
+    # Retur: Returnerer en ordbok fra overførings-ID til filnavn, størrelse og lagrede områder
+    def load_checkpoints(self):
+        checkpoints = {}
+        for name in os.listdir(self.output_dir):
+            if not name.endswith(CHECKPOINT_SUFFIX):
+                continue
+            path = os.path.join(self.output_dir, name)
+            filename = path[:-len(CHECKPOINT_SUFFIX)]
+            try:
+                with open(path) as f:
+                    checkpoint = json.load(f)
+                checkpoints[str(checkpoint['transfer'])] = {'filename': filename, 'size': checkpoint['size'],
+                                                            'ranges': merge_ranges(checkpoint['ranges'])}
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if not os.path.exists(filename):
+                del checkpoints[str(checkpoint['transfer'])]
+        if checkpoints:
+            self.log.write(LOG_INFO, f"{len(checkpoints)} avbrutte overføringer kan gjenopptas")
+        return checkpoints
+
+    # Beskrivelse av funksjonen:
+    # Håndterer tidsfristene til alle forbindelsene og fjerner forbindelser som er ferdige eller tidsavbrutt
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # Funksjonen gjør:
+    # Feiler en forbindelse, logges feilen og bare den forbindelsen fjernes, som når en pakke ikke kan behandles (se dispatch).
+    # Hendelsesløkken og de andre overføringene fortsetter.
+    # Retur: Ingen returverdi for denne funksjonen
+    def run_timers(self):
+        now = time.time()
+        for address, connection in list(self.connections.items()):
+            try:
+                if not connection.on_timer(now):
+                    self.remove_connection(address)
+            except Exception as e:
+                self.log.write(LOG_QUIET, f"Feil i forbindelsen fra {address[0]}:{address[1]}, den blir fjernet: {e}")
+                if self.connections.get(address) is connection:
+                    self.remove_connection(address)
+
+    # Beskrivelse av funksjonen:
+    # Fjerner en forbindelse fra serveren
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # address: Adressen til klienten
+    # Funksjonen gjør:
+    # Lukker forbindelsen og legger statistikken dens til totalene
+    # Retur: Ingen returverdi for denne funksjonen
+    def remove_connection(self, address):
+        connection = self.connections.pop(address)
+        connection.close()
+        self.totals.add(connection.stats)
+        self.closed_stats.append(dict(connection.stats.to_dict(), client=connection.name))
+
+    # Beskrivelse av funksjonen:
+    # Skriver målinger for serveren til metrics-filen i Prometheus sitt tekstformat
+    # Argumenter:
+    # self: Referanse til det aktuelle Server-objektet
+    # Funksjonen gjør:
+    # Summerer statistikken for avsluttede og åpne forbindelser og skriver den sammen med antall forbindelser
+    # Retur: Ingen returverdi for denne funksjonen
+    def write_metrics(self):
+        totals = TransferStats()
+        totals.add(self.totals)
+        for connection in self.connections.values():
+            totals.add(connection.stats)
+        active = sum(1 for connection in self.connections.values() if connection.state != Connection.CLOSED)
+        lines = ["# TYPE drtp_active_connections gauge", f"drtp_active_connections {active}",
+                 "# TYPE drtp_connections_total counter", f"drtp_connections_total {self.accepted}",
+                 "# TYPE drtp_write_backlog_bytes gauge", f"drtp_write_backlog_bytes {self.writer.backlog}"]
+        write_text(self.metrics_path, "\n".join(lines + totals.prometheus()) + "\n")
+        self.next_metrics = time.time() + 1.0
+
+# Klientklasse med all kode for klient
+class Client:
+
+    # Beskrivelse av funksjonen:
+    # Initialiserer en ny klientinstans
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # ip: IP-adressen til serveren
+    # port: Portnummeret til serveren
+    # file: Filbanen til filen som skal sendes, eller en liste med filer og mapper som sendes etter hverandre i én økt
+    # window_size: Øvre grense for størrelsen på skyvevinduet
+    # discard: Parameter for å forkaste pakker (ikke brukt i kontrollinjeargumentene for klient)
+    # mode: Modusen klienten ber om ('gbn' eller 'sr'). Serveren kan svare med en annen modus.
+    # rto_min: Nedre grense for retransmisjonstimeouten i sekunder
+    # rto_max: Øvre grense for retransmisjonstimeouten i sekunder
+    # cc: Navnet på algoritmen for metningskontroll (se CONGESTION_CONTROLLERS)
+    # payload_size: Ønsket nyttelast per pakke i byte. Den faktiske nyttelasten forhandles med serveren.
+    # pmtud: Om største nyttelast uten fragmentering skal finnes med path-MTU-søk
+    # streams: Antall parallelle forbindelser (strømmer) filen deles over
+    # offset: Hvor i filen denne klienten starter, i byte (brukes for hver strøm)
+    # length: Antall byte denne klienten sender fra offset, eller None for resten av filen
+    # transfer_id: Overføringen strømmen hører til. Settes når klienten er én av flere strømmer.
+    # log_level: Hvor mye som skrives ut (LOG_QUIET, LOG_INFO, LOG_VERBOSE eller LOG_DEBUG)
+    # trace: Filen sporingsposter skrives til, eller None. Med flere strømmer får hver strøm sin egen fil (.1, .2, ...).
+    # stats: Filen statistikken lagres i som JSON når klienten er ferdig, eller None (egen fil per strøm som for trace)
+    # profile: Filen cProfile-resultatet for sendeløkken lagres i, eller None (egen fil per strøm som for trace)
+    # trace_memory: Om minnebruken i sendeløkken skal måles med tracemalloc
+    # prefetch: Om filen skal leses inn i minnet i en egen tråd foran sendingen
+    # resume: Om en avbrutt overføring av samme fil skal gjenopptas
+    # delta: Om bare endringene siden forrige versjon av filen på serveren skal sendes
+    # compress: Kodeken filen skal komprimeres med, eller None
+    # fec: Antall datapakker per paritetspakke, eller 0 uten feilretting
+    # rate: Fast senderate i Mbit/s for pacing, eller None. Med flere strømmer får hver strøm en like stor del.
+    # pace: Om pakkene skal spres utover med en rate regnet ut fra metningsvinduet og SRTT (når rate ikke er gitt)
+    # socket_buffer: Størrelsen på SO_SNDBUF og SO_RCVBUF i byte, eller None for operativsystemets standard
+    # zero_rtt: Om det første vinduet med data skal sendes rett etter SYN-pakken (0-RTT)
+    # source: Data som sendes i stedet for en fil, eller None. Et objekt med bufferprotokollen (bytes, bytearray, memoryview, mmap ...)
+    # sendes med kjent lengde, og et objekt med readinto eller read, eller en iterator med bytes, leses til det er tomt (se SourceReader).
+    # name: Navnet serveren får for dataene fra source, eller None
+    # sock: En UDP-socket som brukes i stedet for å lage en ny. Den lukkes ikke av klienten, så den kan brukes til flere overføringer.
+    # Funksjonen gjør:
+    # Validerer inputargumentene og initialiserer klientobjektet
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster ValueError hvis argumentene ikke henger sammen
+    def __init__(self, ip, port, file, window_size, discard, mode='gbn', rto_min=0.01, rto_max=10.0, cc='reno', payload_size=DEFAULT_PAYLOAD, pmtud=False, streams=1, offset=0, length=None, transfer_id=None, log_level=LOG_INFO, trace=None, stats=None, profile=None, trace_memory=False, prefetch=False, resume=False, delta=False, compress=None, fec=0, rate=None, pace=False, socket_buffer=None, zero_rtt=False, source=None, name=None, sock=None):
+        # Sjekker om filbanen er gitt
+        if not file and source is None:
+            raise ValueError("Feil: Filbane er nødvendig i klientmodus.")
+        # Sjekker om discard-argumentet er gitt
+        if discard:
+            raise ValueError("Feil: -c valget kan ikke ta -d argumentet.")
+        # Sjekker at grensene for RTO henger sammen
+        if rto_min > rto_max:
+            raise ValueError("Feil: --rto-min kan ikke være større enn --rto-max.")
+        # Setter objektvariablene
+        self.ip = ip
+        self.port = port
+        self.file = file
+        self.window_size = window_size
+        self.mode = MODES[mode]
+        # Versjonen av pakkehodet blir forhandlet i SYN/SYN-ACK, frem til da brukes versjon 1
+        self.version = 1
+        # Nyttelasten blir forhandlet i håndtrykket, frem til da er dette ønsket nyttelast
+        self.payload_size = payload_size
+        self.pmtud = pmtud
+        # Flere filer eller en mappe sendes som en økt over én forbindelse
+        if source is None and (isinstance(file, (list, tuple)) or os.path.isdir(file)):
+            self.files = session_files(file if isinstance(file, (list, tuple)) else [file])
+        else:
+            self.files = None
+        # Data fra source sendes uten fil. En buffer har kjent lengde, ellers er lengden kjent først når kilden er tom.
+        self.source = source_view(source) if source is not None else None
+        if source is not None and self.source is None:
+            self.source = SourceReader(source)
+        self.name = name
+        single = self.files is not None or self.source is not None
+        conflicts = single and (streams > 1 or resume or delta or compress or zero_rtt or (prefetch and self.source is not None))
+        if single:
+            streams, resume, delta, compress, zero_rtt = 1, False, False, None, False
+        if self.source is not None:
+            prefetch = False
+        self.streams = streams
+        self.offset = offset
+        if self.files is not None:
+            self.length = sum(len(encode_meta(name, size)) + size for _, name, size in self.files)
+        elif self.source is not None:
+            self.length = len(self.source) if isinstance(self.source, memoryview) else None
+        else:
+            self.length = length if length is not None else os.path.getsize(file) - offset
+        self.transfer_id = transfer_id
+        # Argumentene brukes for å lage en klient for hver strøm når filen sendes over flere strømmer
+        self.arguments = dict(ip=ip, port=port, file=file, window_size=window_size, discard=None, mode=mode, rto_min=rto_min, rto_max=rto_max, cc=cc, payload_size=payload_size, pmtud=pmtud, log_level=log_level, trace_memory=trace_memory, prefetch=prefetch, resume=resume, delta=delta, compress=compress, fec=fec, rate=rate, pace=pace, socket_buffer=socket_buffer, zero_rtt=zero_rtt)
+        self.trace = trace
+        self.stats_path = stats
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.prefetch = prefetch
+        self.resume = resume
+        # Antall byte serveren allerede hadde lagret og som ikke ble sendt på nytt
+        self.skipped = 0
+        self.delta = delta
+        # Blokkstørrelse, størrelse og sjekksummer for den forrige versjonen av filen på serveren ved deltaoverføring, ellers None
+        self.delta_basis = None
+        # Antall byte i deltastrømmen som ble sendt i stedet for filen
+        self.delta_bytes = None
+        self.compress = compress
+        # Kodekene serveren kan dekomprimere, fra SYN-ACK-pakken
+        self.server_codecs = []
+        self.fec = fec
+        # Om serveren tar imot paritetspakker, fra SYN-ACK-pakken
+        self.server_fec = False
+        # Om serverens ACK-er har et mottaksvindu, fra SYN-ACK-pakken
+        self.server_rwnd = False
+        # Om serveren tar imot flere filer i én økt, fra SYN-ACK-pakken
+        self.server_session = False
+        self.rate = rate
+        self.pace = pace
+        # Tokenbøtta som sprer pakkene utover, settes i transfer_file hvis pacing er valgt
+        self.pacer = None
+        self.zero_rtt = zero_rtt
+        # Sendetiden til datapakkene som ble sendt rett etter SYN-pakken (0-RTT), pakke 1, 2, ...
+        self.early_times = []
+        # ACK-pakken fra håndtrykket, sendes på nytt hvis SYN-ACK-pakken kommer igjen
+        self.handshake_packet = None
+        # Tilfeldig startnummer (ISN) i SYN-pakken. Serveren kjenner igjen en SYN som er sendt på nytt eller forsinket på det,
+        # og svaret må ha ISN + 1 i ack-feltet. 0 brukes av eldre klienter, og ISN + 1 må få plass i 16 bits.
+        self.isn = random.randrange(1, 0xFFFF)
+        if resume and streams == 1 and transfer_id is None:
+            # En enkelt forbindelse som kan gjenopptas, trenger en ID som er lik fra gang til gang
+            self.transfer_id = transfer_key(file)
+        self.stats = TransferStats()
+        # Settes når serveren har bekreftet alle dataene
+        self.completed = False
+        # Største nyttelast serveren tillater, mottas i SYN-ACK
+        self.server_max_payload = None
+        self.rtt = RttEstimator(rto_min, rto_max)
+        # Metningskontrollen bestemmer hvor mye av vinduet som kan brukes, -w er øvre grense
+        self.cc = CONGESTION_CONTROLLERS[cc](window_size)
+        self.log = EventLog(log_level, trace if streams == 1 or transfer_id is not None else None)
+        # En socket fra den som kaller, tilhører den som kaller og lukkes ikke her
+        self.owns_socket = sock is None
+        self.sock = sock if sock is not None else socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if socket_buffer:
+            set_socket_buffers(self.sock, socket_buffer, self.log)
+        self.sock.settimeout(0.5)
+        if conflicts:
+            kind = "En økt med flere filer" if self.files is not None else "Sending fra en buffer eller strøm"
+            self.log.write(LOG_QUIET, f"{kind} kan ikke kombineres med --streams, --resume, --delta, --compress, --zero-rtt eller --prefetch, sender uten dem")
+
+    # Beskrivelse av funksjonen:
+    # Starter tilkoblingsprosessen til serveren
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # Funksjonen gjør:
+    # Prøver å koble til serveren og sender en SYN-pakke til serveren for å initiere forbindelsen
+    # Med flere strømmer sendes filen i stedet over flere forbindelser samtidig (se connect_striped)
+    # Retur: Returnerer True hvis hele filen ble bekreftet av serveren, ellers False
+    def connect(self):
+        try:
+            if self.streams > 1 and self.transfer_id is None:
+                return self.connect_striped()
+            # Prøver å koble til serveren
+            try:
+                self.sock.connect((self.ip, self.port))
+                self.stats.begin_phase('handshake')
+                self.log.write(LOG_INFO, "\nFase for etablering av forbindelse:\n")
+                # Sender en SYN-pakke til serveren for å initiere forbindelse
+                self.send_syn_packet()
+            except ConnectionRefusedError:
+                self.log.write(LOG_QUIET, f"Feil: Tilkobling nektet. Serveren er ikke tilgjengelig på {self.ip}:{self.port}")
+                self.close_socket()
+            except Exception as e:
+                self.log.write(LOG_QUIET, f"Feil ved oppretting av klient socket: {e}")
+                self.close_socket()
+            return self.completed
+        finally:
+            self.stats.end_phase()
+            if self.stats_path and not (self.streams > 1 and self.transfer_id is None):
+                write_json(self.stats_path, dict(self.stats.to_dict(), completed=self.completed, offset=self.offset, length=self.length, skipped=self.skipped,
+                                                 delta=self.delta_bytes))
+            # Venter til alle loggmeldinger er skrevet ut
+            self.log.close()
+
+    # Beskrivelse av funksjonen:
+    # Lukker socketen hvis klienten opprettet den selv
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # Funksjonen gjør:
+    # En socket som ble gitt til konstruktøren, lukkes ikke, slik at den kan brukes til neste overføring
+    # Retur: Ingen returverdi for denne funksjonen
+    def close_socket(self):
+        if self.owns_socket:
+            self.sock.close()
+
+    # Beskrivelse av funksjonen:
+    # Sender filen over flere parallelle forbindelser (strømmer)
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # Funksjonen gjør:
+    # Deler filen i like store byteområder og sender hvert område med en egen klient i en egen prosess, slik at flere
+    # kjerner (og flere nettverksstier) kan brukes samtidig. Hver strøm har sin egen socket og sitt eget sekvensnummerrom.
+    # Alle strømmene har samme tilfeldige overførings-ID, slik at serveren skriver områdene til samme fil.
+    # Retur: Returnerer True hvis alle strømmene ble fullført, ellers False
+    def connect_striped(self):
+        size = os.path.getsize(self.file)
+        chunk = max(-(-size // self.streams), 1)
+        ranges = [(offset, min(chunk, size - offset)) for offset in range(0, size, chunk)] or [(0, 0)]
+        # Med --resume må ID-en være lik fra gang til gang, slik at serveren finner sjekkpunktet
+        transfer_id = transfer_key(self.file) if self.resume else os.urandom(8).hex()
+        self.log.write(LOG_INFO, f"\nSender {size} byte over {len(ranges)} parallelle strømmer\n")
+        self.close_socket()
+        start_time = time.time()
+        with concurrent.futures.ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            # Raten gjelder hele overføringen, så den deles mellom strømmene
+            rate = self.rate / len(ranges) if self.rate else None
+            futures = [pool.submit(run_stream, dict(self.arguments, streams=len(ranges), offset=offset, length=length, transfer_id=transfer_id, rate=rate,
+                                                    trace=f"{self.trace}.{number}" if self.trace else None,
+                                                    stats=f"{self.stats_path}.{number}" if self.stats_path else None,
+                                                    profile=f"{self.profile}.{number}" if self.profile else None))
+                       for number, (offset, length) in enumerate(ranges, start=1)]
+            results = [future.result() for future in futures]
+        elapsed = time.time() - start_time
+        self.log.write(LOG_QUIET, f"\n{sum(results)} av {len(ranges)} strømmer fullført: {size * 8 / elapsed / 1e6:.2f} Mbps samlet")
+        self.completed = all(results)
+        return self.completed
+
+    # Beskrivelse av funksjonen:
+    # Sender en SYN-pakke til serveren
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # Funksjonen gjør:
+    # Sender en SYN-pakke til serveren og venter på en SYN-ACK-pakke fra serveren
+    # Høyeste støttede versjon av pakkehodet og ønsket modus sendes i ack-feltet til SYN-pakken, og ISN i seq-feltet
+    # Med --zero-rtt sendes det første vinduet med data rett etter SYN-pakken
+    # Retur: Ingen returverdi for denne funksjonen
+    def send_syn_packet(self):
+        self.sock.sendto(create_packet(self.isn, encode_handshake(HEADER_VERSION, self.mode), SYN), (self.ip, self.port))
+        # Tiden SYN-pakken ble sendt, brukes som første RTT-måling
+        self.syn_time = time.time()
+        self.log.write(LOG_INFO, "SYN-pakke er sendt")
+        if self.zero_rtt:
+            if self.resume or self.delta or self.compress or self.fec or self.pmtud:
+                self.log.write(LOG_QUIET, "0-RTT kan ikke kombineres med --resume, --delta, --compress, --fec eller --pmtud, venter på SYN-ACK")
+            else:
+                self.send_early_data()
+        # Mottar en SYN-ACK-pakke fra serveren
+        self.receive_syn_ack()
+
+    # Beskrivelse av funksjonen:
+    # Sjekker om en pakke er SYN-ACK-pakken til denne forbindelsen
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # data: Pakken som er mottatt
+    # Funksjonen gjør:
+    # Serveren svarer med ISN + 1 i ack-feltet. En forsinket SYN-ACK til en tidligere forbindelse på samme socket
+    # (f.eks. med drtp.Sender) har et annet nummer og blir ikke tatt for svaret.
+    # Retur: Returnerer True hvis pakken er SYN-ACK-pakken til denne forbindelsen, ellers False
+    def is_own_syn_ack(self, data):
+        return is_syn_ack_packet(data) and HEADER_V1.unpack_from(data)[1] == self.isn + 1
+
+    # Beskrivelse av funksjonen:
+    # Sender det første vinduet med data før SYN-ACK-pakken har kommet (0-RTT)
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # Funksjonen gjør:
+    # Klienten kjenner ikke serverens grenser ennå, så pakkene sendes med pakkehode versjon 2 og ønsket nyttelast.
+    # Så mange pakker som startvinduet til metningskontrollen tillater sendes, høyst EARLY_DATA_PACKETS.
+    # Godtar ikke serveren dem, sendes de på nytt som vanlig etter håndtrykket.
+    # Retur: Ingen returverdi for denne funksjonen
+    def send_early_data(self):
+        count = min(self.cc.window, EARLY_DATA_PACKETS, -(-self.length // self.payload_size))
+        with open(self.file, 'rb') as f:
+            for seq in range(1, count + 1):
+                payload = os.pread(f.fileno(), min(self.payload_size, self.length - (seq - 1) * self.payload_size), self.offset + (seq - 1) * self.payload_size)
+                self.sock.sendto(create_packet(seq, 0, 0, 2, len(payload)) + payload, (self.ip, self.port))
+                self.early_times.append(time.time())
+        self.stats.early_packets = count
+        self.log.write(LOG_INFO, f"Sendte {count} datapakker rett etter SYN-pakken (0-RTT)")
+
+    # Beskrivelse av funksjonen:
+    # Mottar en SYN-ACK-pakke fra serveren
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # Funksjonen gjør:
+    # Venter på en SYN-ACK-pakke fra serveren og sender en ACK-pakke tilbake når den mottas
+    # Versjonen av pakkehodet og modusen serveren aksepterte leses fra seq-feltet.
+    # Hvis serveren ikke støtter sr, brukes Go-Back-N, og hvis den bare støtter versjon 1, brukes versjon 1 av pakkehodet.
+    # Kommer ikke SYN-ACK-pakken, sendes SYN-pakken på nytt med dobbel ventetid hver gang, opptil HANDSHAKE_RETRIES ganger.
+    # Andre pakker (f.eks. ACK-er for 0-RTT-data) og SYN-ACK-pakker til en tidligere forbindelse, som kommer før SYN-ACK-pakken, ignoreres.
+    # Retur: Ingen returverdi for denne funksjonen
+    def receive_syn_ack(self):
+        # Prøver å motta en SYN-ACK-pakke fra serveren
+        try:
+            timeout = HANDSHAKE_TIMEOUT
+            deadline = time.time() + timeout
+            retries = 0
+            while True:
+                try:
+                    self.sock.settimeout(max(deadline - time.time(), 0.001))
+                    data, server = self.sock.recvfrom(PACKET_SIZE)
+                except socket.timeout:
+                    if retries == HANDSHAKE_RETRIES:
+                        raise
+                    retries += 1
+                    timeout *= 2
+                    deadline = time.time() + timeout
+                    self.stats.handshake_retransmits += 1
+                    self.log.write(LOG_INFO, f"Ingen SYN-ACK-pakke, sender SYN-pakken på nytt ({retries}. gang)")
+                    # Samme ISN, så serveren ser at det er samme forbindelse
+                    self.sock.sendto(create_packet(self.isn, encode_handshake(HEADER_VERSION, self.mode), SYN), (self.ip, self.port))
+                    continue
+                if self.is_own_syn_ack(data):
+                    break
+            self.sock.settimeout(HANDSHAKE_TIMEOUT)
+            seq, ack, flags, _ = parse_header(data)
+            if flags == (SYN | ACK):
+                self.log.write(LOG_INFO, "SYN-ACK pakke er mottatt")
+                rtt = time.time() - self.syn_time
+                version, mode = decode_handshake(seq)
+                self.version = min(version, HEADER_VERSION)
+                if self.version >= 2:
+                    options = decode_options(data[HEADER_V1.size:])
+                    self.server_max_payload = int(options.get('max_payload', DEFAULT_PAYLOAD))
+                    # Serveren kan vente med ACK-er, og da må RTO være lengre enn ventetiden
+                    self.rtt.max_ack_delay = float(options.get('ack_delay', 0))
+                    self.server_codecs = options.get('codecs', [])
+                    self.server_fec = bool(options.get('fec'))
+                    self.server_rwnd = bool(options.get('rwnd'))
+                    self.server_session = bool(options.get('session'))
+                # Er SYN-pakken sendt på nytt, vet ikke klienten hvilken SYN svaret gjelder (Karns regel)
+                if not retries:
+                    self.rtt.sample(rtt)
+                if mode != self.mode:
+                    self.log.write(LOG_INFO, "Serveren støtter ikke valgt modus, bruker Go-Back-N")
+                    self.mode = MODE_GBN
+                if self.early_times and (self.version < 2 or not options.get('early') or self.payload_size > self.server_max_payload):
+                    # Serveren tok ikke imot 0-RTT-dataene, så de sendes på nytt som vanlige datapakker
+                    self.log.write(LOG_INFO, "Serveren tar ikke imot data før håndtrykket er ferdig, sender dem på nytt")
+                    self.early_times = []
+                self.log.write(LOG_INFO, f"Bruker pakkehode versjon {self.version}")
+                # Sender en ACK-pakke til serveren
+                self.send_ack_packet()
+
+        except socket.timeout:
+            self.log.write(LOG_QUIET, "Timeout oppstod, mislykket tilkoblingsforsøk")
+            self.close_socket()
+        except Exception as e:
+            self.log.write(LOG_QUIET, f"Feil ved mottak av SYN-ACK pakke fra serveren: {e}")
+            self.close_socket()
+
+    # Beskrivelse av funksjonen:
+    # Sender en ACK-pakke til serveren
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # Funksjonen gjør:
+    # Velger nyttelast per pakke, sender en ACK-pakke til serveren og starter filoverføringen
+    # Med pakkehode versjon 1 er nyttelasten fast. Med versjon 2 brukes ønsket nyttelast, begrenset av serveren og eventuelt av path-MTU-søk,
+    # og valget sendes til serveren i ACK-pakken.
+    # En strøm sender også overførings-ID-en, hvor i filen den starter, lengden på området og antall strømmer. Dette krever versjon 2.
+    # Retur: Ingen returverdi for denne funksjonen
+    def send_ack_packet(self):
+        if self.resume and self.streams == 1 and self.version == 1:
+            self.log.write(LOG_QUIET, "Serveren støtter bare pakkehode versjon 1 og kan ikke gjenoppta overføringer, sender hele filen")
+            self.resume = False
+            self.transfer_id = None
+        if self.delta and (self.version == 1 or self.transfer_id is not None):
+            self.log.write(LOG_QUIET, "Deltaoverføring krever pakkehode versjon 2 og kan ikke kombineres med --streams eller --resume, sender hele filen")
+            self.delta = False
+        if self.compress and (self.compress not in self.server_codecs or self.delta):
+            self.log.write(LOG_QUIET, f"Serveren kan ikke ta imot {self.compress}-komprimerte filer" + (" ved deltaoverføring" if self.delta else "") + ", sender filen ukomprimert")
+            self.compress = None
+        if self.fec and (self.mode != MODE_SR or not self.server_fec):
+            self.log.write(LOG_QUIET, "Feilretting (--fec) krever sr-modus og en server som støtter det, sender uten paritetspakker")
+            self.fec = 0
+        if self.transfer_id is not None and self.version == 1:
+            self.log.write(LOG_QUIET, "Feil: Serveren støtter bare pakkehode versjon 1 og kan ikke ta imot filen over flere strømmer.")
+            self.close_socket()
+            return
+        if self.files is not None and not self.server_session:
+            self.log.write(LOG_QUIET, "Feil: Serveren kan ikke ta imot flere filer i én økt.")
+            self.close_socket()
+            return
+        if self.source is not None and self.length is None and self.version == 1:
+            self.log.write(LOG_QUIET, "Feil: Serveren støtter bare pakkehode versjon 1 og kan ikke ta imot en strøm med ukjent lengde.")
+            self.close_socket()
+            return
+        if self.version == 1:
+            self.payload_size = PACKET_SIZE - HEADER_V1.size
+            packet = create_packet(0, 0, ACK, self.version)
+        else:
+            self.payload_size = min(self.payload_size, self.server_max_payload)
+            if self.pmtud:
+                self.payload_size = self.discover_payload_size()
+            # Størrelsen på hele filen sendes med, slik at serveren kan forhåndsallokere den.
+            # I en økt kommer navnet og størrelsen på hver fil i metadatarammene i strømmen.
+            if self.files is not None:
+                options = {'payload': self.payload_size, 'session': len(self.files)}
+            elif self.source is not None:
+                options = {'payload': self.payload_size}
+                if self.length is not None:
+                    options.update(size=self.length)
+                if self.name:
+                    options.update(name=self.name)
+            else:
+                options = {'payload': self.payload_size, 'size': os.path.getsize(self.file), 'name': os.path.basename(self.file)}
+            if self.transfer_id is not None:
+                # Serveren regner strømmen som fullført først når hele området er mottatt
+                options.update(transfer=self.transfer_id, offset=self.offset, length=self.length, streams=self.streams)
+            if self.resume:
+                options.update(resume=True)
+            if self.delta:
+                options.update(delta=True)
+            if self.compress:
+                options.update(codec=self.compress)
+            if self.fec:
+                options.update(fec=self.fec)
+            options = encode_options(options)
+            packet = create_packet(0, 0, ACK, self.version, len(options)) + options
+        self.sock.sendto(packet, (self.ip, self.port))
+        self.handshake_packet = packet
+        self.log.write(LOG_INFO, "ACK-pakke er sendt")
+        if self.resume:
+            reply = self.receive_reply(packet, RESUME | ACK)
+            if reply is None:
+                self.log.write(LOG_QUIET, "Feil: Fikk ikke svar fra serveren om hva som allerede er lagret")
+                # Serveren kan ha hoppet over en del av området, så uten svaret kan ingenting sendes
+                self.send_rst_packet()
+                return
+            skip = min(int(reply.get('skip', 0)), self.length)
+            self.skipped = skip
+            self.offset += skip
+            self.length -= skip
+            self.log.write(LOG_INFO, f"Serveren har allerede {skip} byte, fortsetter fra byte {self.offset}")
+        if self.delta and not self.prepare_delta(packet):
+            # Serveren venter på en deltastrøm, så uten sjekksummene kan ingenting sendes
+            self.send_rst_packet()
+            return
+        self.log.write(LOG_INFO, f"Nyttelast per pakke: {self.payload_size} byte")
+        self.log.write(LOG_INFO, "Forbindelse etablert\n")
+        # Starter filoverføring, eventuelt med profilering av sendeløkken
+        with profiling(self.log, self.profile, self.trace_memory):
+            self.transfer_file()
+
+    # Beskrivelse av funksjonen:
+    # Sender en paritetspakke
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # parity: (første pakke, ack-feltet, nyttelast) fra FecEncoder, eller None hvis gruppen ikke er ferdig
+    # Retur: Ingen returverdi for denne funksjonen
+    def send_parity(self, parity):
+        if parity is not None:
+            first, info, payload = parity
+            packet = create_packet(first & 0xFFFFFFFF, info, FEC, self.version, len(payload)) + payload
+            self.sock.sendto(packet, (self.ip, self.port))
+            self.stats.parity_sent += 1
+            if self.pacer is not None:
+                self.pacer.consume(len(packet))
+
+    # Beskrivelse av funksjonen:
+    # Venter på svaret fra serveren på ACK-pakken i håndtrykket, f.eks. om hvor mye av området som allerede er lagret
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # packet: ACK-pakken fra håndtrykket, sendes på nytt hvis svaret ikke kommer
+    # expected: Flaggene til svaret (RESUME | ACK eller DELTA | ACK)
+    # Retur: Returnerer en ordbok med innholdet i svaret, eller None hvis serveren ikke svarte
+    def receive_reply(self, packet, expected):
+        for _ in range(REPLY_RETRIES):
+            try:
+                data, server = self.sock.recvfrom(PACKET_SIZE)
+            except socket.timeout:
+                self.sock.sendto(packet, (self.ip, self.port))
+                continue
+            _, _, flags, length = parse_header(data, self.version)
+            if flags == expected:
+                hsize = header_size(self.version)
+                return decode_options(data[hsize:hsize + length])
+        return None
+
+    # Beskrivelse av funksjonen:
+    # Lager deltastrømmen for filen
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # packet: ACK-pakken fra håndtrykket, sendes på nytt hvis svaret ikke kommer
+    # Funksjonen gjør:
+    # Venter på blokkstørrelsen og antall blokker i den forrige versjonen og henter sjekksummene som filen kodes mot.
+    # Har ikke serveren noen forrige versjon, sendes hele filen som vanlig.
+    # Retur: Returnerer True hvis overføringen kan fortsette, False hvis serveren ikke svarte
+    def prepare_delta(self, packet):
+        reply = self.receive_reply(packet, DELTA | ACK)
+        if reply is None:
+            self.log.write(LOG_QUIET, "Feil: Fikk ikke svar fra serveren om den forrige versjonen av filen")
+            return False
+        blocks = int(reply.get('blocks', 0))
+        if not blocks:
+            self.log.write(LOG_INFO, "Serveren har ingen forrige versjon av filen, sender hele filen")
+            return True
+        signatures = self.receive_signatures(blocks)
+        if signatures is None:
+            self.log.write(LOG_QUIET, "Feil: Fikk ikke sjekksummene til den forrige versjonen av filen")
+            return False
+        # Filen kodes mot sjekksummene mens den sendes (transfer_file)
+        self.delta_basis = (int(reply['block']), int(reply['size']), signatures)
+        return True
+
+    # Beskrivelse av funksjonen:
+    # Henter sjekksummene til blokkene i den forrige versjonen av filen
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # blocks: Antall blokker
+    # Funksjonen gjør:
+    # Ber om sjekksummene med DELTA-pakker, der sekvensnummeret sier hvilken del som trengs. Opptil window_size forespørsler
+    # er underveis samtidig, og de som ikke er besvart innen RTO, sendes på nytt.
+    # Retur: Returnerer en liste med (svak, sterk) sjekksum per blokk, eller None hvis serveren sluttet å svare
+    def receive_signatures(self, blocks):
+        count = self.payload_size // SIGNATURE_ENTRY.size
+        requests = -(-blocks // count)
+        received = {}
+        pending = collections.deque(range(1, requests + 1))
+        outstanding = set()
+        buffer = bytearray(header_size(self.version) + self.payload_size)
+        timeouts = 0
+        while len(received) < requests:
+            while pending and len(outstanding) < self.window_size:
+                seq = pending.popleft()
+                self.sock.sendto(create_packet(seq, 0, DELTA, self.version), (self.ip, self.port))
+                outstanding.add(seq)
+            try:
+                self.sock.settimeout(self.rtt.rto)
+                size, server = self.sock.recvfrom_into(buffer)
+                seq, _, flags, length = parse_header(buffer[:size], self.version)
+            except socket.timeout:
+                timeouts += 1
+                if timeouts >= REPLY_RETRIES:
+                    return None
+                pending.extendleft(sorted(outstanding, reverse=True))
+                outstanding.clear()
+                continue
+            except (ValueError, struct.error):
+                continue
+            if flags == DELTA | ACK and seq in outstanding:
+                hsize = header_size(self.version)
+                received[seq] = bytes(buffer[hsize:hsize + length])
+                outstanding.discard(seq)
+                timeouts = 0
+        entries = b''.join(received[seq] for seq in range(1, requests + 1))
+        return [SIGNATURE_ENTRY.unpack_from(entries, offset) for offset in range(0, len(entries), SIGNATURE_ENTRY.size)][:blocks]
+
+    # Beskrivelse av funksjonen:
+    # Finner største nyttelast som kommer frem til serveren uten fragmentering (path-MTU-søk)
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # Funksjonen gjør:
+    # Setter DF-bitet på socketen og sender PROBE-pakker med ønsket nyttelast og nyttelaster som passer vanlige MTU-er, fra største til minste.
+    # Serveren bekrefter hver PROBE-pakke som kommer frem. Pakker som er for store for det lokale grensesnittet avvises av operativsystemet.
+    # Den største bekreftede nyttelasten velges. Hvis ingen blir bekreftet, eller DF-bitet ikke kan settes, brukes en trygg standardverdi.
+    # Retur: Returnerer nyttelasten som skal brukes
+    def discover_payload_size(self):
+        fallback = min(DEFAULT_PAYLOAD, self.payload_size)
+        # DF-bitet kan bare settes slik på Linux (IP_MTU_DISCOVER = 10, IP_PMTUDISC_DO = 2)
+        if not sys.platform.startswith('linux'):
+            self.log.write(LOG_INFO, "Path-MTU-søk støttes ikke på denne plattformen, bruker trygg nyttelast")
+            return fallback
+        hsize = header_size(self.version)
+        candidates = sorted({self.payload_size} | {min(mtu - IP_UDP_OVERHEAD - hsize, self.payload_size) for mtu in PROBE_MTUS}, reverse=True)
+        previous = self.sock.getsockopt(socket.IPPROTO_IP, 10)
+        self.sock.setsockopt(socket.IPPROTO_IP, 10, 2)
+        try:
+            for probe_id, size in enumerate(candidates, start=1):
+                # Hver størrelse prøves to ganger i tilfelle pakken gikk tapt av andre grunner
+                for attempt in range(2):
+                    try:
+                        self.sock.sendto(create_packet(probe_id, 0, PROBE, self.version, size) + bytes(size), (self.ip, self.port))
+                    except OSError:
+                        # For stor for grensesnittet eller en kjent path-MTU (EMSGSIZE)
+                        break
+                    if self.wait_for_probe_ack(probe_id):
+                        self.log.write(LOG_INFO, f"Path-MTU-søk: nyttelast på {size} byte kom frem")
+                        return size
+                self.log.write(LOG_INFO, f"Path-MTU-søk: nyttelast på {size} byte kom ikke frem")
+        finally:
+            self.sock.setsockopt(socket.IPPROTO_IP, 10, previous)
+        self.log.write(LOG_INFO, "Path-MTU-søk fant ingen størrelse, bruker trygg nyttelast")
+        return fallback
+
+    # Beskrivelse av funksjonen:
+    # Venter på bekreftelsen av en PROBE-pakke
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # probe_id: Sekvensnummeret til PROBE-pakken
+    # Funksjonen gjør:
+    # Venter i opptil to ganger RTO og ignorerer bekreftelser av tidligere PROBE-pakker
+    # Retur: Returnerer True hvis PROBE-pakken ble bekreftet, ellers False
+    def wait_for_probe_ack(self, probe_id):
+        deadline = time.time() + 2 * self.rtt.rto
+        while time.time() < deadline:
+            self.sock.settimeout(max(deadline - time.time(), 0.001))
+            try:
+                data, server = self.sock.recvfrom(PACKET_SIZE)
+                seq, ack, flags, _ = parse_header(data, self.version)
+            except socket.timeout:
+                break
+            except (ValueError, struct.error):
+                continue
+            if flags == PROBE | ACK and seq == probe_id:
+                return True
+        return False
+
+    # Beskrivelse av funksjonen:
+    # Overfører en fil til serveren
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # Funksjonen gjør:
+    # Lese fildataene (eller området fra offset og length byte frem) og sender dem til serveren i pakker. Hvis en pakke ikke blir bekreftet innen RTO, sendes pakken på nytt
+    # RTO regnes ut fra målt RTT. Etter Karns regel måles bare pakker som ikke er sendt på nytt, og RTO dobles for hver timeout.
+    # ACK-ene er kumulative, så én ACK flytter vinduet forbi alle pakkene foran, selv om tidligere ACK-er gikk tapt.
+    # Etter tre dupliserte ACK-er sendes den eldste pakken på nytt med en gang (fast retransmit), i gbn-modus sammen med resten av vinduet.
+    # I sr-modus bekrefter serveren i tillegg pakker etter et hull selektivt (SACK), så bare pakkene som faktisk mangler sendes på nytt.
+    # Vinduet går da fra den eldste ubekreftede pakken, slik at klienten aldri sender utenfor serverens buffer.
+    # Antall pakker underveis begrenses av metningskontrollen (self.cc), som krymper vinduet ved tap og lar det vokse opp til -w ellers.
+    # Med versjon 1 av pakkehodet har sekvensnummeret bare 16 bits, så filer som trenger flere pakker enn det avvises.
+    # Pakkene som venter på bekreftelse ligger i en ringbuffer (SendBuffer), så minnebruken er O(vindu) og hver ACK behandles i O(1).
+    # Retur: Ingen returverdi for denne funksjonen
+    def transfer_file(self):
+        # Størrelsen på nyttelasten i hver pakke, forhandlet i håndtrykket
+        payload_size = self.payload_size
+        # Ved deltaoverføring sendes deltastrømmen i stedet for filen. Den kodes mens den sendes, så lengden er ikke kjent på
+        # forhånd (deltaoverføring bruker alltid versjon 2). Ved komprimering er lengden på strømmen heller ikke kjent, men den
+        # blir aldri lengre enn området med et rammehode per blokk.
+        if self.delta_basis is not None:
+            length = None
+        elif self.compress:
+            length = self.length + -(-self.length // COMPRESS_CHUNK) * COMPRESS_FRAME.size
+        else:
+            length = self.length
+        # En strøm med ukjent lengde sendes bare med versjon 2, der sekvensnummeret har 32 bits og kan gå rundt
+        packets_needed = -(-length // payload_size) if length is not None else 0
+        if packets_needed >= 1 << SEQ_BITS[self.version]:
+            self.log.write(LOG_QUIET, f"Feil: Filen trenger {packets_needed} pakker, men serveren støtter bare pakkehode versjon {self.version} med {SEQ_BITS[self.version]}-bits sekvensnummer.")
+            # Avbryter forbindelsen slik at serveren ikke venter på data som aldri kommer
+            self.send_rst_packet()
+            return
+        self.log.write(LOG_INFO, "Dataoverføring:\n")
+        # Initialiserer skyvevinduet. Ringbufferen holder data, sendetid og om pakken er sendt på nytt (Karns regel) for hver ubekreftede pakke.
+        window = SendBuffer(self.window_size, payload_size)
+        # Pakkehodet skrives inn i samme buffer for hver pakke, og ACK-er leses inn i en fast mottaksbuffer
+        self.header = bytearray(header_size(self.version))
+        receive_buffer = bytearray(PACKET_SIZE)
+        receive_view = memoryview(receive_buffer)
+        start_time = time.time()  # Brukes for å regne ut pakker per sekund og gjennomstrømning
+        stats = self.stats  # Teller pakker sendt, inkludert retransmisjoner, ACK-er, timeouts og RTT-målinger
+        stats.begin_phase('data')
+        recover = 0  # Tap av pakker før dette sekvensnummeret gir ikke ny reduksjon av vinduet (maks én per vindu)
+        last_ack = 1  # Siste kumulative ACK, brukes for å telle dupliserte ACK-er
+        dupacks = 0  # Antall dupliserte ACK-er på rad
+        fec = FecEncoder(self.fec, payload_size) if self.fec else None  # Lager paritetspakkene
+        # Tokenbøtta for pacing, raten gis i Mbit/s
+        if self.rate or self.pace:
+            self.pacer = Pacer(self.rate * 1e6 / 8 if self.rate else None, len(self.header) + payload_size)
+        pacer = self.pacer
+        # Høyre kant av mottaksvinduet serveren har annonsert: pakker fra og med dette sekvensnummeret kan ikke sendes ennå.
+        # None betyr at serveren ikke har annonsert noe vindu (ennå).
+        rwnd_edge = None
+        rwnd = None  # Siste annonserte vindu, en ACK som endrer vinduet er ikke en duplisert ACK
+        eof = False  # Settes når alle dataene er lest inn i vinduet
+
+        # Hovedklientløkke
+        # Åpner og minnekartlegger filen. Vinduet lukkes før filen, slik at kartleggingen slippes først.
+        # Filen (eller økten) lukkes etter vinduet, slik at minnekartleggingen slippes først
+        with contextlib.ExitStack() as stack, contextlib.closing(window):
+            if self.files is not None:
+                # Filene i økten leses etter hverandre med readinto, med en metadataramme foran hver fil
+                source = stack.enter_context(contextlib.closing(SessionReader(self.files)))
+            elif isinstance(self.source, memoryview):
+                # Bufferen sendes med utsnitt, som en minnekartlagt fil
+                window.use_buffer(self.source)
+                source = None
+            elif self.source is not None:
+                source = self.source
+            else:
+                f = source = stack.enter_context(open(self.file, 'rb'))
+                if self.delta_basis is not None:
+                    # Deltastrømmen leses fra koderen med readinto, så bare så mye av filen som vinduet trenger er kodet.
+                    # Koderen lukkes før minnekartleggingen av filen.
+                    mapped = stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)) if self.length else b''
+                    source = stack.enter_context(contextlib.closing(DeltaEncoder(mapped, *self.delta_basis)))
+                elif self.compress:
+                    # Rammene leses fra kompressoren med readinto, som fra en fil. Den lukkes etter vinduet.
+                    source = stack.enter_context(contextlib.closing(ChunkCompressor(f, self.offset, self.length, self.compress)))
+                elif window.map_file(f, self.offset, self.length) and self.prefetch:
+                    window.start_prefetch()
+                f.seek(self.offset)
+            remaining = length
+            while True:
+                pace_wait = 0.0  # Hvor lenge pacingen holder igjen neste pakke
+                # Hvis vinduet ikke er fullt, leses mer data fra filen og sendes
+                # I sr-modus kan det ikke sendes lenger enn vindusstørrelsen forbi den eldste ubekreftede pakken
+                # Serveren kan i tillegg ha begrenset hvor mange pakker den har plass til med mottaksvinduet
+                while len(window) < self.cc.window and window.has_room() and (self.mode != MODE_SR or window.next_seq < window.base + self.window_size) \
+                        and (rwnd_edge is None or window.next_seq < rwnd_edge):
+                    if pacer is not None:
+                        pace_wait = pacer.wait(time.time(), self.cc.window, self.rtt.srtt)
+                        if pace_wait:
+                            stats.pacing_waits += 1
+                            break
+                    seq = window.read_next(source, remaining)
+                    if seq is None:
+                        eof = True
+                        if self.length is None:
+                            # Strømmen er lest ferdig, så nå er lengden kjent
+                            self.length = source.total
+                        if self.delta_basis is not None:
+                            self.delta_bytes = source.bytes_out
+                        # Den siste gruppen kan være kortere, og pariteten sendes når filen er lest ferdig
+                        if fec is not None:
+                            self.send_parity(fec.flush())
+                        break
+                    if seq <= len(self.early_times):
+                        # Pakken ble sendt rett etter SYN-pakken (0-RTT) og er allerede underveis
+                        remaining -= self.mark_early(window, seq)
+                        continue
+                    sent = self.send_data_packet(window, seq)
+                    if remaining is not None:
+                        remaining -= sent
+                    if fec is not None:
+                        self.send_parity(fec.add(seq, window.payload(seq)))
+                    if self.log.level >= LOG_DEBUG:
+                        self.log.event(LOG_DEBUG, f"Pakke med sekvensnummer = {seq} er sendt, skyvevindu = {window.base}-{window.next_seq - 1}")
+                # Et tomt vindu betyr at alt er bekreftet, med mindre pacingen eller mottaksvinduet holdt igjen data som ikke er lest ennå
+                if not window and eof:
+                    elapsed = time.time() - start_time
+                    self.log.write(LOG_INFO, "Dataoverføring fullført\n")
+                    stats.bytes_delivered = self.length
+                    self.log.write(LOG_QUIET, f"Sendte {stats.packets_sent} pakker med {payload_size} byte nyttelast: {stats.packets_sent / elapsed:.0f} pakker/s, {self.length * 8 / elapsed / 1e6:.2f} Mbps")
+                    if self.files is not None:
+                        self.log.write(LOG_QUIET, f"Økt: {source.count} filer sendt over én forbindelse, {len(self.files) / elapsed:.0f} filer/s")
+                    if self.delta_basis is not None:
+                        self.log.write(LOG_QUIET, f"Deltaoverføring: {self.delta_bytes} byte sendt for en fil på {self.length} byte")
+                    if self.compress:
+                        self.log.write(LOG_QUIET, f"Komprimering ({self.compress}): {source.compressed} av {source.chunks} blokker komprimert, {source.bytes_out} byte sendt for {self.length} byte")
+                    self.log.write(LOG_QUIET, f"Retransmisjoner: {stats.packets_retransmitted} ({stats.timeouts} timeouts, {stats.fast_retransmits} fast retransmit), gjennomstrømning {stats.bytes_sent * 8 / elapsed / 1e6:.2f} Mbps")
+                    self.log.write(LOG_QUIET, f"RTT-estimat: {self.rtt.summary()}")
+                    if pacer is not None:
+                        self.log.write(LOG_QUIET, f"Pacing: {pacer.summary()}, ventet {stats.pacing_waits} ganger")
+                    self.log.write(LOG_QUIET, f"Metningskontroll ({type(self.cc).__name__}): {self.cc.summary()}\n")
+                    self.log.write(LOG_INFO, "Nedbryting av forbindelse:\n")
+                    stats.begin_phase('teardown')
+                    # Serveren regner filen som mottatt først når den får FIN-pakken
+                    self.completed = self.send_fin_packet(window.next_seq)
+                    break
+                try:
+                    # Venter på en ACK-pakke fra serverens, men ikke lenger enn gjeldende RTO, eller til pacingen slipper neste pakke
+                    self.sock.settimeout(min(pace_wait, self.rtt.rto) if pace_wait else self.rtt.rto)
+                    size, server = self.sock.recvfrom_into(receive_buffer)
+                    data = receive_view[:size]
+                    advertised, ack, flags, length = parse_header(data, self.version)
+                    if flags == ACK:
+                        # Bekreftelsesnummeret kan ha gått rundt, så det gjøres om til et fullt nummer nær neste sekvensnummer
+                        ack = unwrap_seq(ack, window.next_seq, self.version)
+                        # Mottaksvinduet gjelder fra bekreftelsesnummeret. ACK-er som kommer i feil rekkefølge, ignoreres.
+                        window_changed = False
+                        if self.server_rwnd and ack >= last_ack:
+                            window_changed = advertised != rwnd
+                            if window_changed and advertised == 0:
+                                self.log.event(LOG_VERBOSE, "Serveren annonserer et mottaksvindu på 0")
+                            rwnd = advertised
+                            rwnd_edge = ack + advertised
+                        now = time.time()
+                        stats.acks_received += 1
+                        stats.sample_window(now, len(window), self.cc.window)
+                        # RTT måles på den nyeste pakken ACK-en bekrefter, men bare hvis den ikke er sendt på nytt (Karns regel)
+                        rtt = None
+                        if window.is_outstanding(ack - 1) and not window.was_retransmitted(ack - 1):
+                            rtt = now - window.sent_time(ack - 1)
+                        # Kumulativ ACK: alle pakker før ack fjernes fra vinduet
+                        acked = window.ack_through(ack)
+                        # Selektive bekreftelser (SACK) for pakker etter et hull
+                        hsize = header_size(self.version)
+                        for offset in range(hsize, hsize + length - SACK_ENTRY.size + 1, SACK_ENTRY.size):
+                            sack = unwrap_seq(SACK_ENTRY.unpack_from(data, offset)[0], window.next_seq, 2)
+                            sack_rtt = now - window.sent_time(sack)
+                            sacked, was_retransmitted = window.ack(sack)
+                            if sacked:
+                                acked += 1
+                                if rtt is None and not was_retransmitted:
+                                    rtt = sack_rtt
+                        if acked:
+                            if self.log.level >= LOG_DEBUG:
+                                self.log.event(LOG_DEBUG, f"ACK for alt før {ack} er mottatt, skyvevindu = {window.base}-{window.next_seq - 1}")
+                            self.log.trace(TRACE_ACK, ack, self.cc.window)
+                            if rtt is not None:
+                                self.rtt.sample(rtt)
+                                stats.add_rtt(rtt)
+                            self.cc.on_ack(acked, rtt)
+                        # Teller dupliserte ACK-er, det vil si ACK-er som ikke flytter det kumulative bekreftelsesnummeret
+                        if ack > last_ack:
+                            last_ack = ack
+                            dupacks = 0
+                        elif window and not window_changed:
+                            dupacks += 1
+                            stats.duplicate_acks += 1
+                            self.log.trace(TRACE_DUPACK, ack, self.cc.window)
+                            if dupacks == 3:
+                                # Fast retransmit: den eldste pakken er trolig tapt, så den sendes på nytt uten å vente på timeout.
+                                # I gbn-modus har serveren forkastet alt etter hullet, så hele vinduet sendes på nytt.
+                                self.log.event(LOG_VERBOSE, f"Tre dupliserte ACK-er, fast retransmit fra pakke {window.base}")
+                                stats.fast_retransmits += 1
+                                resend = [window.base] if self.mode == MODE_SR else list(window.unacked())
+                                for seq_num in resend:
+                                    self.send_data_packet(window, seq_num, retransmit=True)
+                                if window.base >= recover:
+                                    self.cc.on_loss()
+                                    recover = window.next_seq
+                        # I sr-modus sendes den eldste pakken på nytt med en gang timeren har gått ut,
+                        # selv om det fortsatt kommer ACK-er for senere pakker
+                        if self.mode == MODE_SR and window and time.time() - window.sent_time(window.base) > self.rtt.rto:
+                            seq_num = window.base
+                            self.log.event(LOG_VERBOSE, f"Sender pakke med sekvensnummer = {seq_num} på nytt")
+                            self.send_data_packet(window, seq_num, retransmit=True)
+                            # Tapet oppdages mens ACK-er fortsatt kommer, så vinduet reduseres i stedet for å starte på nytt
+                            if seq_num >= recover:
+                                self.cc.on_loss()
+                                recover = window.next_seq
+                    elif self.is_own_syn_ack(data) and self.handshake_packet is not None:
+                        # Serveren har ikke fått ACK-pakken i håndtrykket og sender SYN-ACK på nytt
+                        self.log.event(LOG_VERBOSE, "SYN-ACK mottatt på nytt, sender ACK-pakken i håndtrykket på nytt")
+                        self.sock.sendto(self.handshake_packet, (self.ip, self.port))
+                except socket.timeout:
+                    # Alt er bekreftet, men serveren har ikke plass til mer. Vindusoppdateringen kan ha gått tapt, så klienten
+                    # spør med en PROBE-pakke og venter stadig lenger mellom hver gang, som TCP sin persist-timer.
+                    if not window and rwnd_edge is not None and window.next_seq >= rwnd_edge:
+                        self.log.event(LOG_VERBOSE, "Mottaksvinduet er 0, sender PROBE-pakke")
+                        self.sock.sendto(create_packet(0, 0, PROBE, self.version), (self.ip, self.port))
+                        stats.zero_window_probes += 1
+                        self.rtt.backoff()
+                        continue
+                    # Ventetiden var bare pacing. Vinduet er ikke fullt, så det sendes mer, og tap oppdages som før
+                    # av ACK-ene eller av en vanlig timeout når vinduet er fullt.
+                    if pace_wait:
+                        continue
+                    # Sjekker hvilke pakker det har gått nok tid for en retransmisjon av
+                    now = time.time()
+                    expired = [seq_num for seq_num in window.unacked() if now - window.sent_time(seq_num) >= self.rtt.rto]
+                    # Ingen pakker er sendt for lenge siden, så timeouten er ikke et tap, og RTO og vinduet beholdes
+                    if not expired:
+                        continue
+                    if self.mode == MODE_SR:
+                        self.log.event(LOG_VERBOSE, "Timeout oppstod, sender manglende pakker på nytt")
+                    else:
+                        self.log.event(LOG_VERBOSE, "Timeout oppstod, sender alle pakker i vinduet på nytt")
+                    self.log.event(LOG_VERBOSE, f"RTO oppstod ({self.rtt.rto * 1000:.1f} ms)")
+                    self.log.trace(TRACE_TIMEOUT, window.base, self.cc.window)
+                    stats.timeouts += 1
+                    for seq_num in expired:
+                        self.log.event(LOG_VERBOSE, f"Sender pakke med sekvensnummer = {seq_num} på nytt")
+                        self.send_data_packet(window, seq_num, retransmit=True)  # Sender korrekt data på nytt
+                    # Dobler RTO for hver timeout som kommer etter hverandre
+                    self.rtt.backoff()
+                    self.cc.on_timeout()
+                    recover = window.next_seq
+
+    # Beskrivelse av funksjonen:
+    # Sender en datapakke fra vinduet til serveren
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # window: Vinduet (SendBuffer) pakken ligger i
+    # seq: Sekvensnummeret til pakken
+    # retransmit: Om pakken sendes på nytt
+    # Funksjonen gjør:
+    # Skriver pakkehodet inn i self.header og sender det sammen med nyttelasten med sendmsg, slik at hodet og nyttelasten
+    # aldri settes sammen til et nytt bytes-objekt. Registrerer sendetiden, statistikken og sporingsposten.
+    # Retur: Returnerer antall byte nyttelast i pakken
+    def send_data_packet(self, window, seq, retransmit=False):
+        payload = window.payload(seq)
+        pack_header_into(self.header, seq, 0, 0, self.version, len(payload))
+        if SCATTER_GATHER:
+            self.sock.sendmsg((self.header, payload), (), 0, (self.ip, self.port))
+        else:
+            self.sock.sendto(self.header + payload, (self.ip, self.port))
+        self.stats.sent(len(payload), retransmit)
+        if self.pacer is not None:
+            self.pacer.consume(len(self.header) + len(payload))
+        window.mark_sent(seq, retransmit)  # Lagrer tiden pakken ble sendt
+        self.log.trace(TRACE_RETRANSMIT if retransmit else TRACE_SEND, seq, self.cc.window)
+        return len(payload)
+
+    # Beskrivelse av funksjonen:
+    # Legger en pakke som ble sendt rett etter SYN-pakken (0-RTT) inn i vinduet uten å sende den på nytt
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # window: Vinduet (SendBuffer) pakken ligger i
+    # seq: Sekvensnummeret til pakken
+    # Funksjonen gjør:
+    # Sendetiden er tiden pakken faktisk ble sendt, slik at RTO og RTT-målingene blir riktige
+    # Retur: Returnerer antall byte nyttelast i pakken
+    def mark_early(self, window, seq):
+        payload = window.payload(seq)
+        self.stats.sent(len(payload))
+        window.mark_sent(seq, sent_at=self.early_times[seq - 1])
+        self.log.trace(TRACE_SEND, seq, self.cc.window)
+        return len(payload)
+
+    # Beskrivelse av funksjonen:
+    # Avbryter overføringen med en RST-pakke
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # Funksjonen gjør:
+    # Serveren lukker forbindelsen uten å regne overføringen som fullført, og tar vare på sjekkpunktet hvis den kan gjenopptas.
+    # RST-pakken bekreftes ikke. Går den tapt, lukker serveren forbindelsen når den har vært stille for lenge, med samme resultat.
+    # Retur: Ingen returverdi for denne funksjonen
+    def send_rst_packet(self):
+        self.sock.sendto(create_packet(0, 0, RST, self.version), (self.ip, self.port))
+        self.log.write(LOG_INFO, "RST-pakke er sendt, overføringen er avbrutt")
+        self.close_socket()
+
+    # Beskrivelse av funksjonen:
+    # Sender en FIN-pakke til serveren
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # seq: Sekvensnummeret etter den siste datapakken. Serveren svarer med ack = seq + 1.
+    # Funksjonen gjør:
+    # Sender en FIN-pakke til serveren for å initiere nedbrytingen av forbindelsen, og sender den på nytt til FIN ACK-pakken kommer
+    # Retur: Returnerer True hvis serveren bekreftet FIN-pakken, ellers False
+    def send_fin_packet(self, seq):
+        seq &= (1 << SEQ_BITS[self.version]) - 1
+        packet = create_packet(seq, 0, FIN, self.version)
+        self.sock.sendto(packet, (self.ip, self.port))
+        self.log.write(LOG_INFO, "FIN-pakke er sendt")
+        # Mottar en FIN ACK-pakke fra serveren
+        return self.receive_fin_ack(packet, seq)
+
+    # Beskrivelse av funksjonen:
+    # Mottar en FIN ACK-pakke fra serveren
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # packet: FIN-pakken, sendes på nytt hvis svaret ikke kommer
+    # seq: Sekvensnummeret til FIN-pakken
+    # Funksjonen gjør:
+    # Venter på en FIN ACK-pakke fra serveren og avslutter forbindelsen når den mottas.
+    # Ventetiden er RTO, men aldri kortere enn HANDSHAKE_TIMEOUT, og den dobles for hver gang FIN-pakken sendes på nytt (høyst REPLY_RETRIES ganger).
+    # Bare en ACK med ack = FIN-pakkens sekvensnummer + 1 godtas, så sene ACK-er for data avslutter ikke nedbrytingen.
+    # Retur: Returnerer True hvis FIN ACK-pakken ble mottatt, ellers False
+    def receive_fin_ack(self, packet, seq):
+        fin_ack = (seq + 1) & ((1 << SEQ_BITS[self.version]) - 1)
+        timeout = max(self.rtt.rto, HANDSHAKE_TIMEOUT)
+        retries = 0
+        deadline = time.time() + timeout
+        # Prøver å motta en FIN ACK-pakke fra serveren
+        try:
+            while True:
+                try:
+                    self.sock.settimeout(max(deadline - time.time(), 0.001))
+                    data, server = self.sock.recvfrom(PACKET_SIZE)
+                except socket.timeout:
+                    if retries >= REPLY_RETRIES:
+                        self.log.write(LOG_QUIET, "Timeout oppstod, mislykket nedbryting av forbindelsen")
+                        self.close_socket()
+                        return False
+                    retries += 1
+                    timeout *= 2
+                    deadline = time.time() + timeout
+                    self.log.write(LOG_VERBOSE, "FIN ACK-pakken kom ikke, sender FIN-pakken på nytt")
+                    self.sock.sendto(packet, (self.ip, self.port))
+                    continue
+                if self.is_own_syn_ack(data) and self.handshake_packet is not None:
+                    # Serveren har ikke fått ACK-pakken i håndtrykket og venter med FIN-pakken til den kommer
+                    self.log.write(LOG_VERBOSE, "SYN-ACK mottatt på nytt, sender ACK-pakken i håndtrykket på nytt")
+                    self.sock.sendto(self.handshake_packet, (self.ip, self.port))
+                    continue
+                try:
+                    _, ack, flags, _ = parse_header(data, self.version)
+                except (ValueError, struct.error):
+                    continue
+                if flags == ACK and ack == fin_ack:
+                    self.log.write(LOG_INFO, "FIN ACK pakke er mottatt")
+                    # Avslutter forbindelsen
+                    self.close_connection()
+                    return True
+        except Exception as e:
+            self.log.write(LOG_QUIET, f"Feil ved mottak av FIN ACK pakke fra serveren: {e}")
+            self.close_socket()
+            return False
+
+    # Beskrivelse av funksjonen:
+    # Avslutter forbindelsen til serveren
+    # Argumenter:
+    # self: Referanse til det aktuelle Client-objektet
+    # Funksjonen gjør:
+    # Lukker socketforbindelsen. Programmet avsluttes av main, med en status som sier om overføringen var vellykket.
+    # Retur: Ingen returverdi for denne funksjonen
+    def close_connection(self):
+        self.log.write(LOG_INFO, "Forbindelse avsluttet")
+        self.close_socket()
+
+# Beskrivelse av funksjonen:
+# Sender én strøm av en fil som sendes over flere forbindelser. Kjøres i en egen prosess (se Client.connect_striped).
+# Argumenter:
+# arguments: Argumentene til Client for strømmen, med offset, length, streams og transfer_id
+# Retur: Returnerer True hvis strømmen ble fullført, ellers False
+def run_stream(arguments):
+    return Client(**arguments).connect()
+
+# Beskrivelse av funksjonen:
+# Hovedfunksjonen til programmet.
+# Argumenter:
+# Ingen argumenter tas inn i denne funksjonen.
+# Hva funksjonen gjør:
+# Funksjonen leser kommandolinjeargumentene, initialiserer en server- eller klientinstans basert på disse argumentene, og starter deretter serveren eller klienten.
+# Hvis verken server- eller klientmodus er spesifisert, skriver den ut en feilmelding og avslutter programmet.
+# Bruk av inn- og ut-parametere i funksjonen:
+# Argumentene leses ved hjelp av `parse_arguments`-funksjonen som returnerer et objekt med alle argumentene som attributter.
+# Avhengig av disse argumentene, blir enten en server eller en klient opprettet og startet.
+# Retur:
+# Denne funksjonen returnerer ikke noe fordi dens hovedoppgave er å starte serveren eller klienten basert på argumentene.
+# Korrekt håndtering av unntak:
+# Hvis verken server- eller klientmodus er spesifisert, eller argumentene ikke kan brukes (ValueError fra Server eller Client)
+# eller serverens socket ikke kan opprettes (OSError), skriver funksjonen ut en feilmelding og avslutter programmet med en feilstatus.
+def main():
+    # Kaller på funksjonen `parse_arguments` som returnerer argumentene som er spesifisert når programmet kjører
+    args = parse_arguments()
+    # Loggnivået: -q gir bare feil og rapporter, standard er LOG_INFO, og hver -v gir ett nivå mer
+    log_level = LOG_QUIET if args.quiet else min(LOG_INFO + args.verbose, LOG_DEBUG)
+
+    # Skriver ut en sporingsfil
+    if args.decode_trace:
+        try:
+            decode_trace(args.decode_trace)
+        except (OSError, ValueError) as e:
+            print("Feil ved lesing av sporingsfil:", e)
+            sys.exit(1)
+        return
+
+    # Sjekker om servermodus er spesifisert
+    if args.server:
+        # Oppretter en serverinstans med de gitte argumentene
+        try:
+            server = Server(args.ip, args.port, args.file, args.window, args.discard, args.mode, args.buffer, args.max_payload, args.ack_every, args.ack_delay, args.output_dir, args.max_connections, log_level, args.trace, args.stats, args.metrics, args.profile, args.tracemalloc, socket_buffer=args.socket_buffer)
+        except (ValueError, OSError) as e:
+            print(e)
+            sys.exit(1)
+        # Starter serveren
+        server.start()
+    # Sjekker om klientmodus er spesifisert
+    elif args.client:
+        # Oppretter en klientinstans med de gitte argumentene
+        # Én fil sendes som før, flere filer eller en mappe som en økt
+        file = args.file[0] if args.file and len(args.file) == 1 else args.file
+        try:
+            client = Client(args.ip, args.port, file, args.window, args.discard, args.mode, args.rto_min, args.rto_max, args.cc, args.payload, args.pmtud, args.streams, log_level=log_level, trace=args.trace, stats=args.stats, profile=args.profile, trace_memory=args.tracemalloc, prefetch=args.prefetch, resume=args.resume, delta=args.delta, compress=args.compress, fec=args.fec, rate=args.rate, pace=args.pace, socket_buffer=args.socket_buffer, zero_rtt=args.zero_rtt)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+        # Starter klienten, og avslutter med feilstatus hvis filen ikke ble overført
+        if not client.connect():
+            sys.exit(1)
+    else:
+        # Hvis verken server- eller klientmodus er spesifisert, skrives en feilmelding ut og programmet avsluttes
+        print("Feil: Vennligst spesifiser enten servermodus (-s) eller klientmodus (-c).")
+        sys.exit(1)
+
+# Sjekker om dette scriptet ble kjørt direkte (i stedet for å bli importert som et modul)
+if __name__ == "__main__":
+    # Hvis scriptet ble kjørt direkte, kaller den på hovedfunksjonen
+    main()
     
\ No newline at end of file
@@ -0,0 +1,255 @@
+# Importerer nødvendige biblioteker
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from application import Client, LOG_QUIET, MODES, valid_window_size
+from emulator import ImpairmentProxy, PROFILES
+
+# Stien til programmet som kjøres som server og klient
+APPLICATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'application.py')
+# Kolonnene i resultatfilen. De fire første identifiserer en måling og brukes når resultatene sammenlignes med en tidligere kjøring.
+COLUMNS = ('profile', 'mode', 'window', 'size', 'ok', 'seconds', 'goodput_mbps', 'throughput_mbps',
+           'packets_sent', 'packets_retransmitted', 'timeouts', 'proxy_lost', 'proxy_reordered', 'proxy_duplicated')
+KEY = COLUMNS[:4]
+
+# Beskrivelse av funksjonen:
+# Funksjon for å lese en kommaseparert liste
+# Argumenter:
+# value: Teksten fra kommandolinjen
+# convert: Funksjonen som gjør om hvert element
+# Retur: Returnerer listen
+def parse_list(value, convert=str):
+    return [convert(item) for item in value.split(',') if item]
+
+# Beskrivelse av funksjonen:
+# Funksjon for å analysere kommandolinjeargumenter
+# Argumenter:
+# Ingen argumenter trengs for denne funksjonen siden den bruker argparse biblioteket for å håndtere kommandolinjeargumenter
+# Retur: Returnerer argumentene som ble spesifisert når programmet kjørte
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark av DRTP gjennom en lokal proxy som emulerer forsinkelse, tap og omstokking")
+    parser.add_argument('--sizes', type=lambda v: parse_list(v, int), default=[100, 1000, 5000], help="Filstørrelser i KiB, kommaseparert (standard: 100,1000,5000)")
+    parser.add_argument('--windows', type=lambda v: parse_list(v, valid_window_size), default=[3, 15, 64], help="Vindusstørrelser, kommaseparert (standard: 3,15,64)")
+    parser.add_argument('--profiles', type=parse_list, default=['clean', 'lossy', 'wan', 'reorder'], help=f"Profiler for proxyen, kommaseparert. Tilgjengelige: {','.join(PROFILES)} (standard: clean,lossy,wan,reorder)")
+    parser.add_argument('--modes', type=parse_list, default=['gbn', 'sr'], help="Pålitelighetsmoduser, kommaseparert (standard: gbn,sr)")
+    parser.add_argument('--port', type=int, default=18080, help="Porten serveren startes på (standard: 18080)")
+    parser.add_argument('--seed', type=int, default=1, help="Frø for testfilene og proxyen (standard: 1)")
+    parser.add_argument('--timeout', type=float, default=300, help="Hvor lenge én overføring kan ta før den regnes som feilet, i sekunder (standard: 300)")
+    parser.add_argument('--in-process', action='store_true', help="Kjør klienten i denne prosessen i stedet for som underprosess")
+    parser.add_argument('--csv', metavar='FIL', help="Lagre resultatene som CSV")
+    parser.add_argument('--baseline', metavar='FIL', help="Sammenlign goodput med en tidligere CSV og avslutt med feilstatus ved regresjon")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Hvor mye lavere goodput enn i --baseline som godtas, som andel (standard: 0.2)")
+    args = parser.parse_args()
+    for profile in args.profiles:
+        if profile not in PROFILES:
+            parser.error(f"Ukjent profil: {profile}. Tilgjengelige: {', '.join(PROFILES)}")
+    for mode in args.modes:
+        if mode not in MODES:
+            parser.error(f"Ukjent modus: {mode}. Tilgjengelige: {', '.join(MODES)}")
+    return args
+
+# Beskrivelse av funksjonen:
+# Funksjon for å lage testfilene
+# Argumenter:
+# directory: Mappen filene lagres i
+# sizes: Filstørrelsene i KiB
+# seed: Frø for innholdet, slik at filene blir like fra kjøring til kjøring
+# Funksjonen gjør:
+# Fyller hver fil med tilfeldige byte (innhold som ikke kan komprimeres, som et bilde)
+# Retur: Returnerer en ordbok fra størrelse til filbane
+def create_files(directory, sizes, seed):
+    generator = random.Random(seed)
+    files = {}
+    for size in sizes:
+        path = os.path.join(directory, f"bench_{size}.jpg")
+        with open(path, 'wb') as f:
+            f.write(generator.randbytes(size * 1024))
+        files[size] = path
+    return files
+
+# Beskrivelse av funksjonen:
+# Funksjon for å vente på at serveren har skrevet en kopi av filen
+# Argumenter:
+# directory: Mappen serveren lagrer filer i
+# source: Filen som ble sendt
+# timeout: Hvor lenge det ventes i sekunder
+# Funksjonen gjør:
+# Serveren forhåndsallokerer filen og skriver den i en egen tråd, så innholdet kan bli ferdig litt etter at klienten er ferdig.
+# Sammenligner derfor mottatte filer med originalen til en av dem er lik eller tiden er ute.
+# Retur: Returnerer True hvis en mottatt fil er lik originalen, byte for byte
+def wait_for_output(directory, source, timeout=5.0):
+    size = os.path.getsize(source)
+    deadline = time.monotonic() + timeout
+    while True:
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.startswith('Photo_received') and os.path.getsize(path) == size and same_content(source, path):
+                return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om to filer er like, byte for byte
+# Argumenter:
+# first, second: Filene som sammenlignes
+# Retur: Returnerer True hvis filene er like
+def same_content(first, second):
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        while True:
+            block_a = a.read(1 << 20)
+            if block_a != b.read(1 << 20):
+                return False
+            if not block_a:
+                return True
+
+# Beskrivelse av funksjonen:
+# Funksjon for å kjøre én overføring gjennom proxyen
+# Argumenter:
+# args: Argumentene fra kommandolinjen
+# path: Filen som sendes
+# window: Vindusstørrelsen
+# mode: Pålitelighetsmodusen
+# proxy: Proxyen klienten sender gjennom
+# stats_path: Filen klienten lagrer statistikken i
+# Funksjonen gjør:
+# Kjører klienten som underprosess, eller i denne prosessen med --in-process, og måler tiden
+# Retur: Returnerer om klienten fullførte og hvor mange sekunder overføringen tok
+def run_client(args, path, window, mode, proxy, stats_path):
+    ip, port = proxy.address
+    start = time.monotonic()
+    if args.in_process:
+        client = Client(ip, port, path, window, None, mode, log_level=LOG_QUIET, stats=stats_path)
+        completed = client.connect()
+    else:
+        command = [sys.executable, APPLICATION, '-c', '-q', '-i', ip, '-p', str(port), '-f', path,
+                   '-w', str(window), '-m', mode, '--stats', stats_path]
+        try:
+            completed = subprocess.run(command, stdout=subprocess.DEVNULL, timeout=args.timeout).returncode == 0
+        except subprocess.TimeoutExpired:
+            completed = False
+    return completed, time.monotonic() - start
+
+# Beskrivelse av funksjonen:
+# Funksjon for å kjøre hele målingen
+# Argumenter:
+# args: Argumentene fra kommandolinjen
+# workdir: En midlertidig mappe for testfiler, mottatte filer og statistikk
+# Funksjonen gjør:
+# Starter serveren, og kjører én overføring for hver kombinasjon av profil, modus, vindu og filstørrelse gjennom en ny proxy.
+# Hver mottatt fil sammenlignes med originalen, og statistikken fra klienten samles i en rad.
+# Retur: Returnerer en liste med rader (ordbøker med COLUMNS som nøkler)
+def run_benchmark(args, workdir):
+    files = create_files(workdir, args.sizes, args.seed)
+    output_dir = os.path.join(workdir, 'received')
+    os.mkdir(output_dir)
+    stats_path = os.path.join(workdir, 'client.json')
+    server = subprocess.Popen([sys.executable, APPLICATION, '-s', '-q', '-i', '127.0.0.1', '-p', str(args.port), '-o', output_dir],
+                              stdout=subprocess.DEVNULL)
+    rows = []
+    try:
+        # Gir serveren tid til å binde porten før første SYN
+        time.sleep(0.5)
+        if server.poll() is not None:
+            raise RuntimeError(f"Serveren startet ikke (avslutningskode {server.returncode})")
+        for profile, mode, window, size in itertools.product(args.profiles, args.modes, args.windows, args.sizes):
+            proxy = ImpairmentProxy(('127.0.0.1', 0), ('127.0.0.1', args.port), PROFILES[profile], seed=args.seed).start()
+            try:
+                completed, seconds = run_client(args, files[size], window, mode, proxy, stats_path)
+            finally:
+                proxy.stop()
+            ok = completed and wait_for_output(output_dir, files[size])
+            stats = {}
+            if os.path.exists(stats_path):
+                with open(stats_path) as f:
+                    stats = json.load(f)
+                os.remove(stats_path)
+            counters = stats.get('counters', {})
+            rows.append({
+                'profile': profile, 'mode': mode, 'window': window, 'size': size, 'ok': ok, 'seconds': round(seconds, 3),
+                'goodput_mbps': stats.get('goodput_mbps', 0.0), 'throughput_mbps': stats.get('throughput_mbps', 0.0),
+                'packets_sent': counters.get('packets_sent', 0), 'packets_retransmitted': counters.get('packets_retransmitted', 0),
+                'timeouts': counters.get('timeouts', 0), 'proxy_lost': proxy.stats['lost'],
+                'proxy_reordered': proxy.stats['reordered'], 'proxy_duplicated': proxy.stats['duplicated'],
+            })
+            print_row(rows[-1])
+            # Tømmer mappen slik at neste overføring kan kjennes igjen
+            for name in os.listdir(output_dir):
+                os.remove(os.path.join(output_dir, name))
+    finally:
+        server.terminate()
+        server.wait()
+    return rows
+
+# Beskrivelse av funksjonen:
+# Funksjon for å skrive ut en rad i resultattabellen
+# Argumenter:
+# row: Raden, eller None for å skrive ut overskriften
+# Retur: Ingen returverdi for denne funksjonen
+def print_row(row=None):
+    if row is None:
+        print(f"{'profil':<10} {'modus':<5} {'vindu':>5} {'KiB':>6} {'ok':<4} {'sek':>8} {'goodput':>9} {'sendt':>7} {'retrans':>7} {'tapt':>5}")
+        return
+    print(f"{row['profile']:<10} {row['mode']:<5} {row['window']:>5} {row['size']:>6} {'ja' if row['ok'] else 'NEI':<4} "
+          f"{row['seconds']:>8.3f} {row['goodput_mbps']:>9.2f} {row['packets_sent']:>7} {row['packets_retransmitted']:>7} {row['proxy_lost']:>5}", flush=True)
+
+# Beskrivelse av funksjonen:
+# Funksjon for å finne målinger der goodput har gått ned siden en tidligere kjøring
+# Argumenter:
+# rows: Resultatene fra denne kjøringen
+# baseline_path: CSV-filen fra den tidligere kjøringen
+# tolerance: Hvor mye lavere goodput som godtas, som andel
+# Retur: Returnerer en liste med (rad, goodput i baseline) for hver regresjon
+def find_regressions(rows, baseline_path, tolerance):
+    with open(baseline_path, newline='') as f:
+        baseline = {tuple(row[key] for key in KEY): float(row['goodput_mbps']) for row in csv.DictReader(f)}
+    regressions = []
+    for row in rows:
+        expected = baseline.get(tuple(str(row[key]) for key in KEY))
+        if expected is not None and row['goodput_mbps'] < expected * (1 - tolerance):
+            regressions.append((row, expected))
+    return regressions
+
+# Beskrivelse av funksjonen:
+# Hovedfunksjonen til benchmarken.
+# Funksjonen gjør:
+# Kjører målingen, lagrer resultatene og sammenligner dem med en tidligere kjøring hvis det er bedt om
+# Retur: Ingen returverdi for denne funksjonen. Avslutter med feilstatus hvis en fil ble feil overført eller goodput har gått ned.
+def main():
+    args = parse_arguments()
+    workdir = tempfile.mkdtemp(prefix='drtp-bench-')
+    print_row()
+    try:
+        rows = run_benchmark(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Resultatene er lagret i {args.csv}")
+
+    failed = [row for row in rows if not row['ok']]
+    for row in failed:
+        print(f"FEIL: {row['profile']}/{row['mode']} vindu={row['window']} {row['size']} KiB ble ikke overført riktig")
+    regressions = find_regressions(rows, args.baseline, args.tolerance) if args.baseline else []
+    for row, expected in regressions:
+        print(f"REGRESJON: {row['profile']}/{row['mode']} vindu={row['window']} {row['size']} KiB: "
+              f"{row['goodput_mbps']:.2f} Mbps mot {expected:.2f} Mbps i {args.baseline}")
+    if failed or regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
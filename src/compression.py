@@ -0,0 +1,229 @@
+# Komprimering (--compress). Kodekene, rammene klienten sender (ChunkCompressor) og tolkeren av rammene på serveren (FrameDecoder).
+# Importerer nødvendige biblioteker
+import collections
+import concurrent.futures
+import mmap
+import os
+import struct
+import zlib
+# lzma og bz2 er valgfrie moduler i Python og mangler i noen bygg. Da tilbys bare zlib.
+try:
+    import lzma
+except ImportError:
+    lzma = None
+try:
+    import bz2
+except ImportError:
+    bz2 = None
+
+# Komprimering (--compress). Klienten deler filen i blokker og komprimerer dem i en trådpool foran sendevinduet.
+# Hver blokk sendes som en ramme med et hode som sier om nyttelasten er komprimert, lengden i strømmen og lengden i filen.
+# Blokker som ikke blir mindre (f.eks. JPEG), sendes som de er. Serveren dekomprimerer i skrivetråden.
+AVAILABLE_CODECS = tuple(name for name, module in (('zlib', zlib), ('lzma', lzma), ('bz2', bz2)) if module is not None)
+COMPRESS_FRAME = struct.Struct('!BII')
+FRAME_RAW = 0
+FRAME_COMPRESSED = 1
+COMPRESS_CHUNK = 1 << 18
+# Antall tråder som komprimerer, og hvor mange blokker som komprimeres foran sendingen
+COMPRESS_WORKERS = min(4, os.cpu_count() or 1)
+COMPRESS_AHEAD = 2 * COMPRESS_WORKERS
+# En komprimert blokk brukes bare hvis den er mindre enn denne andelen av originalen
+COMPRESS_MIN_RATIO = 0.95
+# Etter en blokk som ikke lot seg komprimere, sendes de neste blokkene som de er uten å prøve.
+# Antallet dobles for hver slik blokk på rad, opp til denne grensen.
+COMPRESS_MAX_SKIP = 64
+
+# Beskrivelse av funksjonen:
+# Funksjon for å komprimere en blokk
+# Argumenter:
+# codec: Kodeken ('zlib', 'lzma' eller 'bz2')
+# data: Blokken
+# Funksjonen gjør:
+# Bruker raske nivåer, siden komprimeringen må holde følge med nettverket. Kodekene slipper GIL-en, så blokker kan komprimeres i tråder.
+# Retur: Returnerer den komprimerte blokken
+def compress_chunk(codec, data):
+    if codec == 'zlib':
+        return zlib.compress(data, 1)
+    if codec == 'lzma':
+        return lzma.compress(data, preset=1)
+    return bz2.compress(data)
+
+# Beskrivelse av funksjonen:
+# Funksjon for å dekomprimere en ramme
+# Argumenter:
+# codec: Kodeken
+# data: Den komprimerte blokken
+# length: Lengden blokken skal ha
+# Funksjonen gjør:
+# Dekomprimerer aldri mer enn length byte, slik at en ødelagt eller ondsinnet ramme ikke kan fylle minnet
+# Retur: Returnerer blokken
+# Unntakshåndtering: Kaster ValueError hvis blokken ikke har riktig lengde etter dekomprimering
+def decompress_frame(codec, data, length):
+    if codec == 'zlib':
+        decompressor = zlib.decompressobj()
+    elif codec == 'lzma':
+        decompressor = lzma.LZMADecompressor()
+    else:
+        decompressor = bz2.BZ2Decompressor()
+    try:
+        output = decompressor.decompress(data, length)
+    except (zlib.error, OSError, EOFError) as e:
+        raise ValueError(f"ødelagt ramme: {e}")
+    if len(output) != length:
+        raise ValueError(f"rammen ga {len(output)} byte, ventet {length}")
+    return output
+
+# Lager strømmen av rammer klienten sender ved komprimering. Brukes av SendBuffer som en fil (readinto).
+class ChunkCompressor:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til ChunkCompressor-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle ChunkCompressor-objektet
+    # f: Filen, åpnet for lesing
+    # offset: Hvor i filen området starter, i byte
+    # length: Lengden på området i byte
+    # codec: Kodeken
+    # Funksjonen gjør:
+    # Minnekartlegger filen, slik at blokkene gis til trådene uten å kopieres, og starter trådpoolen
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, f, offset, length, codec):
+        self.codec = codec
+        self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if length else None
+        self.source = memoryview(self.mapping)[offset:offset + length] if length else memoryview(b'')
+        self.pool = concurrent.futures.ThreadPoolExecutor(COMPRESS_WORKERS)
+        # Blokkene som er sendt til trådene: (blokk, future eller None hvis blokken sendes som den er)
+        self.pending = collections.deque()
+        self.position = 0
+        # Delene av rammen som leses ut (hode og nyttelast)
+        self.parts = collections.deque()
+        self.skip = 0
+        self.backoff = 1
+        self.chunks = 0
+        self.compressed = 0
+        self.bytes_out = 0
+
+    # Beskrivelse av funksjonen:
+    # Fyller bufferen med neste del av strømmen
+    # Argumenter:
+    # self: Referanse til det aktuelle ChunkCompressor-objektet
+    # buffer: Bufferen som fylles (bytearray eller memoryview)
+    # Funksjonen gjør:
+    # Sørger for at COMPRESS_AHEAD blokker er på vei gjennom trådene, og fyller bufferen helt hvis strømmen ikke er slutt
+    # Retur: Returnerer antall byte som ble skrevet i bufferen, 0 når strømmen er slutt
+    def readinto(self, buffer):
+        filled = 0
+        while filled < len(buffer):
+            if not self.parts and not self.next_frame():
+                break
+            part = self.parts[0]
+            count = min(len(part), len(buffer) - filled)
+            buffer[filled:filled + count] = part[:count]
+            filled += count
+            if count == len(part):
+                self.parts.popleft()
+            else:
+                self.parts[0] = part[count:]
+        self.bytes_out += filled
+        return filled
+
+    # Beskrivelse av funksjonen:
+    # Henter neste ramme
+    # Argumenter:
+    # self: Referanse til det aktuelle ChunkCompressor-objektet
+    # Funksjonen gjør:
+    # Venter på at tråden er ferdig med den eldste blokken og velger den komprimerte eller den opprinnelige blokken.
+    # En blokk som ikke ble mindre, gjør at de neste blokkene sendes uten å prøve, og antallet dobles for hver gang.
+    # Retur: Returnerer False hvis strømmen er slutt
+    def next_frame(self):
+        while len(self.pending) < COMPRESS_AHEAD and self.position < len(self.source):
+            chunk = self.source[self.position:self.position + COMPRESS_CHUNK]
+            self.position += len(chunk)
+            if self.skip:
+                self.skip -= 1
+                self.pending.append((chunk, None))
+            else:
+                self.pending.append((chunk, self.pool.submit(compress_chunk, self.codec, chunk)))
+        if not self.pending:
+            return False
+        chunk, future = self.pending.popleft()
+        data = future.result() if future is not None else None
+        self.chunks += 1
+        if data is not None and len(data) < len(chunk) * COMPRESS_MIN_RATIO:
+            self.parts.extend((COMPRESS_FRAME.pack(FRAME_COMPRESSED, len(data), len(chunk)), memoryview(data)))
+            self.compressed += 1
+            self.backoff = 1
+        else:
+            self.parts.extend((COMPRESS_FRAME.pack(FRAME_RAW, len(chunk), len(chunk)), chunk))
+            if future is not None:
+                self.skip = self.backoff
+                self.backoff = min(self.backoff * 2, COMPRESS_MAX_SKIP)
+        return True
+
+    # Beskrivelse av funksjonen:
+    # Stopper trådene og lukker minnekartleggingen
+    # Argumenter:
+    # self: Referanse til det aktuelle ChunkCompressor-objektet
+    # Retur: Ingen returverdi for denne funksjonen.
+    def close(self):
+        self.pool.shutdown(wait=True)
+        self.pending.clear()
+        self.parts.clear()
+        self.source.release()
+        if self.mapping is not None:
+            try:
+                self.mapping.close()
+            except BufferError:
+                # Et utsnitt lever fortsatt i sendevinduet, og kartleggingen lukkes når det blir ryddet bort
+                pass
+
+# Tolker strømmen av rammer på serveren. Rammene kan være delt over flere pakker.
+class FrameDecoder:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til FrameDecoder-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle FrameDecoder-objektet
+    # connection: Forbindelsen (Connection) som tar imot strømmen
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, connection):
+        self.connection = connection
+        self.header = bytearray()
+        self.kind = FRAME_RAW
+        # Antall byte som gjenstår av rammen som leses, og lengden blokken skal ha
+        self.remaining = 0
+        self.length = 0
+        self.frame = bytearray()
+
+    # Beskrivelse av funksjonen:
+    # Tar imot neste del av strømmen
+    # Argumenter:
+    # self: Referanse til det aktuelle FrameDecoder-objektet
+    # data: Nyttelasten til neste pakke i rekkefølge
+    # Funksjonen gjør:
+    # Ukomprimerte rammer skrives rett med connection.store. Komprimerte rammer samles og gis til skrivetråden med connection.decompress.
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster ValueError hvis strømmen er ødelagt
+    def feed(self, data):
+        data = memoryview(data)
+        while data:
+            if self.remaining:
+                count = min(self.remaining, len(data))
+                if self.kind == FRAME_RAW:
+                    self.connection.store(data[:count])
+                else:
+                    self.frame.extend(data[:count])
+                self.remaining -= count
+                data = data[count:]
+                if not self.remaining and self.kind == FRAME_COMPRESSED:
+                    self.connection.decompress(bytes(self.frame), self.length)
+                    self.frame.clear()
+                continue
+            count = min(COMPRESS_FRAME.size - len(self.header), len(data))
+            self.header.extend(data[:count])
+            data = data[count:]
+            if len(self.header) < COMPRESS_FRAME.size:
+                break
+            self.kind, self.remaining, self.length = COMPRESS_FRAME.unpack(self.header)
+            self.header.clear()
+            if self.kind not in (FRAME_RAW, FRAME_COMPRESSED) or self.length > COMPRESS_CHUNK or \
+                    (self.kind == FRAME_RAW and self.remaining != self.length) or (self.kind == FRAME_COMPRESSED and not self.remaining):
+                raise ValueError("ugyldig ramme i den komprimerte strømmen")
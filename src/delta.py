@@ -0,0 +1,274 @@
+# Deltaoverføring (--delta). Klienten koder filen mot sjekksummene til den forrige versjonen (delta_records, DeltaEncoder),
+# og serveren leser sjekksummene fra den forrige versjonen (Basis) og bygger den nye filen av postene (DeltaDecoder).
+# Importerer nødvendige biblioteker
+import hashlib
+import os
+import struct
+import zlib
+
+# Deltaoverføring (--delta), som i rsync. Serveren deler den forrige versjonen av filen i blokker og sender en svak
+# (adler32, kan rulles én byte om gangen) og en sterk (blake2b) sjekksum per blokk. Klienten leter etter blokkene i filen
+# sin på alle posisjoner, og sender en strøm av poster: COPY (kopier blokker fra den forrige versjonen) og LITERAL (nye byte).
+# Serveren bygger den nye filen av postene, så antall byte som sendes følger størrelsen på endringen og ikke på filen.
+DELTA_LITERAL = struct.Struct('!cI')
+DELTA_COPY = struct.Struct('!cII')
+# Sjekksummene for én blokk i svaret på en forespørsel om signaturer
+SIGNATURE_ENTRY = struct.Struct('!I16s')
+DELTA_DIGEST_SIZE = 16
+# Blokkstørrelsen er omtrent kvadratroten av filstørrelsen, innenfor disse grensene
+DELTA_MIN_BLOCK = 2048
+DELTA_MAX_BLOCK = 1 << 16
+# Største antall byte klienten leter gjennom én byte om gangen (i Python). Deretter prøves bare hele blokker,
+# slik at en fil som er helt ulik den forrige versjonen ikke tar lang tid å kode.
+DELTA_ROLL_LIMIT = 4 << 20
+# Største lengde på én LITERAL-post. Nye byte deles i poster på høyst så mange byte, slik at de kan sendes mens resten
+# av filen fortsatt kodes.
+DELTA_MAX_LITERAL = 1 << 18
+ADLER_MOD = 65521
+
+# Beskrivelse av funksjonen:
+# Funksjon for å regne ut den sterke sjekksummen til en blokk
+# Argumenter:
+# data: Blokken
+# Retur: Returnerer sjekksummen som bytes
+def block_digest(data):
+    return hashlib.blake2b(data, digest_size=DELTA_DIGEST_SIZE).digest()
+
+# Beskrivelse av funksjonen:
+# Funksjon for å velge blokkstørrelse for deltaoverføring
+# Argumenter:
+# size: Størrelsen på den forrige versjonen av filen
+# Retur: Returnerer blokkstørrelsen i byte, et multiplum av 1024
+def delta_block_size(size):
+    block = -(-int(size ** 0.5) // 1024) * 1024
+    return min(max(block, DELTA_MIN_BLOCK), DELTA_MAX_BLOCK)
+
+# Beskrivelse av funksjonen:
+# Funksjon for å lage deltastrømmen klienten sender, litt om gangen
+# Argumenter:
+# source: Filen som skal sendes (bytes, mmap eller memoryview)
+# block: Blokkstørrelsen serveren valgte
+# size: Størrelsen på den forrige versjonen av filen
+# signatures: Liste med (svak, sterk) sjekksum for hver blokk i den forrige versjonen
+# Funksjonen gjør:
+# Ruller den svake sjekksummen gjennom filen, og når den treffer en blokk og den sterke også stemmer, blir blokken en COPY-post.
+# Blokker som følger etter hverandre i den forrige versjonen, slås sammen til én post. Det som ikke passer, sendes som LITERAL.
+# Den siste blokken i den forrige versjonen kan være kortere enn de andre, og kan bare passe helt på slutten av filen.
+# Postene gis ut så snart de er klare, og nye byte som utsnitt av filen, så minnebruken er den samme uansett filstørrelse.
+# Retur: Returnerer en generator med delene av strømmen (posthoder som bytes og nye byte som memoryview)
+def delta_records(source, block, size, signatures):
+    lookup = {}
+    for index, (weak, strong) in enumerate(signatures):
+        lookup.setdefault(weak, {}).setdefault(strong, index)
+    copy = None  # [første blokk, antall] som ikke er gitt ut ennå
+    literal = 0  # Starten på de nye bytene som ikke er gitt ut ennå
+
+    def emit_literal(view, end):
+        nonlocal copy, literal
+        if copy is not None:
+            yield DELTA_COPY.pack(b'C', *copy)
+            copy = None
+        for start in range(literal, end, DELTA_MAX_LITERAL):
+            stop = min(start + DELTA_MAX_LITERAL, end)
+            yield DELTA_LITERAL.pack(b'L', stop - start)
+            yield view[start:stop]
+        literal = end
+
+    def emit_copy(index):
+        nonlocal copy
+        if copy is not None and copy[0] + copy[1] == index:
+            copy[1] += 1
+        else:
+            if copy is not None:
+                yield DELTA_COPY.pack(b'C', *copy)
+            copy = [index, 1]
+
+    def find(data, checksum):
+        candidates = lookup.get(checksum)
+        return candidates.get(block_digest(data)) if candidates else None
+
+    with memoryview(source) as view:
+        length = len(view)
+        position = 0
+        budget = DELTA_ROLL_LIMIT
+        checksum = None
+        while position + block <= length:
+            # Nye byte som ikke lenger kan bli en del av en blokk, gis ut med en gang
+            if position - literal >= DELTA_MAX_LITERAL:
+                yield from emit_literal(view, position)
+            if checksum is None:
+                checksum = zlib.adler32(view[position:position + block])
+            # Den sterke sjekksummen regnes bare ut når den svake treffer
+            index = find(view[position:position + block], checksum) if checksum in lookup else None
+            if index is not None and (index + 1) * block <= size:
+                if position > literal:
+                    yield from emit_literal(view, position)
+                yield from emit_copy(index)
+                position += block
+                literal = position
+                checksum = None
+            elif budget > 0 and position + block < length:
+                # Ruller sjekksummen én byte frem: fjerner byten som går ut av blokken og legger til den som kommer inn
+                out, new = view[position], view[position + block]
+                a = ((checksum & 0xFFFF) - out + new) % ADLER_MOD
+                b = ((checksum >> 16) - block * out + a - 1) % ADLER_MOD
+                checksum = (b << 16) | a
+                position += 1
+                budget -= 1
+            else:
+                position += block
+                checksum = None
+        # Den siste, kortere blokken i den forrige versjonen
+        tail = size % block
+        if tail and signatures and length - literal >= tail:
+            data = view[length - tail:length]
+            if find(data, zlib.adler32(data)) == len(signatures) - 1:
+                if length - tail > literal:
+                    yield from emit_literal(view, length - tail)
+                yield from emit_copy(len(signatures) - 1)
+                literal = length
+            data.release()
+        if length > literal:
+            yield from emit_literal(view, length)
+    if copy is not None:
+        yield DELTA_COPY.pack(b'C', *copy)
+
+# Lager deltastrømmen klienten sender mens den sendes. Brukes av SendBuffer som en fil (readinto), som ChunkCompressor.
+class DeltaEncoder:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til DeltaEncoder-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle DeltaEncoder-objektet
+    # source: Filen som skal sendes (bytes, mmap eller memoryview)
+    # block, size, signatures: Som for delta_records
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, source, block, size, signatures):
+        self.records = delta_records(source, block, size, signatures)
+        # Delen av strømmen som leses ut
+        self.part = b''
+        self.bytes_out = 0
+
+    # Beskrivelse av funksjonen:
+    # Fyller bufferen med neste del av deltastrømmen
+    # Argumenter:
+    # self: Referanse til det aktuelle DeltaEncoder-objektet
+    # buffer: Bufferen som fylles (bytearray eller memoryview)
+    # Funksjonen gjør:
+    # Koder bare så mye av filen som trengs for å fylle bufferen
+    # Retur: Returnerer antall byte som ble skrevet i bufferen, 0 når strømmen er slutt
+    def readinto(self, buffer):
+        filled = 0
+        while filled < len(buffer):
+            if not self.part:
+                self.part = next(self.records, b'')
+                if not self.part:
+                    break
+            count = min(len(self.part), len(buffer) - filled)
+            buffer[filled:filled + count] = self.part[:count]
+            self.part = self.part[count:]
+            filled += count
+        self.bytes_out += filled
+        return filled
+
+    # Beskrivelse av funksjonen:
+    # Stopper kodingen og slipper filen
+    # Argumenter:
+    # self: Referanse til det aktuelle DeltaEncoder-objektet
+    # Retur: Ingen returverdi for denne funksjonen.
+    def close(self):
+        self.part = b''
+        self.records.close()
+
+# Den forrige versjonen av en fil på serveren, som deltaoverføringen bygger på
+class Basis:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til Basis-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle Basis-objektet
+    # filename: Filen med den forrige versjonen
+    # Funksjonen gjør:
+    # Åpner filen for lesing og velger blokkstørrelse
+    # Retur: Ingen returverdi for denne funksjonen.
+    # Unntakshåndtering: Kaster OSError hvis filen ikke kan åpnes
+    def __init__(self, filename):
+        self.filename = filename
+        self.fd = os.open(filename, os.O_RDONLY)
+        self.size = os.fstat(self.fd).st_size
+        self.block = delta_block_size(self.size)
+        self.blocks = -(-self.size // self.block)
+
+    # Beskrivelse av funksjonen:
+    # Regner ut sjekksummene for en rekke blokker
+    # Argumenter:
+    # self: Referanse til det aktuelle Basis-objektet
+    # first: Den første blokken
+    # count: Antall blokker
+    # Funksjonen gjør:
+    # Sjekksummene regnes ut først når klienten ber om dem, så hendelsesløkken aldri leser hele filen på én gang
+    # Retur: Returnerer sjekksummene pakket med SIGNATURE_ENTRY
+    def signatures(self, first, count):
+        entries = bytearray()
+        for index in range(first, min(first + count, self.blocks)):
+            data = os.pread(self.fd, self.block, index * self.block)
+            entries.extend(SIGNATURE_ENTRY.pack(zlib.adler32(data), block_digest(data)))
+        return entries
+
+    # Beskrivelse av funksjonen:
+    # Lukker filen
+    # Argumenter:
+    # self: Referanse til det aktuelle Basis-objektet
+    # Retur: Ingen returverdi for denne funksjonen
+    def close(self):
+        os.close(self.fd)
+
+# Tolker deltastrømmen på serveren. Postene kan være delt over flere pakker, så en halv post huskes til neste pakke.
+class DeltaDecoder:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til DeltaDecoder-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle DeltaDecoder-objektet
+    # connection: Forbindelsen (Connection) som tar imot strømmen
+    # basis: Den forrige versjonen av filen
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, connection, basis):
+        self.connection = connection
+        self.basis = basis
+        self.header = bytearray()
+        # Antall byte som gjenstår av LITERAL-posten som leses
+        self.literal = 0
+
+    # Beskrivelse av funksjonen:
+    # Tar imot neste del av deltastrømmen
+    # Argumenter:
+    # self: Referanse til det aktuelle DeltaDecoder-objektet
+    # data: Nyttelasten til neste pakke i rekkefølge
+    # Funksjonen gjør:
+    # Nye byte skrives med connection.store, og blokker fra den forrige versjonen kopieres med connection.copy
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster ValueError hvis strømmen er ødelagt
+    def feed(self, data):
+        data = memoryview(data)
+        while data:
+            if self.literal:
+                count = min(self.literal, len(data))
+                self.connection.store(data[:count])
+                self.literal -= count
+                data = data[count:]
+                continue
+            if not self.header and data[0:1] not in (b'L', b'C'):
+                raise ValueError("ukjent post i deltastrømmen")
+            size = DELTA_LITERAL.size if (self.header or data)[0:1] == b'L' else DELTA_COPY.size
+            count = min(size - len(self.header), len(data))
+            self.header.extend(data[:count])
+            data = data[count:]
+            if len(self.header) < size:
+                break
+            if size == DELTA_LITERAL.size:
+                self.literal = DELTA_LITERAL.unpack(self.header)[1]
+            else:
+                _, first, blocks = DELTA_COPY.unpack(self.header)
+                if first + blocks > self.basis.blocks:
+                    raise ValueError("COPY-posten går forbi slutten av den forrige versjonen")
+                start = first * self.basis.block
+                self.connection.copy(start, min(blocks * self.basis.block, self.basis.size - start))
+            self.header.clear()
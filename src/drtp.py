@@ -0,0 +1,384 @@
+# DRTP som bibliotek. Sender og tar imot data fra et annet Python-program uten kommandolinjen, uten filer på disk
+# og uten en ny prosess per overføring. Klienten og serveren er de samme som i application.py.
+#
+#     import drtp
+#     drtp.send(frame, '10.0.0.2', 8080, name='frame.raw')               # bytes, bytearray, memoryview, mmap ...
+#     with drtp.Sender('10.0.0.2', 8080, window_size=64) as sender:      # samme socket for alle overføringene
+#         for frame in camera:
+#             sender.send(frame)
+#     drtp.serve(lambda stream, data: ..., '0.0.0.0', 8080)              # data er None når overføringen er ferdig
+#
+#     async with drtp.Receiver(port=8080) as receiver:
+#         async for stream in receiver:
+#             async for chunk in stream:
+#                 ...
+#
+# drtp.py og modulene den bruker (application.py, compression.py, delta.py og fec.py) må ligge i en mappe på importstien,
+# f.eks. med PYTHONPATH=src eller ved å legge filene ved siden av programmet. Modulen endrer ikke sys.path selv.
+#
+# Importerer nødvendige biblioteker
+import asyncio
+import inspect
+import socket
+import threading
+
+from application import Client, Server, LOG_SILENT
+
+# Største datagram som kan ligge igjen på en socket som brukes på nytt (et UDP-datagram over IPv4 kan ha maks 65507 byte)
+MAX_DATAGRAM = 65507
+
+# Beskrivelse av funksjonen:
+# Funksjon for å lese en asynkron iterator fra en annen tråd enn hendelsesløkken
+# Argumenter:
+# iterable: Den asynkrone iteratoren (f.eks. en async generator)
+# loop: Hendelsesløkken iteratoren hører til
+# Funksjonen gjør:
+# Henter hver bit med run_coroutine_threadsafe, slik at klienten kan lese den som en vanlig iterator i sin egen tråd
+# Retur: Returnerer en generator med bitene
+def iterate_async(iterable, loop):
+    iterator = iterable.__aiter__()
+    # Slutten markeres med et eget objekt, siden StopAsyncIteration ikke kan gå gjennom en Future
+    end = object()
+
+    async def next_chunk():
+        try:
+            return await iterator.__anext__()
+        except StopAsyncIteration:
+            return end
+
+    while True:
+        chunk = asyncio.run_coroutine_threadsafe(next_chunk(), loop).result()
+        if chunk is end:
+            return
+        yield chunk
+
+# Sender data til en DRTP-server over én UDP-socket som brukes for alle overføringene. Hver overføring har sin egen
+# forbindelse (håndtrykk og nedbryting), men det lages ingen ny socket eller prosess, og serveren ser samme adresse hver gang.
+class Sender:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til Sender-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle Sender-objektet
+    # ip: IP-adressen til serveren
+    # port: Portnummeret til serveren
+    # window_size: Øvre grense for størrelsen på skyvevinduet
+    # mode: Pålitelighetsmodusen ('gbn' eller 'sr')
+    # log_level: Hvor mye klienten skriver ut (standard: ingenting)
+    # options: Andre argumenter til Client, f.eks. cc, payload_size, fec, rate eller socket_buffer
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, ip='127.0.0.1', port=8080, window_size=3, mode='gbn', log_level=LOG_SILENT, **options):
+        self.ip = ip
+        self.port = port
+        self.window_size = window_size
+        self.mode = mode
+        self.log_level = log_level
+        self.options = options
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Én overføring om gangen bruker socketen
+        self.lock = threading.Lock()
+
+    # Beskrivelse av funksjonen:
+    # Sender data til serveren og venter til alt er bekreftet
+    # Argumenter:
+    # self: Referanse til det aktuelle Sender-objektet
+    # source: Dataene. Et objekt med bufferprotokollen sendes rett fra minnet. Et objekt med readinto eller read, eller en
+    # iterator med bytes, leses til det er tomt, og serveren får da ikke vite størrelsen på forhånd (krever pakkehode versjon 2).
+    # name: Navnet serveren får for dataene, eller None
+    # Funksjonen gjør:
+    # Tømmer socketen for pakker fra forrige overføring og sender dataene med en ny klient på samme socket
+    # Retur: Returnerer True hvis serveren bekreftet alle dataene, ellers False
+    # Unntakshåndtering: Kaster unntaket kilden kastet hvis lesingen feilet
+    def send(self, source, name=None):
+        with self.lock:
+            self.drain()
+            client = Client(self.ip, self.port, None, self.window_size, None, self.mode, log_level=self.log_level,
+                            source=source, name=name, sock=self.sock, **self.options)
+            completed = client.connect()
+        error = getattr(client.source, 'error', None)
+        if error is not None:
+            raise error
+        return completed
+
+    # Beskrivelse av funksjonen:
+    # Sender data uten å blokkere hendelsesløkken
+    # Argumenter:
+    # self: Referanse til det aktuelle Sender-objektet
+    # source: Dataene, som for send. En asynkron iterator med bytes kan også brukes.
+    # name: Navnet serveren får for dataene, eller None
+    # Funksjonen gjør:
+    # Kjører send i en tråd fra hendelsesløkkens executor
+    # Retur: Returnerer True hvis serveren bekreftet alle dataene, ellers False
+    async def asend(self, source, name=None):
+        loop = asyncio.get_running_loop()
+        if hasattr(source, '__aiter__'):
+            source = iterate_async(source, loop)
+        return await loop.run_in_executor(None, self.send, source, name)
+
+    # Beskrivelse av funksjonen:
+    # Leser bort pakker som ligger igjen på socketen
+    # Argumenter:
+    # self: Referanse til det aktuelle Sender-objektet
+    # Funksjonen gjør:
+    # Sene ACK-er fra forrige overføring skal ikke leses som svar i neste håndtrykk
+    # Retur: Ingen returverdi for denne funksjonen
+    def drain(self):
+        self.sock.setblocking(False)
+        try:
+            while True:
+                self.sock.recv(MAX_DATAGRAM)
+        except OSError:
+            # Socketen er tom (BlockingIOError) eller har en ICMP-feil fra forrige overføring
+            pass
+
+    # Beskrivelse av funksjonen:
+    # Lukker socketen
+    # Argumenter:
+    # self: Referanse til det aktuelle Sender-objektet
+    # Retur: Ingen returverdi for denne funksjonen
+    def close(self):
+        self.sock.close()
+
+    # Beskrivelse av funksjonen:
+    # Gjør at senderen kan brukes med with og async with
+    # Argumenter:
+    # self: Referanse til det aktuelle Sender-objektet
+    # exc_info: Unntaket som avsluttet blokken, hvis noe
+    # Funksjonen gjør:
+    # Socketen lukkes når blokken er ferdig
+    # Retur: __enter__ og __aenter__ returnerer senderen
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sende data med én overføring
+# Argumenter:
+# source: Dataene, som for Sender.send
+# ip: IP-adressen til serveren
+# port: Portnummeret til serveren
+# name: Navnet serveren får for dataene, eller None
+# options: Argumentene til Sender
+# Retur: Returnerer True hvis serveren bekreftet alle dataene, ellers False
+def send(source, ip='127.0.0.1', port=8080, name=None, **options):
+    with Sender(ip, port, **options) as sender:
+        return sender.send(source, name)
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sende data med én overføring uten å blokkere hendelsesløkken
+# Argumenter:
+# source: Dataene, som for Sender.asend
+# ip: IP-adressen til serveren
+# port: Portnummeret til serveren
+# name: Navnet serveren får for dataene, eller None
+# options: Argumentene til Sender
+# Retur: Returnerer True hvis serveren bekreftet alle dataene, ellers False
+async def asend(source, ip='127.0.0.1', port=8080, name=None, **options):
+    async with Sender(ip, port, **options) as sender:
+        return await sender.asend(source, name)
+
+# En overføring som tas imot med async for. Bitene kommer i rekkefølge, og iterasjonen slutter når overføringen er ferdig.
+# complete sier da om alt kom frem.
+class ReceivedStream:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til ReceivedStream-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle ReceivedStream-objektet
+    # transfer: StreamTransfer-objektet til overføringen på serveren
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, transfer):
+        self.transfer = transfer
+        self.name = transfer.name
+        self.size = transfer.size
+        self.address = transfer.address
+        # Bitene som ikke er lest ennå, og None til slutt. Køen er ubegrenset, så skrivetråden på serveren aldri venter
+        # på en leser som kanskje ikke kommer. Trenger mottakeren å bremse klienten, brukes en handler i stedet.
+        self.chunks = asyncio.Queue()
+
+    # Beskrivelse av funksjonen:
+    # Sier om hele overføringen kom frem, gjelder når iterasjonen er ferdig
+    # Argumenter:
+    # self: Referanse til det aktuelle ReceivedStream-objektet
+    # Retur: Returnerer True hvis alt kom frem
+    @property
+    def complete(self):
+        return self.transfer.complete
+
+    # Beskrivelse av funksjonen:
+    # Gjør at overføringen kan leses med async for
+    # Argumenter:
+    # self: Referanse til det aktuelle ReceivedStream-objektet
+    # Retur: __anext__ returnerer neste bit som bytes
+    # Unntakshåndtering: __anext__ kaster StopAsyncIteration når overføringen er ferdig
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        data = await self.chunks.get()
+        if data is None:
+            # Slutten blir liggende, slik at en ny iterasjon også slutter
+            self.chunks.put_nowait(None)
+            raise StopAsyncIteration
+        return data
+
+    # Beskrivelse av funksjonen:
+    # Leser resten av overføringen
+    # Argumenter:
+    # self: Referanse til det aktuelle ReceivedStream-objektet
+    # Retur: Returnerer dataene som bytes
+    async def read(self):
+        return b''.join([chunk async for chunk in self])
+
+# Tar imot data fra DRTP-klienter uten å lagre dem i filer. Serveren kjører i en egen tråd (start eller with),
+# i denne tråden (serve_forever), eller sammen med asyncio (async with). Dataene gis til handler(stream, data), der
+# stream er StreamTransfer-objektet til overføringen (name, size, address, complete og error) og data er bytes i
+# rekkefølge, eller None når overføringen er ferdig. Handleren kalles fra serverens skrivetråd, og kan være en
+# korutinefunksjon når Receiver brukes med async with. Uten handler leses overføringene med async for.
+class Receiver:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til Receiver-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle Receiver-objektet
+    # handler: Funksjonen som får dataene, eller None for async for
+    # ip: IP-adressen serveren binder seg til
+    # port: Portnummeret. Port 0 velger en ledig port, som da står i address.
+    # log_level: Hvor mye serveren skriver ut (standard: ingenting)
+    # options: Andre argumenter til Server, f.eks. buffer_size, max_payload, ack_every eller socket_buffer
+    # Retur: Ingen returverdi for denne funksjonen.
+    # Unntakshåndtering: Kaster OSError hvis porten ikke kan brukes
+    def __init__(self, handler=None, ip='127.0.0.1', port=8080, log_level=LOG_SILENT, **options):
+        self.handler = handler
+        self.server = Server(ip, port, None, 3, None, log_level=log_level, handler=self.deliver, **options)
+        self.address = self.server.sock.getsockname()
+        self.thread = None
+        # Hendelsesløkken ved async with, køen med nye overføringer for async for og overføringene som pågår
+        self.loop = None
+        self.incoming = None
+        self.streams = {}
+
+    # Beskrivelse av funksjonen:
+    # Gir data fra serveren videre til handleren eller til async for
+    # Argumenter:
+    # self: Referanse til det aktuelle Receiver-objektet
+    # transfer: StreamTransfer-objektet til overføringen
+    # data: Bytes i rekkefølge, eller None når overføringen er ferdig
+    # Funksjonen gjør:
+    # En korutinefunksjon kjøres på hendelsesløkken, og skrivetråden venter til den er ferdig
+    # Retur: Ingen returverdi for denne funksjonen
+    def deliver(self, transfer, data):
+        if self.handler is None:
+            stream = self.streams.get(transfer)
+            if stream is None:
+                stream = self.streams[transfer] = ReceivedStream(transfer)
+                self.loop.call_soon_threadsafe(self.incoming.put_nowait, stream)
+            if data is None:
+                del self.streams[transfer]
+            self.loop.call_soon_threadsafe(stream.chunks.put_nowait, data)
+        elif inspect.iscoroutinefunction(self.handler):
+            asyncio.run_coroutine_threadsafe(self.handler(transfer, data), self.loop).result()
+        else:
+            self.handler(transfer, data)
+
+    # Beskrivelse av funksjonen:
+    # Kjører serveren i denne tråden til den stoppes (Ctrl+C, SIGTERM eller stop() fra en annen tråd)
+    # Argumenter:
+    # self: Referanse til det aktuelle Receiver-objektet
+    # Retur: Ingen returverdi for denne funksjonen
+    # Unntakshåndtering: Kaster ValueError hvis handleren mangler eller må ha en hendelsesløkke
+    def serve_forever(self):
+        if self.loop is None and (self.handler is None or inspect.iscoroutinefunction(self.handler)):
+            raise ValueError("async for og en async handler krever async with Receiver(...) eller aserve()")
+        try:
+            self.server.start()
+        finally:
+            if self.incoming is not None:
+                # Avslutter async for over overføringene
+                self.loop.call_soon_threadsafe(self.incoming.put_nowait, None)
+
+    # Beskrivelse av funksjonen:
+    # Starter serveren i en egen tråd
+    # Argumenter:
+    # self: Referanse til det aktuelle Receiver-objektet
+    # Retur: Returnerer mottakeren, slik at den kan brukes som receiver = Receiver(...).start()
+    def start(self):
+        if self.loop is None and (self.handler is None or inspect.iscoroutinefunction(self.handler)):
+            raise ValueError("async for og en async handler krever async with Receiver(...) eller aserve()")
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    # Beskrivelse av funksjonen:
+    # Stopper serveren og venter til alle overføringene er lukket og gitt til handleren
+    # Argumenter:
+    # self: Referanse til det aktuelle Receiver-objektet
+    # Retur: Ingen returverdi for denne funksjonen
+    def stop(self):
+        self.server.stop()
+        if self.thread is not None:
+            self.thread.join()
+
+    # Beskrivelse av funksjonen:
+    # Gjør at mottakeren kan brukes med with og async with, og at overføringene kan leses med async for
+    # Argumenter:
+    # self: Referanse til det aktuelle Receiver-objektet
+    # exc_info: Unntaket som avsluttet blokken, hvis noe
+    # Funksjonen gjør:
+    # Serveren startes i en egen tråd når blokken starter, og stoppes når den er ferdig. Med async with brukes
+    # hendelsesløkken for async for og for en async handler.
+    # Retur: __enter__ og __aenter__ returnerer mottakeren, __anext__ neste overføring (ReceivedStream)
+    # Unntakshåndtering: __anext__ kaster StopAsyncIteration når serveren er stoppet
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        if self.handler is None:
+            self.incoming = asyncio.Queue()
+        return self.start()
+
+    async def __aexit__(self, *exc_info):
+        # Skrivetråden kan vente på en korutine, så hendelsesløkken må gå mens serveren stoppes
+        await self.loop.run_in_executor(None, self.stop)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        stream = await self.incoming.get()
+        if stream is None:
+            self.incoming.put_nowait(None)
+            raise StopAsyncIteration
+        return stream
+
+# Beskrivelse av funksjonen:
+# Funksjon for å ta imot data til programmet stoppes (Ctrl+C eller SIGTERM)
+# Argumenter:
+# handler: Funksjonen som får dataene, se Receiver
+# ip: IP-adressen serveren binder seg til
+# port: Portnummeret
+# options: Argumentene til Receiver
+# Retur: Ingen returverdi for denne funksjonen
+def serve(handler, ip='127.0.0.1', port=8080, **options):
+    Receiver(handler, ip, port, **options).serve_forever()
+
+# Beskrivelse av funksjonen:
+# Funksjon for å ta imot data til oppgaven avbrytes (task.cancel())
+# Argumenter:
+# handler: Funksjonen eller korutinefunksjonen som får dataene, se Receiver
+# ip: IP-adressen serveren binder seg til
+# port: Portnummeret
+# options: Argumentene til Receiver
+# Retur: Ingen returverdi for denne funksjonen
+async def aserve(handler, ip='127.0.0.1', port=8080, **options):
+    async with Receiver(handler, ip, port, **options):
+        await asyncio.get_running_loop().create_future()
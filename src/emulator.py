@@ -0,0 +1,298 @@
+# Importerer nødvendige biblioteker
+import socket
+import selectors
+import argparse
+import heapq
+import random
+import threading
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from application import valid_ip, valid_port, valid_seconds
+
+# Største datagram proxyen kan videresende (et UDP-datagram over IPv4 kan ha maks 65507 byte)
+MAX_DATAGRAM = 65507
+
+# Egenskapene til en retning gjennom proxyen. Alle sannsynligheter er mellom 0 og 1.
+# delay: fast forsinkelse i sekunder
+# jitter: tilfeldig ekstra forsinkelse i sekunder, jevnt fordelt mellom 0 og jitter. Jitter endrer ikke rekkefølgen.
+# loss: sannsynligheten for at et datagram forkastes
+# reorder: sannsynligheten for at et datagram holdes tilbake (reorder_delay sekunder) slik at senere datagram kommer først
+# duplicate: sannsynligheten for at et datagram sendes to ganger
+# rate: båndbredden i bit per sekund (0 betyr ubegrenset). Datagram som venter på linken, køes.
+# queue_limit: største antall byte som kan vente på linken før datagram forkastes (bare med rate)
+class Impairment:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til Impairment-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle Impairment-objektet
+    # delay, jitter, loss, reorder, duplicate, rate, queue_limit: Se beskrivelsen av klassen
+    # reorder_delay: Hvor lenge et datagram som stokkes om holdes tilbake, i sekunder
+    # Funksjonen gjør:
+    # Lagrer egenskapene og sjekker at sannsynlighetene er gyldige
+    # Retur: Ingen returverdi for denne funksjonen.
+    # Unntakshåndtering: Kaster ValueError hvis en verdi er ugyldig
+    def __init__(self, delay=0.0, jitter=0.0, loss=0.0, reorder=0.0, duplicate=0.0, rate=0, queue_limit=1 << 20, reorder_delay=0.005):
+        for name, value in (('loss', loss), ('reorder', reorder), ('duplicate', duplicate)):
+            if not 0 <= value <= 1:
+                raise ValueError(f"{name} må være mellom 0 og 1, fikk {value}")
+        if min(delay, jitter, rate, reorder_delay) < 0:
+            raise ValueError("delay, jitter, rate og reorder_delay kan ikke være negative")
+        self.delay = delay
+        self.jitter = jitter
+        self.loss = loss
+        self.reorder = reorder
+        self.duplicate = duplicate
+        self.rate = rate
+        self.queue_limit = queue_limit
+        self.reorder_delay = reorder_delay
+
+    # Beskrivelse av funksjonen:
+    # Lager en tekst som beskriver egenskapene, til bruk i utskrifter
+    # Argumenter:
+    # self: Referanse til det aktuelle Impairment-objektet
+    # Retur: Returnerer teksten
+    def __repr__(self):
+        return (f"Impairment(delay={self.delay}, jitter={self.jitter}, loss={self.loss}, reorder={self.reorder}, "
+                f"duplicate={self.duplicate}, rate={self.rate})")
+
+# Faste profiler som benchmarken bruker. Forsinkelsen gjelder hver retning, så RTT er det dobbelte.
+PROFILES = {
+    'clean': Impairment(),
+    'lan': Impairment(delay=0.0005, jitter=0.0002),
+    'wan': Impairment(delay=0.01, jitter=0.002),
+    'lossy': Impairment(delay=0.002, loss=0.01),
+    'reorder': Impairment(delay=0.002, reorder=0.05),
+    'duplicate': Impairment(delay=0.002, duplicate=0.02),
+    'slow': Impairment(delay=0.005, rate=10_000_000, queue_limit=64 * 1024),
+    'hostile': Impairment(delay=0.01, jitter=0.005, loss=0.02, reorder=0.02, duplicate=0.01, rate=20_000_000),
+}
+
+# En UDP-proxy som emulerer en dårlig linje mellom klient og server. Klienten sender til proxyen,
+# og proxyen sender videre til serveren fra en egen socket per klient, slik at serveren ser hver klient som en egen motpart.
+# Begge retninger kan ha forsinkelse, jitter, tap, omstokking, duplisering og begrenset båndbredde.
+# Tilfeldighetene kommer fra en egen Random med frø (seed), så kjøringer kan gjentas.
+class ImpairmentProxy:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til ImpairmentProxy-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle ImpairmentProxy-objektet
+    # listen: (IP, port) proxyen tar imot klienter på. Port 0 velger en ledig port.
+    # target: (IP, port) til serveren
+    # forward: Impairment for retningen klient -> server
+    # backward: Impairment for retningen server -> klient (standard: samme som forward)
+    # seed: Frø for tilfeldighetene
+    # Funksjonen gjør:
+    # Oppretter og binder socketen klientene sender til
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, listen, target, forward=None, backward=None, seed=1):
+        self.target = target
+        self.forward = forward or Impairment()
+        self.backward = backward or self.forward
+        self.random = random.Random(seed)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(listen)
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+        # Socket mot serveren for hver klient, og klienten hver av dem hører til
+        self.upstream = {}
+        self.clients = {}
+        # Datagram som venter på å bli sendt: (tidspunkt, løpenummer, socket, data, mottaker)
+        self.pending = []
+        self.counter = 0
+        # Når linken i hver retning er ledig igjen, og hvor mange byte som venter på den
+        self.link_free = {'forward': 0.0, 'backward': 0.0}
+        self.queued = {'forward': 0, 'backward': 0}
+        # Når forrige datagram i hver retning kommer frem, slik at jitter ikke stokker om datagram
+        self.last_arrival = {'forward': 0.0, 'backward': 0.0}
+        self.stats = {'forwarded': 0, 'lost': 0, 'reordered': 0, 'duplicated': 0, 'queue_drops': 0}
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.sock, selectors.EVENT_READ)
+        self.running = False
+        self.thread = None
+
+    # Beskrivelse av funksjonen:
+    # Starter proxyen i en egen tråd
+    # Argumenter:
+    # self: Referanse til det aktuelle ImpairmentProxy-objektet
+    # Retur: Returnerer proxyen, slik at den kan brukes som proxy = ImpairmentProxy(...).start()
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    # Beskrivelse av funksjonen:
+    # Stopper proxyen og lukker alle socketene
+    # Argumenter:
+    # self: Referanse til det aktuelle ImpairmentProxy-objektet
+    # Retur: Ingen returverdi for denne funksjonen
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+        self.selector.close()
+        for sock in self.upstream.values():
+            sock.close()
+        self.sock.close()
+
+    # Beskrivelse av funksjonen:
+    # Hendelsesløkken til proxyen
+    # Argumenter:
+    # self: Referanse til det aktuelle ImpairmentProxy-objektet
+    # Funksjonen gjør:
+    # Venter på datagram eller til neste datagram skal sendes, og sender alle datagram som har nådd tidspunktet sitt
+    # Retur: Ingen returverdi for denne funksjonen
+    def run(self):
+        self.running = True
+        while self.running:
+            timeout = 0.05
+            if self.pending:
+                timeout = min(max(self.pending[0][0] - time.monotonic(), 0), timeout)
+            for key, _ in self.selector.select(timeout):
+                self.receive(key.fileobj)
+            now = time.monotonic()
+            while self.pending and self.pending[0][0] <= now:
+                _, _, sock, data, destination, link = heapq.heappop(self.pending)
+                if link is not None:
+                    self.queued[link] -= len(data)
+                try:
+                    sock.sendto(data, destination)
+                    self.stats['forwarded'] += 1
+                except OSError:
+                    pass
+
+    # Beskrivelse av funksjonen:
+    # Leser alle datagram som ligger klare på en socket
+    # Argumenter:
+    # self: Referanse til det aktuelle ImpairmentProxy-objektet
+    # sock: Socketen som har datagram
+    # Funksjonen gjør:
+    # Datagram fra en klient sendes videre mot serveren fra klientens egen socket. Datagram fra serveren sendes tilbake til klienten.
+    # Retur: Ingen returverdi for denne funksjonen
+    def receive(self, sock):
+        while True:
+            try:
+                data, address = sock.recvfrom(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # F.eks. ICMP port unreachable fra en klient som har avsluttet
+                return
+            if sock is self.sock:
+                upstream = self.upstream.get(address)
+                if upstream is None:
+                    upstream = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    upstream.bind((self.address[0], 0))
+                    upstream.setblocking(False)
+                    self.upstream[address] = upstream
+                    self.clients[upstream] = address
+                    self.selector.register(upstream, selectors.EVENT_READ)
+                self.schedule('forward', upstream, data, self.target)
+            else:
+                self.schedule('backward', self.sock, data, self.clients[sock])
+
+    # Beskrivelse av funksjonen:
+    # Bestemmer hva som skjer med et datagram og når det skal sendes
+    # Argumenter:
+    # self: Referanse til det aktuelle ImpairmentProxy-objektet
+    # direction: Retningen datagrammet går i ('forward' eller 'backward')
+    # sock: Socketen datagrammet skal sendes fra
+    # data: Datagrammet
+    # destination: Mottakeren
+    # Funksjonen gjør:
+    # Trekker tap, duplisering og omstokking, legger til forsinkelse og jitter, og køer datagrammet bak linken hvis båndbredden er begrenset
+    # Retur: Ingen returverdi for denne funksjonen
+    def schedule(self, direction, sock, data, destination):
+        impairment = self.forward if direction == 'forward' else self.backward
+        if impairment.loss and self.random.random() < impairment.loss:
+            self.stats['lost'] += 1
+            return
+        copies = 1
+        if impairment.duplicate and self.random.random() < impairment.duplicate:
+            self.stats['duplicated'] += 1
+            copies = 2
+        now = time.monotonic()
+        link = None
+        for _ in range(copies):
+            departure = now
+            if impairment.rate:
+                link = direction
+                if self.queued[link] + len(data) > impairment.queue_limit:
+                    # Køen foran linken er full (tail drop)
+                    self.stats['queue_drops'] += 1
+                    continue
+                departure = max(self.link_free[link], now) + len(data) * 8 / impairment.rate
+                self.link_free[link] = departure
+                self.queued[link] += len(data)
+            arrival = departure + impairment.delay
+            if impairment.jitter:
+                arrival = max(arrival + self.random.uniform(0, impairment.jitter), self.last_arrival[direction])
+            self.last_arrival[direction] = arrival
+            if impairment.reorder and self.random.random() < impairment.reorder:
+                self.stats['reordered'] += 1
+                arrival += impairment.reorder_delay
+            self.counter += 1
+            heapq.heappush(self.pending, (arrival, self.counter, sock, data, destination, link))
+
+# Beskrivelse av funksjonen:
+# Funksjon for å sjekke om en sannsynlighet er gyldig
+# Argumenter:
+# value: Verdien som skal sjekkes
+# Retur: Hvis verdien er mellom 0 og 1, returneres den som flyttall. Hvis ikke, kastes en argumentfeil.
+def valid_probability(value):
+    try:
+        value = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ugyldig sannsynlighet: {value}. Må være et tall.")
+    if not 0 <= value <= 1:
+        raise argparse.ArgumentTypeError(f"Ugyldig sannsynlighet: {value}. Må være mellom 0 og 1.")
+    return value
+
+# Beskrivelse av funksjonen:
+# Funksjon for å analysere kommandolinjeargumenter
+# Argumenter:
+# Ingen argumenter trengs for denne funksjonen siden den bruker argparse biblioteket for å håndtere kommandolinjeargumenter
+# Retur: Returnerer argumentene som ble spesifisert når programmet kjørte
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="UDP-proxy som emulerer forsinkelse, tap, omstokking, duplisering og begrenset båndbredde")
+    parser.add_argument('-i', '--ip', type=valid_ip, default='127.0.0.1', help="IP-adressen proxyen lytter på (standard: 127.0.0.1)")
+    parser.add_argument('-p', '--port', type=valid_port, default=9090, help="Porten proxyen lytter på (standard: 9090)")
+    parser.add_argument('--server-ip', type=valid_ip, default='127.0.0.1', help="IP-adressen til serveren (standard: 127.0.0.1)")
+    parser.add_argument('--server-port', type=valid_port, default=8080, help="Portnummeret til serveren (standard: 8080)")
+    parser.add_argument('--profile', choices=list(PROFILES), help="Bruk en ferdig profil i stedet for verdiene under")
+    parser.add_argument('--delay', type=float, default=0.0, help="Forsinkelse i hver retning i sekunder (standard: 0)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Største tilfeldige ekstra forsinkelse i sekunder (standard: 0)")
+    parser.add_argument('--loss', type=valid_probability, default=0.0, help="Sannsynlighet for tap (standard: 0)")
+    parser.add_argument('--reorder', type=valid_probability, default=0.0, help="Sannsynlighet for omstokking (standard: 0)")
+    parser.add_argument('--reorder-delay', type=valid_seconds, default=0.005, help="Hvor lenge et omstokket datagram holdes tilbake i sekunder (standard: 0.005)")
+    parser.add_argument('--duplicate', type=valid_probability, default=0.0, help="Sannsynlighet for duplisering (standard: 0)")
+    parser.add_argument('--rate', type=float, default=0, help="Båndbredde i Mbit/s, 0 er ubegrenset (standard: 0)")
+    parser.add_argument('--queue', type=int, default=1 << 20, help="Største kø foran linken i byte når --rate er satt (standard: 1048576)")
+    parser.add_argument('--seed', type=int, default=1, help="Frø for tilfeldighetene (standard: 1)")
+    return parser.parse_args()
+
+# Beskrivelse av funksjonen:
+# Hovedfunksjonen til proxyen.
+# Funksjonen gjør:
+# Starter proxyen med egenskapene fra kommandolinjen og kjører til den blir stoppet med Ctrl+C
+# Retur: Ingen returverdi for denne funksjonen
+def main():
+    args = parse_arguments()
+    if args.profile:
+        impairment = PROFILES[args.profile]
+    else:
+        impairment = Impairment(args.delay, args.jitter, args.loss, args.reorder, args.duplicate, int(args.rate * 1e6), args.queue, args.reorder_delay)
+    proxy = ImpairmentProxy((args.ip, args.port), (args.server_ip, args.server_port), impairment, seed=args.seed)
+    print(f"Proxy på {proxy.address[0]}:{proxy.address[1]} -> {args.server_ip}:{args.server_port} med {impairment}")
+    try:
+        proxy.run()
+    except KeyboardInterrupt:
+        print(f"\nProxyen stoppes: {proxy.stats}")
+    finally:
+        proxy.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# Feilretting (--fec). For hver gruppe på K datapakker sender klienten en paritetspakke med XOR av nyttelastene
+# (kortere nyttelaster fylles ut med nuller). Sekvensnummeret til paritetspakken er den første pakken i gruppen, og ack-feltet
+# har antall pakker i gruppen i de øvre 16 bitene og XOR av lengdene i de nedre. Mangler serveren nøyaktig én pakke i gruppen,
+# gjenskapes den fra pariteten og de andre pakkene, uten å vente på retransmisjon. Gruppene følger sekvensnumrene,
+# og bare første sending av hver pakke inngår i pariteten.
+MAX_FEC_GROUP = 255
+
+# Lager paritetspakkene på klienten
+class FecEncoder:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til FecEncoder-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle FecEncoder-objektet
+    # group: Antall datapakker per paritetspakke
+    # payload_size: Største nyttelast per pakke
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, group, payload_size):
+        self.group = group
+        self.payload_size = payload_size
+        self.reset()
+
+    # Beskrivelse av funksjonen:
+    # Starter en ny gruppe
+    # Argumenter:
+    # self: Referanse til det aktuelle FecEncoder-objektet
+    # Retur: Ingen returverdi for denne funksjonen
+    def reset(self):
+        self.first = None
+        self.count = 0
+        self.parity = 0
+        self.lengths = 0
+        self.longest = 0
+
+    # Beskrivelse av funksjonen:
+    # Legger en datapakke til pariteten
+    # Argumenter:
+    # self: Referanse til det aktuelle FecEncoder-objektet
+    # seq: Sekvensnummeret til pakken
+    # payload: Nyttelasten
+    # Funksjonen gjør:
+    # XOR regnes på heltall, der nyttelasten er venstrejustert i payload_size byte
+    # Retur: Returnerer pariteten (se flush) når gruppen er full, ellers None
+    def add(self, seq, payload):
+        if self.first is None:
+            self.first = seq - (seq - 1) % self.group
+        self.parity ^= int.from_bytes(payload, 'big') << (8 * (self.payload_size - len(payload)))
+        self.lengths ^= len(payload)
+        self.longest = max(self.longest, len(payload))
+        self.count += 1
+        return self.flush() if seq == self.first + self.group - 1 else None
+
+    # Beskrivelse av funksjonen:
+    # Lager pariteten for gruppen så langt, brukes også for den siste gruppen, som kan være kortere
+    # Argumenter:
+    # self: Referanse til det aktuelle FecEncoder-objektet
+    # Retur: Returnerer (første pakke, ack-feltet, nyttelast) for paritetspakken, eller None hvis gruppen er tom
+    def flush(self):
+        if not self.count:
+            return None
+        # Bytene etter den lengste nyttelasten er null og sendes ikke
+        payload = (self.parity >> (8 * (self.payload_size - self.longest))).to_bytes(self.longest, 'big')
+        parity = (self.first, (self.count << 16) | self.lengths, payload)
+        self.reset()
+        return parity
+
+# Gjenskaper tapte pakker på serveren
+class FecDecoder:
+    # Beskrivelse av funksjonen:
+    # Konstruktøren til FecDecoder-klassen.
+    # Argumenter:
+    # self: Referanse til det aktuelle FecDecoder-objektet
+    # group: Antall datapakker per paritetspakke
+    # payload_size: Største nyttelast per pakke
+    # Retur: Ingen returverdi for denne funksjonen.
+    def __init__(self, group, payload_size):
+        self.group = group
+        self.payload_size = payload_size
+        # Gruppene som ikke er ferdige: første sekvensnummer -> [XOR av nyttelastene, XOR av lengdene, antall pakker, sum av sekvensnumrene]
+        self.groups = {}
+
+    # Beskrivelse av funksjonen:
+    # Legger en ny datapakke til gruppen sin
+    # Argumenter:
+    # self: Referanse til det aktuelle FecDecoder-objektet
+    # seq: Sekvensnummeret til pakken
+    # payload: Nyttelasten
+    # Funksjonen gjør:
+    # Skal bare kalles én gang per pakke (ikke for duplikater). En full gruppe trengs ikke lenger og fjernes.
+    # Retur: Ingen returverdi for denne funksjonen
+    def add(self, seq, payload):
+        first = seq - (seq - 1) % self.group
+        state = self.groups.get(first)
+        if state is None:
+            state = self.groups[first] = [0, 0, 0, 0]
+        state[0] ^= int.from_bytes(payload, 'big') << (8 * (self.payload_size - len(payload)))
+        state[1] ^= len(payload)
+        state[2] += 1
+        state[3] += seq
+        if state[2] == self.group:
+            del self.groups[first]
+
+    # Beskrivelse av funksjonen:
+    # Prøver å gjenskape en tapt pakke fra en paritetspakke
+    # Argumenter:
+    # self: Referanse til det aktuelle FecDecoder-objektet
+    # first: Den første pakken i gruppen
+    # info: ack-feltet i paritetspakken (antall pakker og XOR av lengdene)
+    # parity: Nyttelasten i paritetspakken
+    # expected: Neste sekvensnummer serveren venter på. Grupper som er levert helt, glemmes.
+    # Retur: Returnerer (sekvensnummer, nyttelast) for den gjenskapte pakken, eller None hvis ingen eller flere enn én pakke mangler
+    def recover(self, first, info, parity, expected):
+        for start in [start for start in self.groups if start + self.group <= expected]:
+            del self.groups[start]
+        count, lengths = info >> 16, info & 0xFFFF
+        if first + count <= expected or not 1 <= count <= self.group or len(parity) > self.payload_size:
+            return None
+        state = self.groups.get(first, [0, 0, 0, 0])
+        if state[2] != count - 1:
+            return None
+        seq = count * first + count * (count - 1) // 2 - state[3]
+        length = lengths ^ state[1]
+        if length > self.payload_size:
+            return None
+        value = state[0] ^ (int.from_bytes(parity, 'big') << (8 * (self.payload_size - len(parity))))
+        self.groups.pop(first, None)
+        return seq, value.to_bytes(self.payload_size, 'big')[:length]
@@ -0,0 +1,5 @@
+# Felles oppsett for testene. Modulene ligger i src/ og importeres som når application.py kjøres derfra.
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
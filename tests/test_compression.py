@@ -0,0 +1,98 @@
+# Tester for komprimeringen: rammene klienten lager (ChunkCompressor) og tolkeren på serveren (FrameDecoder)
+import random
+
+import pytest
+
+from compression import (AVAILABLE_CODECS, COMPRESS_CHUNK, COMPRESS_FRAME, FRAME_COMPRESSED, FRAME_RAW, ChunkCompressor,
+                         FrameDecoder, compress_chunk, decompress_frame)
+
+
+# Tar imot filen som FrameDecoder tolker, som Connection.store og Connection.decompress på serveren
+class Receiver:
+    def __init__(self, codec):
+        self.codec = codec
+        self.data = bytearray()
+
+    def store(self, data):
+        self.data.extend(data)
+
+    def decompress(self, frame, length):
+        self.data.extend(decompress_frame(self.codec, frame, length))
+
+
+# Komprimerer området i filen, sender strømmen i pakker på packet byte og returnerer (kompressoren, strømmen, filen serveren fikk)
+def round_trip(path, codec, offset=0, length=None, packet=1400):
+    data = path.read_bytes()
+    length = len(data) - offset if length is None else length
+    stream = bytearray()
+    buffer = bytearray(packet)
+    with open(path, 'rb') as f:
+        compressor = ChunkCompressor(f, offset, length, codec)
+        try:
+            while True:
+                count = compressor.readinto(buffer)
+                if not count:
+                    break
+                stream.extend(buffer[:count])
+        finally:
+            compressor.close()
+    assert compressor.bytes_out == len(stream)
+    receiver = Receiver(codec)
+    decoder = FrameDecoder(receiver)
+    for start in range(0, len(stream), packet):
+        decoder.feed(stream[start:start + packet])
+    return compressor, stream, bytes(receiver.data)
+
+
+@pytest.mark.parametrize('codec', AVAILABLE_CODECS)
+def test_text_is_compressed_and_restored(tmp_path, codec):
+    data = b''.join(b'line %d of a very repetitive text file\n' % i for i in range(40000))
+    path = tmp_path / 'text'
+    path.write_bytes(data)
+    compressor, stream, rebuilt = round_trip(path, codec)
+    assert rebuilt == data
+    assert compressor.chunks == -(-len(data) // COMPRESS_CHUNK)
+    assert compressor.compressed == compressor.chunks
+    assert len(stream) < len(data) // 4
+
+
+def test_random_data_is_sent_raw_and_later_chunks_are_skipped(tmp_path):
+    data = random.Random(1).randbytes(6 * COMPRESS_CHUNK + 10)
+    path = tmp_path / 'random'
+    path.write_bytes(data)
+    compressor, stream, rebuilt = round_trip(path, 'zlib')
+    assert rebuilt == data
+    assert compressor.compressed == 0 and compressor.chunks == 7
+    assert len(stream) == len(data) + 7 * COMPRESS_FRAME.size
+
+
+def test_range_and_empty_file(tmp_path):
+    data = b'abc' * 200000
+    path = tmp_path / 'range'
+    path.write_bytes(data)
+    assert round_trip(path, 'zlib', 1000, 300001)[2] == data[1000:301001]
+    assert round_trip(path, 'zlib', 0, 0)[1:] == (b'', b'')
+
+
+def test_decompress_frame_never_exceeds_the_announced_length():
+    frame = compress_chunk('zlib', b'z' * 10000)
+    assert decompress_frame('zlib', frame, 10000) == b'z' * 10000
+    assert len(decompress_frame('zlib', frame, 100)) == 100
+    with pytest.raises(ValueError):
+        decompress_frame('zlib', frame, 20000)
+    with pytest.raises(ValueError):
+        decompress_frame('zlib', b'not zlib', 10)
+
+
+@pytest.mark.parametrize('header', [
+    COMPRESS_FRAME.pack(7, 10, 10),                       # ukjent type
+    COMPRESS_FRAME.pack(FRAME_RAW, 10, 11),               # ukomprimert ramme med ulik lengde
+    COMPRESS_FRAME.pack(FRAME_COMPRESSED, 0, 10),         # tom komprimert ramme
+    COMPRESS_FRAME.pack(FRAME_RAW, COMPRESS_CHUNK + 1, COMPRESS_CHUNK + 1),  # for stor blokk
+])
+def test_invalid_frames_are_rejected(header):
+    decoder = FrameDecoder(Receiver('zlib'))
+    # Hodet kan være delt over to pakker
+    decoder.feed(header[:3])
+    with pytest.raises(ValueError):
+        decoder.feed(header[3:])
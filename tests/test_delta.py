@@ -0,0 +1,126 @@
+# Tester for deltaoverføringen: koding mot sjekksummene til den forrige versjonen og gjenoppbygging på serveren
+import mmap
+import os
+import random
+
+import pytest
+
+from delta import (DELTA_COPY, DELTA_LITERAL, DELTA_MAX_LITERAL, DELTA_MIN_BLOCK, SIGNATURE_ENTRY, Basis, DeltaDecoder,
+                   DeltaEncoder, delta_records)
+
+
+# Tar imot den nye filen som DeltaDecoder bygger, som Connection.store og Connection.copy på serveren
+class Receiver:
+    def __init__(self, basis_data):
+        self.basis_data = basis_data
+        self.data = bytearray()
+
+    def store(self, data):
+        self.data.extend(data)
+
+    def copy(self, start, count):
+        self.data.extend(self.basis_data[start:start + count])
+
+
+@pytest.fixture
+def make_basis(tmp_path):
+    opened = []
+
+    def make(data):
+        path = tmp_path / 'basis'
+        path.write_bytes(data)
+        opened.append(Basis(str(path)))
+        return opened[-1]
+    yield make
+    for basis in opened:
+        basis.close()
+
+
+def signatures_of(basis):
+    entries = basis.signatures(0, basis.blocks)
+    return [SIGNATURE_ENTRY.unpack_from(entries, offset) for offset in range(0, len(entries), SIGNATURE_ENTRY.size)]
+
+
+# Koder new mot old, sender strømmen i pakker på packet byte og returnerer (strømmen, filen serveren bygde)
+def round_trip(make_basis, old, new, packet=1000):
+    basis = make_basis(old)
+    encoder = DeltaEncoder(new, basis.block, basis.size, signatures_of(basis))
+    stream = bytearray()
+    buffer = bytearray(packet)
+    while True:
+        count = encoder.readinto(buffer)
+        if not count:
+            break
+        stream.extend(buffer[:count])
+    assert encoder.bytes_out == len(stream)
+    receiver = Receiver(old)
+    decoder = DeltaDecoder(receiver, basis)
+    for start in range(0, len(stream), packet):
+        decoder.feed(stream[start:start + packet])
+    return stream, bytes(receiver.data)
+
+
+def test_identical_file_is_sent_as_copies(make_basis):
+    old = random.Random(1).randbytes(10 * DELTA_MIN_BLOCK + 123)
+    stream, rebuilt = round_trip(make_basis, old, old)
+    assert rebuilt == old
+    # Alle blokkene, også den korte siste, følger etter hverandre og blir én post
+    assert len(stream) == DELTA_COPY.size
+
+
+def test_insert_and_changes_send_only_the_difference(make_basis):
+    rng = random.Random(2)
+    old = rng.randbytes(40 * DELTA_MIN_BLOCK)
+    new = bytearray(old)
+    new[5000:5100] = rng.randbytes(100)
+    new[len(new) // 2:len(new) // 2] = b'inserted' * 50
+    stream, rebuilt = round_trip(make_basis, old, bytes(new))
+    assert rebuilt == new
+    assert len(stream) < 5 * DELTA_MIN_BLOCK
+
+
+def test_unrelated_file_is_split_into_bounded_literals(make_basis):
+    rng = random.Random(3)
+    old = rng.randbytes(3 * DELTA_MIN_BLOCK)
+    new = rng.randbytes(2 * DELTA_MAX_LITERAL + 1000)
+    basis = make_basis(old)
+    parts = list(delta_records(new, basis.block, basis.size, signatures_of(basis)))
+    headers = [bytes(part) for part in parts if len(part) == DELTA_LITERAL.size and part[:1] == b'L']
+    assert [DELTA_LITERAL.unpack(header)[1] for header in headers] == [DELTA_MAX_LITERAL, DELTA_MAX_LITERAL, 1000]
+    assert round_trip(make_basis, old, new, 1400)[1] == new
+
+
+@pytest.mark.parametrize('old, new', [(b'', b''), (b'', b'abc'), (b'x' * 5000, b'')])
+def test_empty_files(make_basis, old, new):
+    assert round_trip(make_basis, old, new)[1] == new
+
+
+def test_short_last_block_only_matches_at_the_end(make_basis):
+    rng = random.Random(4)
+    old = rng.randbytes(4 * DELTA_MIN_BLOCK + 500)
+    tail = old[-500:]
+    # Den korte blokken midt i filen kan ikke kopieres, bare på slutten
+    new = old[:DELTA_MIN_BLOCK] + tail + rng.randbytes(700) + tail
+    stream, rebuilt = round_trip(make_basis, old, new)
+    assert rebuilt == new
+    assert stream.endswith(DELTA_COPY.pack(b'C', 4, 1))
+
+
+def test_encoder_close_releases_the_file(tmp_path, make_basis):
+    path = tmp_path / 'new'
+    path.write_bytes(os.urandom(DELTA_MAX_LITERAL * 2))
+    basis = make_basis(b'')
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        encoder = DeltaEncoder(mapped, basis.block, basis.size, [])
+        assert encoder.readinto(bytearray(100)) == 100
+        encoder.close()
+        mapped.close()
+
+
+def test_corrupt_stream_is_rejected(make_basis):
+    basis = make_basis(b'y' * 3 * DELTA_MIN_BLOCK)
+    with pytest.raises(ValueError):
+        DeltaDecoder(Receiver(b''), basis).feed(b'X')
+    with pytest.raises(ValueError):
+        DeltaDecoder(Receiver(b''), basis).feed(DELTA_COPY.pack(b'C', 2, 2))
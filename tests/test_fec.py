@@ -0,0 +1,61 @@
+# Tester for feilrettingen: paritetspakkene klienten lager (FecEncoder) og gjenskaping av én tapt pakke på serveren (FecDecoder)
+import random
+
+import pytest
+
+from fec import FecDecoder, FecEncoder
+
+PAYLOAD = 100
+
+
+# Lager nyttelastene for pakkene 1..count. Den siste er kortere, som på slutten av en fil.
+def payloads(count, last=37):
+    rng = random.Random(count)
+    return {seq: rng.randbytes(PAYLOAD if seq < count else last) for seq in range(1, count + 1)}
+
+
+# Koder alle pakkene og returnerer paritetene
+def encode(group, packets):
+    encoder = FecEncoder(group, PAYLOAD)
+    parities = [encoder.add(seq, payload) for seq, payload in packets.items()]
+    parities.append(encoder.flush())
+    return [parity for parity in parities if parity is not None]
+
+
+@pytest.mark.parametrize('lost', [1, 3, 4, 5])
+def test_single_loss_is_rebuilt(lost):
+    packets = payloads(5)
+    parities = encode(4, packets)
+    # Én full gruppe og en kortere siste gruppe
+    assert [(first, info >> 16) for first, info, _ in parities] == [(1, 4), (5, 1)]
+    decoder = FecDecoder(4, PAYLOAD)
+    for seq, payload in packets.items():
+        if seq != lost:
+            decoder.add(seq, payload)
+    parity = parities[0] if lost <= 4 else parities[1]
+    assert decoder.recover(*parity, expected=lost) == (lost, packets[lost])
+
+
+def test_two_losses_in_a_group_cannot_be_rebuilt():
+    packets = payloads(8)
+    parities = encode(4, packets)
+    decoder = FecDecoder(4, PAYLOAD)
+    for seq, payload in packets.items():
+        if seq not in (2, 3):
+            decoder.add(seq, payload)
+    assert decoder.recover(*parities[0], expected=2) is None
+    # Den andre gruppen er komplett og trenger ikke pariteten
+    assert decoder.recover(*parities[1], expected=2) is None
+
+
+def test_delivered_groups_and_bad_parity_are_ignored():
+    packets = payloads(4, PAYLOAD)
+    first, info, parity = encode(4, packets)[0]
+    decoder = FecDecoder(4, PAYLOAD)
+    for seq in (1, 2, 3):
+        decoder.add(seq, packets[seq])
+    # Pariteten er lengre enn en pakke
+    assert decoder.recover(first, info, parity + b'x', expected=4) is None
+    # Gruppen er allerede levert, og serveren glemmer den
+    assert decoder.recover(first, info, parity, expected=5) is None
+    assert not decoder.groups
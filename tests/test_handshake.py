@@ -0,0 +1,116 @@
+# Tester for håndtrykket mot en ekte server på localhost, med pakker som lages for hånd
+import socket
+import threading
+import time
+
+import pytest
+
+from application import (ACK, HEADER_V1, LOG_SILENT, MIN_PAYLOAD, MODE_SR, SYN, Client, Connection, Server,
+                         create_packet, encode_handshake, encode_options)
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = Server('127.0.0.1', 0, None, 3, None, output_dir=str(tmp_path), log_level=LOG_SILENT)
+    thread = threading.Thread(target=server.start, daemon=True)
+    thread.start()
+    yield server
+    server.stop()
+    thread.join(5)
+
+
+@pytest.fixture
+def client(server):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(2)
+    sock.connect(server.sock.getsockname())
+    yield sock
+    sock.close()
+
+
+# Sender SYN-pakken og returnerer SYN-ACK-pakken
+def handshake(client, seq=0):
+    client.send(create_packet(seq, encode_handshake(2, MODE_SR), SYN))
+    return client.recv(2048)
+
+
+def send_ack(client, options):
+    payload = encode_options(options)
+    client.send(create_packet(0, 0, ACK, 2, len(payload)) + payload)
+
+
+# Venter til forbindelsen fra klienten har tilstanden state, eller til tiden er ute
+def wait_for_state(server, client, state, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        connection = server.connections.get(client.getsockname())
+        if connection is not None and connection.state == state:
+            return connection
+        time.sleep(0.01)
+    return None
+
+
+@pytest.mark.parametrize('payload', [0, -1, MIN_PAYLOAD - 1, 'abc', 1000.5, True, None])
+def test_invalid_payload_is_rejected_and_the_server_keeps_running(server, client, payload):
+    assert HEADER_V1.unpack_from(handshake(client))[2] == SYN | ACK
+    send_ack(client, {'payload': payload})
+    # Tidtakerne kjører med forbindelsen i SYN_RECEIVED uten å feile
+    time.sleep(0.2)
+    connection = server.connections.get(client.getsockname())
+    assert connection is not None and connection.state == Connection.SYN_RECEIVED
+    # En gyldig ACK-pakke etablerer forbindelsen etterpå, så serveren lever fortsatt
+    send_ack(client, {'payload': 500})
+    connection = wait_for_state(server, client, Connection.ESTABLISHED)
+    assert connection is not None and connection.payload_size == 500
+
+
+def test_payload_is_capped_at_max_payload(server, client):
+    handshake(client)
+    send_ack(client, {'payload': server.max_payload + 1000})
+    connection = wait_for_state(server, client, Connection.ESTABLISHED)
+    assert connection is not None and connection.payload_size == server.max_payload
+
+
+def test_duplicate_syn_during_the_handshake_gets_the_same_syn_ack(server, client):
+    first = handshake(client, 1234)
+    assert HEADER_V1.unpack_from(first)[1] == 1235
+    connection = server.connections[client.getsockname()]
+    assert handshake(client, 1234) == first
+    assert server.connections[client.getsockname()] is connection
+
+
+def test_delayed_syn_does_not_restart_a_live_connection(server, client):
+    handshake(client, 1234)
+    send_ack(client, {'payload': 500})
+    connection = wait_for_state(server, client, Connection.ESTABLISHED)
+    client.send(create_packet(1234, encode_handshake(2, MODE_SR), SYN))
+    # Kopien ignoreres: ingen SYN-ACK, og forbindelsen er den samme
+    client.settimeout(0.3)
+    with pytest.raises(socket.timeout):
+        client.recv(2048)
+    assert server.connections[client.getsockname()] is connection
+    assert connection.state == Connection.ESTABLISHED
+
+
+@pytest.mark.parametrize('seq', [4321, 0])
+def test_new_syn_restarts_the_connection(server, client, seq):
+    handshake(client, 1234)
+    send_ack(client, {'payload': 500})
+    connection = wait_for_state(server, client, Connection.ESTABLISHED)
+    # En ny ISN, eller 0 fra en eldre klient, betyr at klienten har startet på nytt
+    assert HEADER_V1.unpack_from(handshake(client, seq))[1] == seq + 1
+    assert server.connections[client.getsockname()] is not connection
+    assert server.connections[client.getsockname()].state == Connection.SYN_RECEIVED
+
+
+def test_client_only_accepts_the_syn_ack_for_its_own_isn(server, tmp_path):
+    sender = Client('127.0.0.1', server.sock.getsockname()[1], None, 3, None, log_level=LOG_SILENT, source=b'x' * 5000)
+    assert sender.is_own_syn_ack(create_packet(encode_handshake(2, MODE_SR), sender.isn + 1, SYN | ACK))
+    assert not sender.is_own_syn_ack(create_packet(encode_handshake(2, MODE_SR), sender.isn + 2, SYN | ACK))
+    assert sender.connect()
+    # Håndtrykket med ISN virker mot serveren, og dataene kommer frem når skrivetråden har lukket filen
+    received = tmp_path / 'Photo_received_1.jpg'
+    deadline = time.time() + 2
+    while not (received.exists() and received.stat().st_size == 5000) and time.time() < deadline:
+        time.sleep(0.01)
+    assert received.read_bytes() == b'x' * 5000
@@ -0,0 +1,95 @@
+# Tester for pakkehodet, sekvensnumre som går rundt og sendevinduet (SendBuffer)
+import io
+import struct
+
+import pytest
+
+from application import (ACK, FIN, HEADER_V1, HEADER_V2, SendBuffer, create_packet, header_size, pack_header_into,
+                         parse_header, unwrap_seq)
+
+
+@pytest.mark.parametrize('version', [1, 2])
+def test_header_round_trip(version):
+    packet = create_packet(70000, 5, ACK, version, 3) + b'abc'
+    seq, ack, flags, length = parse_header(packet, version)
+    # Versjon 1 har 16-bits sekvensnummer, så 70000 går rundt
+    assert seq == (70000 & 0xFFFF if version == 1 else 70000)
+    assert (ack, flags, length) == (5, ACK, 3)
+
+
+def test_pack_header_into_matches_create_packet():
+    buffer = bytearray(header_size(2))
+    assert pack_header_into(buffer, 1 << 33, 7, FIN, 2, 10) == HEADER_V2.size
+    assert bytes(buffer) == create_packet(1 << 33, 7, FIN, 2, 10)
+
+
+def test_parse_header_rejects_wrong_version_and_truncated_packets():
+    with pytest.raises(ValueError):
+        parse_header(create_packet(1, 0, 0, 2), 3)
+    with pytest.raises(ValueError):
+        parse_header(create_packet(1, 0, 0, 2, 100) + b'x', 2)
+    with pytest.raises(struct.error):
+        parse_header(b'\x02\x00', 2)
+    assert HEADER_V1.size == 6
+
+
+@pytest.mark.parametrize('version, bits', [(1, 16), (2, 32)])
+def test_unwrap_seq_across_wrap_around(version, bits):
+    modulus = 1 << bits
+    reference = modulus - 2
+    # Små numre etter referansen har gått rundt og ligger foran den
+    assert unwrap_seq(1, reference, version) == modulus + 1
+    assert unwrap_seq(modulus - 5, reference, version) == modulus - 5
+    # Etter flere runder velges nummeret nærmest referansen
+    reference = 3 * modulus + 10
+    assert unwrap_seq(8, reference, version) == 3 * modulus + 8
+    assert unwrap_seq(modulus - 1, reference, version) == 3 * modulus - 1
+    # Halvveis rundt er det lengste som kan skilles fra et nummer bak referansen
+    assert unwrap_seq((reference + modulus // 2 - 1) % modulus, reference, version) == reference + modulus // 2 - 1
+    assert unwrap_seq((reference + modulus // 2) % modulus, reference, version) == reference - modulus // 2
+
+
+def test_send_buffer_reads_acks_and_wraps_the_ring():
+    window = SendBuffer(3, 4)
+    assert window.capacity == 4
+    data = io.BytesIO(bytes(range(40)))
+    seqs = [window.read_next(data) for _ in range(4)]
+    assert seqs == [1, 2, 3, 4]
+    assert not window.has_room()
+    assert bytes(window.payload(2)) == bytes([4, 5, 6, 7])
+    # Selektiv ACK flytter ikke basen før hullet foran er fylt
+    assert window.ack(2) == (True, False)
+    assert window.base == 1 and len(window) == 3
+    assert window.ack(2) == (False, False)
+    assert window.ack_through(2) == 1
+    assert window.base == 3
+    assert list(window.unacked()) == [3, 4]
+    # Plassene til bekreftede pakker brukes på nytt
+    window.mark_sent(3, retransmit=True)
+    assert window.read_next(data) == 5
+    assert window.read_next(data) == 6
+    assert bytes(window.payload(6)) == bytes([20, 21, 22, 23])
+    assert window.ack(3) == (True, True)
+    assert window.ack_through(7) == 3
+    assert len(window) == 0 and window.base == 7
+
+
+def test_send_buffer_limit_and_end_of_file():
+    window = SendBuffer(4, 8)
+    data = io.BytesIO(b'0123456789')
+    assert window.read_next(data, 3) == 1
+    assert bytes(window.payload(1)) == b'012'
+    assert window.read_next(data, 0) is None
+    assert window.read_next(data) == 2
+    assert bytes(window.payload(2)) == b'3456789'
+    assert window.read_next(data) is None
+
+
+def test_send_buffer_slices_a_buffer_without_copying():
+    window = SendBuffer(4, 4)
+    source = bytearray(b'abcdefghij')
+    window.use_buffer(source)
+    assert [window.read_next(None) for _ in range(3)] == [1, 2, 3]
+    assert window.read_next(None) is None
+    source[8] = ord('X')
+    assert bytes(window.payload(3)) == b'Xj'
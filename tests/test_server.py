@@ -0,0 +1,23 @@
+# Tester for hendelsesløkken på serveren
+from application import LOG_SILENT, Connection, Server
+
+
+def test_failing_timer_removes_only_its_connection(tmp_path):
+    server = Server('127.0.0.1', 0, None, 3, None, output_dir=str(tmp_path), log_level=LOG_SILENT)
+    try:
+        broken = Connection(server, ('127.0.0.1', 1))
+        healthy = Connection(server, ('127.0.0.1', 2))
+        server.connections = {broken.address: broken, healthy.address: healthy}
+
+        def fail(now):
+            raise ZeroDivisionError("division by zero")
+        broken.on_timer = fail
+        server.run_timers()
+        assert server.connections == {healthy.address: healthy}
+        assert broken.state == Connection.CLOSED
+    finally:
+        server.sock.close()
+        server.wakeup_receiver.close()
+        server.wakeup_sender.close()
+        server.writer.close()
+        server.log.close()